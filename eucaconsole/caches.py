@@ -26,9 +26,18 @@
 
 
 import inspect
+import logging
 import pylibmc
+import threading
+import time
+from collections import OrderedDict
 from hashlib import sha256
+from uuid import uuid4
 from dogpile.cache import make_region
+from dogpile.cache.api import NO_VALUE
+
+LOCAL_CACHE_MAX_ENTRIES = 256
+LOCAL_CACHE_EXPIRE = 30  # seconds
 
 
 def euca_key_generator(namespace, fn):
@@ -59,10 +68,206 @@ def invalidate_cache(cache, namespace, *arg):
     except pylibmc.Error as err:
         pass  # ignore memcached communication error... we tried
 
+
+def cache_get_multi(cache, keys):
+    """Fetch keys in one round trip, with NO_VALUE for each key when the cache is unconfigured or not responding"""
+    if not cache.is_configured or not keys:
+        return [NO_VALUE] * len(keys)
+    try:
+        return cache.get_multi(keys)
+    except pylibmc.Error:
+        logging.warn('memcached not responding')
+        return [NO_VALUE] * len(keys)
+
+
+def cache_set_multi(cache, mapping):
+    """Store a dict of {key: value} in one round trip, doing nothing when the cache is unavailable"""
+    if not cache.is_configured or not mapping:
+        return
+    try:
+        cache.set_multi(mapping)
+    except pylibmc.Error:
+        pass  # values will simply be fetched again next time
+
+
+def refresh_in_background(cache, key, creator, mutex):
+    """
+    Regenerate an expired value on a separate thread while the stale value is returned
+    to the caller. The dogpile mutex is held until the new value is stored, so only one
+    worker refreshes a given key at a time.
+    """
+    def runner():
+        try:
+            cache.set(key, creator())
+        except Exception as err:
+            logging.warn(u'Unable to refresh cached resources: {0}'.format(err))
+        finally:
+            mutex.release()
+    thread = threading.Thread(target=runner)
+    thread.daemon = True
+    thread.start()
+
+
+def strip_connections(item, _seen=None):
+    """
+    Remove connection references from boto objects (recursively) so they can be pickled
+    """
+    if _seen is None:
+        _seen = set()
+    if id(item) in _seen:
+        return item
+    _seen.add(id(item))
+    if isinstance(item, (list, tuple, set)):
+        for value in item:
+            strip_connections(value, _seen)
+    if isinstance(item, dict):
+        for value in item.values():
+            strip_connections(value, _seen)
+    attrs = getattr(item, '__dict__', None)
+    if attrs:
+        if 'connection' in attrs:
+            attrs['connection'] = None
+        for value in attrs.values():
+            if not isinstance(value, (basestring, int, long, float, bool)) and value is not None:
+                strip_connections(value, _seen)
+    return item
+
+
+class GenerationalCache(object):
+    """
+    Keys values by a scope (e.g. account, region and cloud host) plus a generation id for that scope.
+    invalidate() starts a new generation, which drops every value cached for the scope at once.
+    """
+    def __init__(self, region, generation_namespace):
+        self.region = region
+        self.generation_namespace = generation_namespace
+
+    def _generation_key_(self, *scope):
+        return euca_key_generator(self.generation_namespace, None)(None, *scope)
+
+    def get_generation(self, *scope):
+        gen_key = self._generation_key_(*scope)
+        generation = self.region.get(gen_key, ignore_expiration=True)
+        if generation is NO_VALUE:
+            generation = uuid4().hex
+            self.region.set(gen_key, generation)
+        return generation
+
+    def make_key(self, namespace, scope, *args):
+        generation = self.get_generation(*scope)
+        return euca_key_generator(namespace, None)(None, generation, *(tuple(scope) + args))
+
+    def invalidate(self, *scope):
+        try:
+            self.region.set(self._generation_key_(*scope), uuid4().hex)
+        except pylibmc.Error:
+            pass  # ignore memcached communication error... we tried
+
+
+class ResourceSnapshotCache(GenerationalCache):
+    """
+    Per-account cache of resource listings used by the landing page JSON views (args keep users apart).
+    Values older than the region's expiration time are served while being refreshed in the
+    background (see refresh_in_background). Bumping the account generation invalidates every
+    listing cached for that account/region/ufshost.
+    """
+    def __init__(self, region):
+        super(ResourceSnapshotCache, self).__init__(region, 'resource_snapshots_generation')
+
+    def get_or_create(self, namespace, creator, acct, region, ufshost, *args):
+        key = self.make_key(namespace, (acct, region, ufshost), *args)
+        return self.region.get_or_create(key, lambda: strip_connections(creator()))
+
+
+class LocalCache(object):
+    """
+    Bounded in-process LRU cache whose entries expire after expiration_time seconds.
+    Values are shared between threads, so callers must not modify what they get back.
+    """
+    def __init__(self, max_entries=LOCAL_CACHE_MAX_ENTRIES, expiration_time=LOCAL_CACHE_EXPIRE):
+        self._entries_ = OrderedDict()
+        self._lock_ = threading.Lock()
+        self.configure(max_entries, expiration_time)
+
+    def configure(self, max_entries, expiration_time):
+        self.max_entries = int(max_entries)
+        self.expiration_time = int(expiration_time)
+        self.clear()
+
+    def get(self, key):
+        with self._lock_:
+            entry = self._entries_.pop(key, None)
+            if entry is None or entry[1] < time.time():
+                return NO_VALUE
+            self._entries_[key] = entry  # most recently used
+            return entry[0]
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock_:
+            self._entries_.pop(key, None)
+            self._entries_[key] = (value, time.time() + self.expiration_time)
+            while len(self._entries_) > self.max_entries:
+                self._entries_.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock_:
+            self._entries_.pop(key, None)
+
+    def clear(self):
+        with self._lock_:
+            self._entries_.clear()
+
+
+class TieredCache(object):
+    """
+    Serves hot, rarely changing values (regions, zones, instance types...) from the process-local
+    LocalCache, falling back to the shared memcached region and then to the creator.
+    invalidate() drops the value from memcached and from this process only; there is no signal to the
+    other console processes, which keep serving their local copy until it expires (cache.local.expire).
+    Only cache values here that may safely be that stale.
+    """
+    def __init__(self, region, local):
+        self.region = region
+        self.local = local
+
+    def get_or_create(self, key, creator):
+        value = self.local.get(key)
+        if value is NO_VALUE:
+            if not self.region.is_configured:
+                value = creator()
+            else:
+                try:
+                    value = self.region.get_or_create(key, creator)
+                except pylibmc.Error:
+                    logging.warn('memcached not responding')
+                    value = creator()
+            self.local.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        self.local.delete(key)
+        if not self.region.is_configured:
+            return
+        try:
+            self.region.delete(key)
+        except pylibmc.Error:
+            pass  # ignore memcached communication error... we tried
+
+
 # caches available within the app
 short_term = make_region(function_key_generator=euca_key_generator)
 default_term = make_region(function_key_generator=euca_key_generator)
 long_term = make_region(function_key_generator=euca_key_generator)
 extra_long_term = make_region(function_key_generator=euca_key_generator)
-
-
+resource_snapshots = make_region(
+    function_key_generator=euca_key_generator, async_creation_runner=refresh_in_background)
+resource_snapshot_cache = ResourceSnapshotCache(resource_snapshots)
+iam_cache = GenerationalCache(short_term, 'iam_cache_generation')
+alarm_status_cache = GenerationalCache(short_term, 'alarm_status_generation')
+objects_count_cache = GenerationalCache(short_term, 'bucket_objects_count_generation')
+images_by_snapshot_cache = GenerationalCache(short_term, 'images_by_snapshot_generation')
+local_term = LocalCache()
+default_term_tiered = TieredCache(default_term, local_term)
+extra_long_term_tiered = TieredCache(extra_long_term, local_term)
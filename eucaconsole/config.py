@@ -43,7 +43,7 @@ from pyramid.settings import asbool
 
 from .i18n import custom_locale_negotiator
 from .models import SiteRootFactory
-from .models.auth import groupfinder, User
+from .models.auth import groupfinder, ConnectionManager, User
 from .routes import urls
 from .tweens import setup_tweens
 from .keymgt import ensure_session_keys
@@ -52,6 +52,9 @@ from .caches import short_term
 from .caches import default_term
 from .caches import long_term
 from .caches import extra_long_term
+from .caches import resource_snapshots
+from .caches import local_term, LOCAL_CACHE_EXPIRE, LOCAL_CACHE_MAX_ENTRIES
+from .jobs import background_jobs, JOB_WORKERS
 from .views import escape_braces
 
 
@@ -134,6 +137,10 @@ def get_configurator(settings, enable_auth=True):
     if not boto.config.has_section('Boto'):
         boto.config.add_section('Boto')
     boto.config.set('Boto', 'num_retries', settings.get('connection.retries', '2'))
+    ConnectionManager.pool.configure(
+        max_idle=int(settings.get('connection.pool.max_idle', 300)),
+        max_size=int(settings.get('connection.pool.size', 500)),
+    )
 
     memory_cache = settings.get('cache.memory')
     memory_cache_url = settings.get('cache.memory.url')
@@ -187,6 +194,26 @@ def get_configurator(settings, enable_auth=True):
             'password': password
         },
     )
+    resource_snapshots.configure(
+        memory_cache,
+        expiration_time=int(settings.get('cache.resource_snapshots.expire', 15)),
+        arguments={
+            'url': [memory_cache_url],
+            'binary': True,
+            'min_compress_len': 1024,
+            'behaviors': {"tcp_nodelay": True, "ketama": True},
+            'username': username,
+            'password': password,
+            'distributed_lock': True,
+            'lock_timeout': int(settings.get('cache.resource_snapshots.lock_timeout', 60)),
+            'memcached_expire_time': int(settings.get('cache.resource_snapshots.hard_expire', 300)),
+        },
+    )
+    local_term.configure(
+        max_entries=int(settings.get('cache.local.max_entries', LOCAL_CACHE_MAX_ENTRIES)),
+        expiration_time=int(settings.get('cache.local.expire', LOCAL_CACHE_EXPIRE)),
+    )
+    background_jobs.configure(settings.get('jobs.workers', JOB_WORKERS))
     return config
 
 
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+
+"""
+Eucalyptus and AWS CloudFormation constants
+
+drawn from here:
+http://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-template-resource-type-ref.html
+and https://www.eucalyptus.com/docs/eucalyptus/4.1.1/index.html#cloudformation/cf_overview.html
+
+"""
+
+# Resource types (matched by prefix) that Eucalyptus CloudFormation does not support
+AWS_RESOURCE_PREFIXES = [
+    'AWS::AutoScaling::LifecycleHook',
+    'AWS::AutoScaling::ScheduledAction',
+    'AWS::CloudFront',
+    'AWS::CloudTrail',
+    'AWS::DynamoDB',
+    'AWS::EC2::VPCEndpoint',
+    'AWS::EC2::VPCPeeringConnection',
+    'AWS::EC2::VPNConnection',
+    'AWS::EC2::VPNConnectionRoute',
+    'AWS::EC2::VPNGateway',
+    'AWS::EC2::VPNGatewayRoutePropagation',
+    'AWS::ElastiCache',
+    'AWS::ElasticBeanstalk',
+    'AWS::Kinesis',
+    'AWS::Logs',
+    'AWS::OpsWOrks',
+    'AWS::Redshift',
+    'AWS::RDS',
+    'AWS::Route53',
+    'AWS::S3::BucketPolicy',
+    'AWS::SDB',
+    'AWS::SNS',
+    'AWS::SQS'
+]
+
+# Resource properties Eucalyptus CloudFormation does not support, by resource type prefix
+UNSUPPORTED_PROPERTIES = [
+    {'resource': 'AWS::AutoScaling::AutoScalingGroup', 'properties': [
+        'HealthCheckType', 'Tags', 'VpcZoneIdentifier'
+    ]},
+    {'resource': 'AWS::AutoScaling::LaunchConiguration', 'properties': [
+        'AssociatePublicIpAddress'
+    ]},
+    {'resource': 'AWS::EC2::EIP', 'properties': [
+        'Domain'
+    ]},
+    {'resource': 'AWS::EC2::Volume', 'properties': [
+        'HealthCheckType', 'Tags'
+    ]},
+    {'resource': 'AWS::ElasticLoadBalancing::LoadBalancer', 'properties': [
+        'AccessLoggingPolicy', 'ConnectionDrainingPolicy',
+        'Policies.InstancePorts', 'Policies.LoadBalancerPorts'
+    ]},
+    {'resource': 'AWS::IAM::AccessKey', 'properties': [
+        'Serial'
+    ]}
+]
@@ -31,9 +31,10 @@ IMPORTANT: All forms needing CSRF protection should inherit from BaseSecureForm
 
 """
 import logging
-import pylibmc
 import sys
 import os
+import threading
+import time
 
 from defusedxml import ElementTree
 from markupsafe import escape
@@ -43,8 +44,8 @@ from wtforms.widgets import html_params, HTMLString, Select
 
 from boto.exception import BotoServerError
 
-from ..caches import extra_long_term
-from ..caches import invalidate_cache
+from ..caches import euca_key_generator
+from ..caches import extra_long_term_tiered
 from ..constants.elbs import ELB_PREDEFINED_SECURITY_POLICY_NAME_PREFIX
 from ..constants.instances import AWS_INSTANCE_TYPE_CHOICES
 from ..i18n import _
@@ -130,11 +131,7 @@ class ChoicesManager(object):
         return sorted(choices)
 
     def get_availability_zones(self, ufshost):
-        @extra_long_term.cache_on_arguments(namespace='availability_zones')
-        def _get_zones_cache_(self, ufshost):
-            return _get_zones_(self, ufshost)
-
-        def _get_zones_(self, ufshost):
+        def _get_zones_():
             zones = []
             if self.conn is not None:
                 zones = self.conn.get_all_zones()
@@ -142,10 +139,8 @@ class ChoicesManager(object):
                 del zone.connection
                 del zone.region
             return zones
-        try:
-            return _get_zones_cache_(self, ufshost)
-        except pylibmc.Error:
-            return _get_zones_(self, ufshost)
+        cache_key = euca_key_generator('availability_zones', None)(None, ufshost)
+        return extra_long_term_tiered.get_or_create(cache_key, _get_zones_)
 
     def instances(self, instances=None, states=None, escapebraces=True, add_blank=True, id_first=False):
         from ..views import TaggedItemView
@@ -167,7 +162,7 @@ class ChoicesManager(object):
 
     @staticmethod
     def invalidate_instance_types():
-        invalidate_cache(extra_long_term, 'instance_types')
+        extra_long_term_tiered.invalidate(euca_key_generator('instance_types', None)(None))
 
     def instance_types(self, cloud_type='euca', add_blank=True, add_description=True):
         """Get instance type (e.g. m1.small) choices
@@ -177,13 +172,7 @@ class ChoicesManager(object):
         if add_blank:
             choices.append(BLANK_CHOICE)
         if cloud_type == 'euca':
-            types = []
-
-            @extra_long_term.cache_on_arguments(namespace='instance_types')
-            def _get_instance_types_cache_(self):
-                return _get_instance_types_(self)
-
-            def _get_instance_types_(self):
+            def _get_instance_types_():
                 types = []
                 if self.conn is not None:
                     types = self.conn.get_all_instance_types()
@@ -191,10 +180,8 @@ class ChoicesManager(object):
                     del inst_type.connection
                     del inst_type.region
                 return types
-            try:
-                types.extend(_get_instance_types_cache_(self))
-            except pylibmc.Error:
-                types.extend(_get_instance_types_(self))
+            cache_key = euca_key_generator('instance_types', None)(None)
+            types = extra_long_term_tiered.get_or_create(cache_key, _get_instance_types_)
             choices = []
             for vmtype in types:
                 vmtype_str = _(u'{0}: {1} CPUs, {2} memory (MB), {3} disk (GB,root device)').format(
@@ -465,9 +452,29 @@ class ChoicesManager(object):
 
 
 class CFSampleTemplateManager(object):
+    """
+    Sample CloudFormation templates shipped in cf-templates plus those in the admin's S3 sample bucket
+
+    Listings are kept in a process-wide catalog.  A listing older than CATALOG_MAX_AGE seconds is
+    still returned while a background thread refreshes it.  Template bodies are cached by file
+    location and are re-read only when the file's mtime (or the S3 key's ETag) changes.
+    """
+    CATALOG_MAX_AGE = 300
+    _catalog_ = {}  # (source, location) -> dict(loaded, templates, versions)
+    _bodies_ = {}  # (directory, file name) -> (version, body)
+    _refreshing_ = set()
+    _lock_ = threading.Lock()
 
     def __init__(self, s3_bucket):
         self.s3_bucket = s3_bucket
+        self.template_dir = self.get_template_dir()
+
+    @staticmethod
+    def get_template_dir():
+        template_dir = os.path.join(os.getcwd(), 'eucaconsole/cf-templates')
+        if not os.path.exists(template_dir) and os.path.exists('/usr/share/eucaconsole/cf-templates'):
+            template_dir = '/usr/share/eucaconsole/cf-templates'
+        return template_dir
 
     def get_template_options(self):
         templates = []
@@ -479,26 +486,95 @@ class CFSampleTemplateManager(object):
         templates = [(directory, files) for (directory, category, files) in self._get_templates_()]
         return templates
 
+    def get_template_body(self, template_name):
+        """Return the body of the sample template with the given file name, or None if there is no such sample"""
+        location = None
+        for source in self._get_sources_():
+            for directory, category, files in source['templates']:
+                if template_name in [file_name for (name, file_name) in files]:
+                    # later listings win, S3 samples override the ones shipped with the console
+                    location = (directory, source['versions'].get((directory, template_name)))
+        if location is None:
+            return None
+        directory, version = location
+        cached = self._bodies_.get((directory, template_name))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if directory == 's3':
+            body = self.s3_bucket.get_key(template_name).get_contents_as_string()
+        else:
+            with open(os.path.join(directory, template_name), 'r') as fd:
+                body = fd.read()
+        self._bodies_[(directory, template_name)] = (version, body)
+        return body
+
     def _get_templates_(self):
         templates = []
-        self.template_dir = os.path.join(os.getcwd(), 'eucaconsole/cf-templates')
-        if not os.path.exists(self.template_dir) and os.path.exists('/usr/share/eucaconsole/cf-templates'):
-            self.template_dir = '/usr/share/eucaconsole/cf-templates'
-        euca_templates = []
+        for source in self._get_sources_():
+            templates.extend(source['templates'])
+        return templates
+
+    def _get_sources_(self):
+        sources = [self._get_source_(('local', self.template_dir), self._list_local_templates_)]
+        if self.s3_bucket is not None:
+            sources.append(self._get_source_(('s3', self.s3_bucket.name), self._list_s3_templates_))
+        return sources
+
+    def _get_source_(self, source_key, loader):
+        with self._lock_:
+            source = self._catalog_.get(source_key)
+            refresh = source is not None and source_key not in self._refreshing_ and \
+                time.time() - source['loaded'] > self.CATALOG_MAX_AGE
+            if refresh:
+                self._refreshing_.add(source_key)
+        if source is None:
+            return self._load_source_(source_key, loader)
+        if refresh:
+            thread = threading.Thread(
+                target=self._refresh_source_, args=(source_key, loader), name='cf-template-catalog')
+            thread.daemon = True
+            thread.start()
+        return source
+
+    def _load_source_(self, source_key, loader):
+        templates, versions = loader()
+        source = dict(loaded=time.time(), templates=templates, versions=versions)
+        with self._lock_:
+            self._catalog_[source_key] = source
+        return source
+
+    def _refresh_source_(self, source_key, loader):
+        try:
+            self._load_source_(source_key, loader)
+        except (BotoServerError, EnvironmentError) as err:
+            logging.warn(u'Unable to refresh sample templates from {0}: {1}'.format(source_key[1], err))
+        finally:
+            with self._lock_:
+                self._refreshing_.discard(source_key)
+
+    def _list_local_templates_(self):
+        templates = []
+        versions = {}
         for dir_name, subdir_list, filelist in os.walk(self.template_dir):
+            euca_templates = []
             for file_item in filelist:
                 name = file_item
                 if file_item.find('.') > -1:
                     name = file_item[:file_item.find('.')]
                 euca_templates.append((name, file_item))
+                versions[(dir_name, file_item)] = os.path.getmtime(os.path.join(dir_name, file_item))
             if len(euca_templates) > 0:
                 templates.append((dir_name, dir_name[dir_name.rindex('/') + 1:], euca_templates))
-        if self.s3_bucket is not None:
-            admin_templates = []
-            bucket_items = self.s3_bucket.list()
-            for key in bucket_items:
-                name = key.name[:key.name.index('.')]
-                admin_templates.append((name, key.name))
-            if len(admin_templates) > 0:
-                templates.append(('s3', _(u'Local'), admin_templates))
-        return templates
+        return templates, versions
+
+    def _list_s3_templates_(self):
+        templates = []
+        versions = {}
+        admin_templates = []
+        for key in self.s3_bucket.list():
+            name = key.name[:key.name.index('.')]
+            admin_templates.append((name, key.name))
+            versions[('s3', key.name)] = key.etag
+        if len(admin_templates) > 0:
+            templates.append(('s3', _(u'Local'), admin_templates))
+        return templates, versions
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Lookup indexes for resources returned by describe calls
+
+Landing page JSON views join several describe results together (e.g. instances with
+their security groups, key pairs and subnets). Build an index once per request and
+look items up by key instead of scanning the full list for every row.
+
+"""
+
+
+def _get_key_func_(key):
+    if callable(key):
+        return key
+    return lambda item: getattr(item, key, None)
+
+
+class ResourceIndex(object):
+    """Resources indexed by a single attribute (or key function)
+
+    :param items: iterable of resources (e.g. boto objects)
+    :param key: attribute name or callable returning the lookup key for an item.
+        Items with a key of None are skipped.  If more than one item shares a key, the first one wins,
+        matching the behavior of the linear scans this replaces.
+
+    """
+    def __init__(self, items=None, key='id'):
+        self._items = {}
+        key_func = _get_key_func_(key)
+        for item in items or []:
+            item_key = key_func(item)
+            if item_key is not None and item_key not in self._items:
+                self._items[item_key] = item
+
+    def get(self, item_key, default=None):
+        return self._items.get(item_key, default)
+
+    def keys(self):
+        return self._items.keys()
+
+    def values(self):
+        return self._items.values()
+
+    def __getitem__(self, item_key):
+        return self._items[item_key]
+
+    def __contains__(self, item_key):
+        return item_key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+def group_by(items, key):
+    """Return a dict of lists of resources keyed by an attribute (or key function), preserving item order"""
+    groups = {}
+    key_func = _get_key_func_(key)
+    for item in items or []:
+        item_key = key_func(item)
+        if item_key is not None:
+            groups.setdefault(item_key, []).append(item)
+    return groups
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Background jobs for long-running console operations
+
+A view submits a job and returns right away.  The job runs on a small pool of worker threads and
+records its state in the long_term cache region, so any console worker can answer status polls from the
+job_status_json route.  When memcached isn't configured (or stops responding) the state is kept in process
+memory instead, and only the worker that ran a job can report on it; the browser side retries polls that
+miss (see eucaWaitForJob and background_jobs.js), but deployments running more than one worker process
+need memcached for reliable job tracking.
+
+Worker threads are plain threading.Thread objects, so they become green threads
+when the console runs under gunicorn's eventlet worker class.  The pool size is set
+with the jobs.workers setting.
+
+Jobs submitted before a redirect can be tracked in the session (see BaseView.track_job);
+every page then polls them and reports how they turned out (static/js/widgets/background_jobs.js).
+
+"""
+import logging
+import pylibmc
+import threading
+import time
+
+from Queue import Queue
+from uuid import uuid4
+
+from boto.exception import BotoServerError
+from dogpile.cache.api import NO_VALUE
+
+from .caches import euca_key_generator, long_term
+
+JOB_WORKERS = 4
+MAX_TRACKED_JOBS = 20  # jobs a session polls for after a redirect
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETE = 'complete'
+JOB_FAILED = 'failed'
+JOB_FINISHED_STATES = (JOB_COMPLETE, JOB_FAILED)
+JOB_REQUEUED = object()  # returned (via Job.requeue) by a job that has scheduled its next step
+
+
+class JobError(Exception):
+    """Raised by a job to fail with a message meant for the user"""
+
+
+class Job(object):
+    """Handle passed to a job's function for reporting what it is doing"""
+
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.id = job_id
+
+    def update(self, **kwargs):
+        """Update the job's status (e.g. message)"""
+        self.runner.update_status(self.id, **kwargs)
+
+    def set_progress(self, completed, total=None):
+        """Report how many of the job's total items are done"""
+        if total is None:
+            self.runner.update_status(self.id, progress=completed)
+        else:
+            self.runner.update_status(self.id, progress=completed, total=total)
+
+    def requeue(self, delay, func, *args, **kwargs):
+        """
+        Continue the job with func(job, *args, **kwargs) after delay seconds, so waits between polls
+        don't hold a worker.  The job stays running until func finishes; return the result of this call.
+        """
+        self.runner.requeue(self.id, delay, func, args, kwargs)
+        return JOB_REQUEUED
+
+
+class JobRunner(object):
+    """
+    Runs submitted jobs on a pool of worker threads, started on first use
+
+    Usage:
+        job_id = background_jobs.submit(owner, u'Delete scaling group foo', delete_func, 'foo')
+        status = background_jobs.get_status(job_id, owner)
+
+    The function is called as func(job, *args, **kwargs).  Its return value is stored as the job's
+    result (so it must be picklable) and an exception marks the job as failed.  A job that has to wait
+    for something returns job.requeue(delay, func, ...) instead of sleeping on its worker.
+    """
+    def __init__(self, max_workers=JOB_WORKERS):
+        self.max_workers = JOB_WORKERS
+        self.configure(max_workers)
+        self.queue = Queue()
+        self._statuses_ = {}  # used when memcached isn't available
+        self._threads_ = []
+        self._lock_ = threading.Lock()
+
+    def configure(self, max_workers):
+        """Set the pool size; takes effect for workers not yet started"""
+        self.max_workers = max(1, int(max_workers))
+
+    def submit(self, owner, description, func, *args, **kwargs):
+        """Queue func(job, *args, **kwargs) and return the new job's id"""
+        job_id = uuid4().hex
+        self.set_status(job_id, dict(
+            id=job_id, owner=owner, description=description, state=JOB_PENDING, message=u'',
+            progress=0, total=None, result=None, error=None, created=time.time(), finished=None,
+        ))
+        self._start_workers_()
+        self.queue.put((job_id, func, args, kwargs))
+        return job_id
+
+    def requeue(self, job_id, delay, func, args, kwargs):
+        """Put a job's next step back on the queue after delay seconds"""
+        timer = threading.Timer(delay, self.queue.put, [(job_id, func, args, kwargs)])
+        timer.daemon = True
+        timer.start()
+
+    def get_status(self, job_id, owner):
+        """Return the status dict for a job submitted by owner, or None"""
+        status = self._get_status_(job_id)
+        if status is None or status['owner'] != owner:
+            return None
+        return status
+
+    def update_status(self, job_id, **kwargs):
+        with self._lock_:
+            status = self._get_status_(job_id)
+            if status is not None:
+                status.update(kwargs)
+                self.set_status(job_id, status)
+
+    def set_status(self, job_id, status):
+        self._statuses_[job_id] = status
+        if long_term.is_configured:
+            try:
+                long_term.set(self._status_key_(job_id), status)
+                self._statuses_.pop(job_id, None)
+            except pylibmc.Error:
+                logging.warn('memcached not responding')
+
+    def _get_status_(self, job_id):
+        status = self._statuses_.get(job_id)
+        if status is None and long_term.is_configured:
+            try:
+                status = long_term.get(self._status_key_(job_id))
+            except pylibmc.Error:
+                logging.warn('memcached not responding')
+            if status is NO_VALUE:
+                status = None
+        return dict(status) if status is not None else None
+
+    @staticmethod
+    def _status_key_(job_id):
+        return euca_key_generator('background_job', None)(None, job_id)
+
+    def _start_workers_(self):
+        with self._lock_:
+            while len(self._threads_) < self.max_workers:
+                thread = threading.Thread(target=self._work_, name='background-job-{0}'.format(len(self._threads_)))
+                thread.daemon = True
+                thread.start()
+                self._threads_.append(thread)
+
+    def _work_(self):
+        while True:
+            job_id, func, args, kwargs = self.queue.get()
+            self.run_job(job_id, func, *args, **kwargs)
+
+    def run_job(self, job_id, func, *args, **kwargs):
+        self.update_status(job_id, state=JOB_RUNNING)
+        try:
+            result = func(Job(self, job_id), *args, **kwargs)
+        except JobError as err:
+            logging.info(u'Background job {0} failed: {1}'.format(job_id, err))
+            self.update_status(job_id, state=JOB_FAILED, error=get_error_message(err), finished=time.time())
+        except Exception as err:
+            logging.exception(u'Background job {0} failed'.format(job_id))
+            self.update_status(job_id, state=JOB_FAILED, error=get_error_message(err), finished=time.time())
+        else:
+            if result is JOB_REQUEUED:
+                return None
+            self.update_status(job_id, state=JOB_COMPLETE, result=result, finished=time.time())
+
+
+def get_error_message(err):
+    if isinstance(err, BotoServerError):
+        return err.message or err.error_message or err.reason
+    return unicode(err)
+
+
+background_jobs = JobRunner()
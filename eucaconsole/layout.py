@@ -100,6 +100,8 @@ class MasterLayout(object):
                     self.has_regions = False
                 except socket.error:
                     self.has_regions = False
+                finally:
+                    ConnectionManager.return_connection(conn)
         if hasattr(self, 'regions'):
             self.selected_region = self.request.session.get('region', self.default_region)
             if (self.selected_region == '' or
@@ -128,6 +130,7 @@ class MasterLayout(object):
         self.port_range_pattern = u'{0}'.format(
             '^([1-9][0-9]{0,3}|[1-5][0-9]{4}|6[0-4][0-9]{3}|65[0-4][0-9]{2}|655[0-2][0-9]|6553[0-5])$')
         self.querystring = self.get_query_string()
+        self.background_job_ids = u','.join(request.session.get('background_jobs', []))
         self.help_html_dir = 'eucaconsole:static/html/help/'
         self.escape_braces = BaseView.escape_braces
         self.file_uploads_enabled = asbool(self.request.registry.settings.get('file.uploads.enabled', True))
@@ -95,3 +95,60 @@ class Alarm(object):
         return ''  # Default to when resource has no alarms set
 
 
+class AlarmStatusIndex(object):
+    """Aggregated alarm status by resource, built in a single pass over all alarms
+
+    Lookups match Alarm.get_resource_alarm_status() for alarms pre-filtered by a dimension key, e.g.
+    index.get_status('i-123456', 'InstanceId') equals
+    Alarm.get_resource_alarm_status('i-123456', [alarm for alarm in alarms if 'InstanceId' in alarm.dimensions])
+
+    """
+    # Most severe state wins when a resource has more than one alarm
+    STATE_SEVERITY = {'OK': 0, 'INSUFFICIENT_DATA': 1, 'ALARM': 2}
+
+    def __init__(self, states=None):
+        """
+        :param states: dict of {dimension_key: {resource_id: state_value}}, as returned by index_alarms()
+        """
+        self.states = states or {}
+
+    @classmethod
+    def from_alarms(cls, alarms):
+        return cls(cls.index_alarms(alarms))
+
+    @classmethod
+    def index_alarms(cls, alarms):
+        states = {}
+        for alarm in alarms:
+            severity = cls.STATE_SEVERITY.get(alarm.state_value, 0)
+            resource_ids = set(chain.from_iterable(alarm.dimensions.values()))
+            for dimension_key in alarm.dimensions:
+                dimension_states = states.setdefault(dimension_key, {})
+                for resource_id in resource_ids:
+                    current = dimension_states.get(resource_id)
+                    if current is None or severity > cls.STATE_SEVERITY.get(current, 0):
+                        dimension_states[resource_id] = alarm.state_value
+        return states
+
+    @staticmethod
+    def describe_all_alarms(cw_conn):
+        """Fetch every alarm, following next_token through all pages of describe_alarms"""
+        alarms = []
+        next_token = None
+        while True:
+            result_set = cw_conn.describe_alarms(next_token=next_token)
+            alarms.extend(result_set)
+            next_token = getattr(result_set, 'next_token', None)
+            if not next_token:
+                return alarms
+
+    def get_status(self, resource_id, dimension_key):
+        """Return 'Alarm', 'Insufficient data' or 'OK' for a resource, or '' if it has no alarms"""
+        state = self.states.get(dimension_key, {}).get(resource_id)
+        if state is None:
+            return ''
+        if state == 'ALARM':
+            return _(u'Alarm')
+        elif state == 'INSUFFICIENT_DATA':
+            return _(u'Insufficient data')
+        return _(u'OK')
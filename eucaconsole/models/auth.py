@@ -29,12 +29,15 @@ Authentication and Authorization models
 
 """
 import base64
+import hashlib
 import httplib
 import logging
-import pylibmc
 import socket
 import ssl
+import threading
+import time
 import urllib2
+from collections import OrderedDict
 from urlparse import urlparse
 
 from defusedxml.sax import parseString
@@ -59,7 +62,7 @@ from boto.regioninfo import RegionInfo
 from boto.sts.credentials import Credentials
 from pyramid.security import Authenticated, authenticated_userid
 from .admin import EucalyptusAdmin
-from ..caches import default_term
+from ..caches import default_term_tiered, euca_key_generator
 from ..constants import AWS_REGIONS
 
 
@@ -82,15 +85,22 @@ class User(object):
 
     @staticmethod
     def get_account_id(ec2_conn=None, request=None):
-        """Get 12-digit account ID for the currently signed-in user's account using the default security group"""
+        """
+        Get 12-digit account ID for the currently signed-in user's account using the default security group.
+        The ID is looked up once per session and kept in the session afterwards.
+        """
         from ..views import boto_error_handler
         account_id = ""
-        if ec2_conn and request:
+        if request is not None:
+            account_id = request.session.get('account_id', "")
+        if not account_id and ec2_conn and request:
             with boto_error_handler(request):
                 security_groups = ec2_conn.get_all_security_groups(filters={'group-name': 'default'})
-                security_group = security_groups[0] if security_groups else None 
+                security_group = security_groups[0] if security_groups else None
                 if security_group is not None:
                     account_id = security_group.owner_id
+            if account_id:
+                request.session['account_id'] = account_id
         return account_id
                     
 
@@ -99,8 +109,6 @@ class RegionCache(object):
     def __init__(self, conn=None):
         self.conn = conn
 
-    # TODO: provide cache invalidating method?
-
     def regions(self, regions=None):
         """Returns a list of region choices. Will fetch regions if not passed"""
         regions = regions or []
@@ -118,21 +126,23 @@ class RegionCache(object):
         return sorted(choices)
 
     def get_regions(self, host):
-        @default_term.cache_on_arguments(namespace='regions')
-        def _get_regions_cache_(self, host):
-            return _get_regions_(self)
-
-        def _get_regions_(self):
+        def _get_regions_():
             regions = []
             if self.conn is not None:
                 regions = self.conn.get_all_regions()
             for region in regions:
                 del region.connection
             return regions
-        try:
-            return _get_regions_cache_(self, host)
-        except pylibmc.Error:
-            return _get_regions_(self)
+        # Looked up for every connection and page, so served from process memory ahead of memcached
+        return default_term_tiered.get_or_create(self._cache_key_(host), _get_regions_)
+
+    @classmethod
+    def invalidate(cls, host):
+        default_term_tiered.invalidate(cls._cache_key_(host))
+
+    @staticmethod
+    def _cache_key_(host):
+        return euca_key_generator('regions', None)(None, host)
 
 
 class HttpsConnectionFactory(object):
@@ -151,12 +161,119 @@ class HttpsConnectionFactory(object):
         return httplib.HTTPSConnection(host, port=self.port, **kwargs)
 
 
+class ConnectionPool(object):
+    """Process-wide pool of idle boto connection objects
+
+    boto keeps the HTTP(S) connections it opens in a per-connection-object pool, so handing the same
+    connection object to later requests reuses keep-alive connections rather than paying for a new
+    connection (and TLS handshake) on every request.
+
+    Connections are checked out with get() and handed back with put(), so a connection object is only
+    ever used by one request (or background job) at a time.  A connection that is never put back is
+    simply dropped.
+
+    Entries are keyed by credentials, endpoint and connection type.  Entries idle for longer than max_idle
+    seconds are evicted, as are all entries for an access key once it shows up with a new session token.
+    Setting max_size to 0 disables pooling.
+    """
+    def __init__(self, max_idle=300, max_size=500):
+        self.max_idle = max_idle
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._connections = OrderedDict()  # (key, id(conn)) -> (conn, last_used), least recently used first
+        self._tokens = OrderedDict()  # access key -> session token of its pooled connections, least recent first
+
+    def configure(self, max_idle=None, max_size=None):
+        with self._lock:
+            if max_idle is not None:
+                self.max_idle = max_idle
+            if max_size is not None:
+                self.max_size = max_size
+            self._connections.clear()
+            self._tokens.clear()
+
+    def get(self, factory, access_key, token, *key_parts):
+        """Checks out an idle connection for the key, calling factory() to create one when there is none
+
+        :type factory: callable
+        :param factory: returns a new connection object (or None)
+
+        :type access_key: string
+        :param access_key: access key the connection signs requests with
+
+        :type token: string
+        :param token: session token the connection signs requests with
+
+        :param key_parts: anything else that identifies the connection (endpoint, connection type, ...)
+        """
+        if not self.max_size:
+            return factory()
+        key = (access_key, token) + key_parts
+        with self._lock:
+            self._evict_idle_(time.time())
+            if self._tokens.get(access_key, token) != token:
+                self._evict_access_key_(access_key)
+            self._tokens.pop(access_key, None)
+            self._tokens[access_key] = token
+            while len(self._tokens) > self.max_size:
+                self._evict_access_key_(next(self._tokens.iterkeys()))
+            for entry_key in reversed(self._connections):
+                if entry_key[0] == key:
+                    return self._connections.pop(entry_key)[0]
+        # Build the connection outside the lock, as the factory may check out other connections
+        conn = factory()
+        if conn is not None:
+            conn.pool_key = key
+        return conn
+
+    def put(self, conn):
+        """Hands a connection checked out with get() back to the pool"""
+        key = getattr(conn, 'pool_key', None)
+        if key is None or not self.max_size:
+            return
+        with self._lock:
+            if self._tokens.get(key[0]) != key[1]:
+                return  # the access key was released or its token rotated while the connection was out
+            self._connections[(key, id(conn))] = (conn, time.time())
+            while len(self._connections) > self.max_size:
+                self._connections.popitem(last=False)
+
+    def release(self, access_key):
+        """Drop pooled connections for an access key (e.g. at logout)"""
+        with self._lock:
+            self._evict_access_key_(access_key)
+
+    def _evict_idle_(self, now):
+        while self._connections:
+            entry_key, (conn, last_used) = next(self._connections.iteritems())
+            if now - last_used <= self.max_idle:
+                break
+            del self._connections[entry_key]
+
+    def _evict_access_key_(self, access_key):
+        for entry_key in [entry_key for entry_key in self._connections if entry_key[0][0] == access_key]:
+            del self._connections[entry_key]
+        self._tokens.pop(access_key, None)
+
+
 class ConnectionManager(object):
-    """Returns connection objects, pulling from Beaker cache when available"""
+    """Returns connection objects, checked out of the process-wide connection pool when available
+
+    Hand connections back with return_connection() once done with them (see BaseView.get_connection)
+    """
+    pool = ConnectionPool()
+
+    @staticmethod
+    def return_connection(conn):
+        """Return a connection to the pool for later requests"""
+        if conn is not None and hasattr(conn, 'suppress_consec_slashes'):
+            conn.suppress_consec_slashes = True  # boto's default, which the bucket views turn off for themselves
+        ConnectionManager.pool.put(conn)
+
     @staticmethod
     def aws_connection(region, access_key, secret_key, token, conn_type, validate_certs=False):
         """Return AWS EC2 connection object
-        Pulls from Beaker cache on subsequent calls to avoid connection overhead
+        Pulls from the connection pool on subsequent calls to avoid connection overhead
 
         :type region: string
         :param region: region name (e.g. 'us-east-1')
@@ -174,6 +291,14 @@ class ConnectionManager(object):
         :param validate_certs: indicates to check the ssl cert the server provides
 
         """
+        return ConnectionManager.pool.get(
+            lambda: ConnectionManager._aws_connection_(
+                region, access_key, secret_key, token, conn_type, validate_certs),
+            access_key, token, ConnectionManager._hash_secret_(secret_key), 'aws', region, conn_type, validate_certs
+        )
+
+    @staticmethod
+    def _aws_connection_(region, access_key, secret_key, token, conn_type, validate_certs=False):
         conn = None
         if conn_type == 'ec2':
             path = 'ec2'
@@ -245,15 +370,29 @@ class ConnectionManager(object):
         :param certs_file: indicates the location of the certificates file, if otherthan standard
 
         """
+        return ConnectionManager.pool.get(
+            lambda: ConnectionManager._euca_connection_(
+                ufshost, port, region, access_id, secret_key, token, conn_type,
+                dns_enabled, validate_certs, certs_file),
+            access_id, token, ConnectionManager._hash_secret_(secret_key), 'euca', ufshost, port, region,
+            conn_type, dns_enabled, validate_certs, certs_file
+        )
+
+    @staticmethod
+    def _euca_connection_(ufshost, port, region, access_id, secret_key, token, conn_type,
+                          dns_enabled=True, validate_certs=False, certs_file=None):
         path = 'compute'
         conn_class = EC2Connection
         api_version = '2012-12-01'
         if region != 'euca':
-            # look up region endpoint
+            # look up region endpoint (the 'euca' connection is pooled, and only used on a region cache miss)
             conn = ConnectionManager.euca_connection(
                 ufshost, port, 'euca', access_id, secret_key, token, 'ec2', dns_enabled
             )
-            regions = RegionCache(conn).get_regions(ufshost)
+            try:
+                regions = RegionCache(conn).get_regions(ufshost)
+            finally:
+                ConnectionManager.return_connection(conn)
             # result will only ever be 1 or none
             endpoint = [reg.endpoint for reg in regions if reg.name == region]
             if endpoint:
@@ -338,6 +477,16 @@ class ConnectionManager(object):
         # conn.set_request_hook(RequestLogger())
         return conn
 
+    @staticmethod
+    def _hash_secret_(secret_key):
+        # keep secret keys out of the pool keys
+        return hashlib.sha256(secret_key or '').hexdigest()
+
+    @staticmethod
+    def release_connections(access_key):
+        """Drop pooled connections for an access key (e.g. at logout or when credentials change)"""
+        ConnectionManager.pool.release(access_key)
+
 
 def groupfinder(user_id, request):
     if user_id is not None:
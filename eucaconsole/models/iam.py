@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+IAM models
+
+"""
+
+
+class GroupMembershipIndex(object):
+    """Group names by user name for an account, so a users listing doesn't fetch every group per user
+
+    The index is built from one GetGroup call per group, or from one ListGroupsForUser call per user
+    when the account has fewer users than groups.  Calls run on a bounded ParallelCalls pool.
+
+    """
+    def __init__(self, groups_by_user=None):
+        """
+        :param groups_by_user: dict of {user_name: [group_name, ...]}, as returned by index_groups()
+        """
+        self.groups_by_user = groups_by_user or {}
+
+    @classmethod
+    def index_groups(cls, iam_conn, group_names, user_names, parallel_calls):
+        """Map each user name to the sorted names of the groups it belongs to
+
+        :param parallel_calls: an empty ParallelCalls runner (see BaseView.get_parallel_calls)
+        """
+        groups_by_user = {}
+        if len(user_names) < len(group_names):
+            for user_name in user_names:
+                parallel_calls.add(user_name, cls.list_user_groups, iam_conn, user_name)
+            for user_name, groups in parallel_calls.run().items():
+                groups_by_user[user_name] = sorted(groups)
+        else:
+            for group_name in group_names:
+                parallel_calls.add(group_name, cls.list_group_members, iam_conn, group_name)
+            for group_name, members in parallel_calls.run().items():
+                for user_name in members:
+                    groups_by_user.setdefault(user_name, []).append(group_name)
+            for groups in groups_by_user.values():
+                groups.sort()
+        return groups_by_user
+
+    @staticmethod
+    def list_group_members(iam_conn, group_name):
+        """User names in a group, following the marker through all pages of get_group"""
+        members = []
+        marker = None
+        while True:
+            info = iam_conn.get_group(group_name=group_name, marker=marker)
+            members.extend(user.user_name for user in info.users)
+            if str(getattr(info, 'is_truncated', 'false')).lower() != 'true':
+                return members
+            marker = info.marker
+
+    @staticmethod
+    def list_user_groups(iam_conn, user_name):
+        """Group names for a user, following the marker through all pages of get_groups_for_user"""
+        groups = []
+        marker = None
+        while True:
+            info = iam_conn.get_groups_for_user(user_name=user_name, marker=marker)
+            groups.extend(group.group_name for group in info.groups)
+            if str(getattr(info, 'is_truncated', 'false')).lower() != 'true':
+                return groups
+            marker = info.marker
+
+    def get_groups(self, user_name):
+        return self.groups_by_user.get(user_name, [])
+
+    def count_members(self):
+        """Return a dict of {group_name: number of users in the group}"""
+        counts = {}
+        for groups in self.groups_by_user.values():
+            for group_name in groups:
+                counts[group_name] = counts.get(group_name, 0) + 1
+        return counts
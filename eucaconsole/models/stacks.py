@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+
+"""
+Eucalyptus compatibility analysis of CloudFormation templates
+
+"""
+from ..constants.stacks import AWS_RESOURCE_PREFIXES, UNSUPPORTED_PROPERTIES
+
+CONTAINER_TYPES = (dict, list)
+
+
+class PrefixTrie(object):
+    """Character trie finding every prefix a string starts with in a single walk of the string"""
+
+    def __init__(self, prefixes):
+        self.root = {}
+        for idx, prefix in enumerate(prefixes):
+            node = self.root
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append(idx)
+
+    def match(self, value):
+        """Return the (sorted) indexes of the prefixes that value starts with"""
+        matches = []
+        node = self.root
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                break
+            matches.extend(node.get(None, []))
+        return sorted(matches)
+
+
+class AWSTemplateAnalyzer(object):
+    """
+    Identifies the parts of a CloudFormation template that Eucalyptus doesn't support
+
+    The template is walked once.  Resource types are matched against the prefix lists with a trie,
+    and the result is remembered per type, so templates with thousands of resources of a handful of
+    types do a dict lookup per resource.  Nesting depth is not limited.
+    """
+    MAX_CACHED_TYPES = 1000
+
+    def __init__(self, resource_prefixes=AWS_RESOURCE_PREFIXES, unsupported_properties=UNSUPPORTED_PROPERTIES):
+        self.resource_prefixes = list(resource_prefixes)
+        self.unsupported_properties = [(props['resource'], props['properties']) for props in unsupported_properties]
+        self._resource_trie_ = PrefixTrie(self.resource_prefixes)
+        self._property_trie_ = PrefixTrie([resource for resource, properties in self.unsupported_properties])
+        self._types_ = {}
+
+    def get_type_exceptions(self, resource_type):
+        """
+        Returns (prefixes, properties) for a resource type, where prefixes are the unsupported resource
+        prefixes it matches and properties are the (resource prefix, unsupported properties) pairs it matches
+        """
+        found = self._types_.get(resource_type)
+        if found is None:
+            found = (
+                [self.resource_prefixes[idx] for idx in self._resource_trie_.match(resource_type)],
+                [self.unsupported_properties[idx] for idx in self._property_trie_.match(resource_type)],
+            )
+            if len(self._types_) < self.MAX_CACHED_TYPES:
+                self._types_[resource_type] = found
+        return found
+
+    def analyze(self, parsed):
+        """
+        Returns a list of exceptions: unsupported resources (dict(name, type)), then unsupported resource
+        properties (dict(name, type, property=True)), then image ids that should be template
+        parameters (dict(name='ImageId', type='Parameter', item)), each in template order
+        """
+        resources = []
+        properties = []
+        image_refs = []
+        emi_maps = {}
+        resources_node = parsed.get('Resources')
+        # depth-first walk in document order, pushing only containers since only dicts can hold an ImageId
+        stack = [(None, parsed)]
+        while stack:
+            name, item = stack.pop()
+            if type(item) is dict:
+                # find refs to cloud-specific resources, ignoring refs already in params
+                if 'ImageId' in item and name != 'Parameters' and item is not parsed:
+                    if self._needs_image_param_(parsed, item['ImageId'], emi_maps):
+                        image_refs.append({'name': 'ImageId', 'type': 'Parameter', 'item': item})
+                if item is resources_node:
+                    for resource_name, resource in item.iteritems():
+                        self._check_resource_(resource_name, resource, resources, properties)
+                stack.extend([child for child in reversed(item.items()) if type(child[1]) in CONTAINER_TYPES])
+            else:
+                stack.extend([(None, child) for child in reversed(item) if type(child) in CONTAINER_TYPES])
+        return resources + properties + image_refs
+
+    @staticmethod
+    def convert(parsed, exceptions):
+        """Modify parsed in place to remove the unsupported resources and turn image ids into a parameter"""
+        for res in exceptions:
+            # remove unsupported resources
+            if 'property' not in res:
+                parsed['Resources'].pop(res['name'], None)
+            # modify resource refs into params
+            if res['name'] == 'ImageId':
+                res['item']['ImageId'] = {'Ref': 'ImageId'}
+                parsed.setdefault('Parameters', {})['ImageId'] = dict(
+                    Description='Image required to run this template',
+                    Type='String'
+                )
+        # and, because we provide instance types, remove 'AllowedValues' for InstanceType
+        instance_type = parsed.get('Parameters', {}).get('InstanceType')
+        if instance_type is not None and 'AllowedValues' in instance_type:
+            del instance_type['AllowedValues']
+
+    def _check_resource_(self, name, resource, resources, properties):
+        prefixes, unsupported = self.get_type_exceptions(resource['Type'])
+        for prefix in prefixes:
+            resources.append({'name': name, 'type': prefix})
+        resource_properties = resource.get('Properties')
+        for resource_prefix, props in unsupported:
+            for prop in props:
+                if resource_properties is not None and prop in resource_properties:
+                    properties.append({'name': prop, 'type': resource_prefix, 'property': True})
+
+    @classmethod
+    def _needs_image_param_(cls, parsed, img_item, emi_maps):
+        """
+        True for an image id given as a function other than Ref, unless it is an Fn::FindInMap
+        lookup in a mapping that lists Eucalyptus image ids
+        """
+        if not isinstance(img_item, dict) or 'Ref' in img_item:
+            return False
+        if 'Fn::FindInMap' in img_item:
+            map_name = img_item['Fn::FindInMap'][0]
+            if not isinstance(map_name, basestring):
+                return True
+            if map_name not in emi_maps:
+                img_map = (parsed.get('Mappings') or {}).get(map_name)
+                emi_maps[map_name] = bool(img_map) and cls._contains_text_(img_map, 'emi-')
+            return not emi_maps[map_name]
+        return True
+
+    @classmethod
+    def _contains_text_(cls, graph, text):
+        """True if text appears in any key or string value of graph"""
+        stack = [graph]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, basestring):
+                if text in item:
+                    return True
+            elif isinstance(item, dict):
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            elif isinstance(item, list):
+                stack.extend(item)
+        return False
+
+
+aws_template_analyzer = AWSTemplateAnalyzer()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Helpers for running independent backend calls concurrently
+
+Worker threads are plain threading.Thread objects, so they become green threads
+when the console runs under gunicorn's eventlet worker class.
+
+"""
+import socket
+import threading
+import time
+
+from collections import deque
+
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 60
+
+
+class ParallelCalls(object):
+    """Run a set of independent calls (e.g. boto describe calls) on a bounded pool of worker threads
+
+    All calls share a single deadline.  Exceptions are re-raised in the calling thread, so wrapping
+    run() in boto_error_handler behaves the same as wrapping the equivalent serial calls.  A call that
+    misses the deadline raises socket.timeout, which boto_error_handler reports as a 504.
+
+    Usage:
+        calls = ParallelCalls(max_workers=4, timeout=30)
+        calls.add('keypairs', ec2_conn.get_all_key_pairs)
+        calls.add('groups', ec2_conn.get_all_security_groups, filters=filters)
+        results = calls.run()
+        keypairs = results.get('keypairs')
+
+    """
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.calls = []
+
+    def add(self, name, func, *args, **kwargs):
+        """Queue func(*args, **kwargs), storing its return value under name"""
+        self.calls.append((name, func, args, kwargs))
+        return self
+
+    def run(self):
+        """Run all queued calls and return a dict of results keyed by call name"""
+        if len(self.calls) == 1 or self.max_workers == 1:
+            return dict((name, func(*args, **kwargs)) for name, func, args, kwargs in self.calls)
+        results, errors, pending = self.run_partial()
+        # Raise errors in the order calls were added to keep error reporting deterministic
+        for name, func, args, kwargs in self.calls:
+            if name in errors:
+                raise errors[name]
+        if pending:
+            raise socket.timeout('Timed out waiting for {0}'.format(', '.join(str(name) for name in pending)))
+        return results
+
+    def run_partial(self, timeouts=None, on_late_result=None):
+        """Run all queued calls, returning whatever completed in time rather than raising
+
+        :type timeouts: dict
+        :param timeouts: per-call timeouts in seconds keyed by call name, overriding self.timeout.
+            Timeouts are measured from the start of the run, so size the pool to fit the calls
+            when they should all start right away.
+
+        :type on_late_result: callable
+        :param on_late_result: called as on_late_result(name, result) from the worker thread
+            when a call completes after its timeout (e.g. to cache the value for a later poll)
+
+        :returns: tuple of (results, errors, pending), where results and errors are dicts keyed
+            by call name and pending is the list of names that missed their deadline
+        """
+        timeouts = timeouts or {}
+        results = {}
+        errors = {}
+        finished = set()
+        abandoned = set()
+        queued = deque(self.calls)
+        cond = threading.Condition()
+
+        def worker():
+            while True:
+                with cond:
+                    if not queued:
+                        return
+                    name, func, args, kwargs = queued.popleft()
+                result = error = None
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as err:
+                    error = err
+                with cond:
+                    late = name in abandoned
+                    if not late:
+                        if error is None:
+                            results[name] = result
+                        else:
+                            errors[name] = error
+                        finished.add(name)
+                        cond.notify()
+                if late and error is None and on_late_result is not None:
+                    on_late_result(name, result)
+
+        for idx in range(min(self.max_workers, len(self.calls))):
+            thread = threading.Thread(target=worker, name='parallel-call-{0}'.format(idx))
+            thread.daemon = True
+            thread.start()
+
+        start = time.time()
+        deadlines = {}
+        for name, func, args, kwargs in self.calls:
+            timeout = timeouts.get(name, self.timeout)
+            deadlines[name] = start + timeout if timeout else None
+        with cond:
+            while True:
+                waiting = [name for name, func, args, kwargs in self.calls if name not in finished]
+                if not waiting:
+                    break
+                remaining = [deadlines[name] - time.time() for name in waiting if deadlines[name] is not None]
+                if len(remaining) == len(waiting) and max(remaining) <= 0:
+                    break
+                live = [secs for secs in remaining if secs > 0]
+                cond.wait(min(live) if live else None)
+            pending = [name for name, func, args, kwargs in self.calls if name not in finished]
+            abandoned.update(pending)
+            return dict(results), dict(errors), pending
+
+
+class BatchOperation(object):
+    """Apply a call to every item of a (possibly lazily paged) iterable on a bounded pool of worker threads
+
+    Items are pulled from the iterable as workers free up, so a boto listing such as bucket.list() is
+    paged through as the batch runs rather than loaded up front.  An exception raised for an item is
+    collected in errors instead of stopping the batch; an exception raised while iterating (e.g. a failed
+    listing request) stops the batch and is re-raised by run().
+
+    Usage:
+        batch = BatchOperation(lambda key: key.set_acl(acl), max_workers=8)
+        batch.run(bucket.list())
+        failed_keys = [key.name for key, err in batch.errors]
+
+    """
+    def __init__(self, func, max_workers=DEFAULT_MAX_WORKERS, on_progress=None, progress_interval=100):
+        """
+        :type on_progress: callable
+        :param on_progress: called as on_progress(completed, failed) from a worker thread after
+            every progress_interval items, and once more when the batch finishes
+        """
+        self.func = func
+        self.max_workers = max(1, int(max_workers))
+        self.on_progress = on_progress
+        self.progress_interval = max(1, int(progress_interval))
+        self.completed = 0
+        self.errors = []
+
+    def run(self, items):
+        """Run the call for each item, returning the number of items processed (including failures)"""
+        items = iter(items)
+        lock = threading.Lock()
+        stop = []
+
+        def next_item():
+            with lock:
+                if stop:
+                    raise StopIteration
+                try:
+                    return next(items)
+                except StopIteration:
+                    raise
+                except Exception as err:
+                    stop.append(err)
+                    raise StopIteration
+
+        def worker():
+            while True:
+                try:
+                    item = next_item()
+                except StopIteration:
+                    return
+                error = None
+                try:
+                    self.func(item)
+                except Exception as err:
+                    error = err
+                with lock:
+                    self.completed += 1
+                    if error is not None:
+                        self.errors.append((item, error))
+                    report = self.completed % self.progress_interval == 0
+                    completed, failed = self.completed, len(self.errors)
+                if report and self.on_progress is not None:
+                    self.on_progress(completed, failed)
+
+        threads = []
+        for idx in range(self.max_workers):
+            thread = threading.Thread(target=worker, name='batch-operation-{0}'.format(idx))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if stop:
+            raise stop[0]
+        if self.on_progress is not None:
+            self.on_progress(self.completed, len(self.errors))
+        return self.completed
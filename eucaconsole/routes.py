@@ -58,6 +58,7 @@ urls = [
     Route(name='region_select', pattern='/region/select'),
     Route(name='file_download', pattern='/_getfile'),
     Route(name='render_template', pattern='/_template/*subpath'),
+    Route(name='job_status_json', pattern='/jobs/{id}/json'),
 
     # Images #####
     Route(name='images', pattern='/images'),
@@ -156,6 +157,7 @@ urls = [
     # Landing page
     Route(name='elbs', pattern='/elbs'),
     Route(name='elbs_json', pattern='/elbs/json'),
+    Route(name='elbs_health_json', pattern='/elbs/health/json'),
     Route(name='elbs_delete', pattern='/elbs/delete'),
     # Detail page
     Route(name='elb_new', pattern='/elbs/new'),
@@ -314,6 +316,7 @@ urls = [
     # Users #####
     Route(name='users', pattern='/users'),
     Route(name='users_json', pattern='/users/json'),
+    Route(name='users_summary_json', pattern='/users/summary'),
     Route(name='user_new', pattern='/users/new'),
     Route(name='user_create', pattern='/users/create'),
     Route(name='user_view', pattern='/users/{name}'),  # Pass name='new' to render Create User(s) page
@@ -10,10 +10,11 @@ describe("BucketContentsPage", function() {
 
     beforeEach(angular.mock.module('BucketContentsPage'));
 
-    var scope, ctrl;
+    var scope, ctrl, httpBackend;
     // inject the $controller and $rootScope services
     // in the beforeEach block
-    beforeEach(angular.mock.inject(function($controller, $rootScope) {
+    beforeEach(angular.mock.inject(function($controller, $rootScope, $httpBackend) {
+        httpBackend = $httpBackend;
         // Create a new scope that's a child of the $rootScope
         scope = $rootScope.$new();
         // Create the controller
@@ -82,4 +83,38 @@ describe("BucketContentsPage", function() {
             expect(scope.updatePasteValues).toHaveBeenCalled();
         });
     });
+
+    describe("Function copyChunk() Test", function() {
+
+        beforeEach(function() {
+            scope.initController('{"put_keys_url": "/buckets/dest/putitems/_subpath_", ' +
+                                 '"job_status_json_url": "/jobs/_id_/json"}');
+            scope.total = 2;
+            scope.all_items = ['folder/a', 'folder/b'];
+            scope.copyingAll = true;
+            spyOn(scope, '$broadcast');
+        });
+
+        it("Should wait for the copy job before finishing the paste", function() {
+            httpBackend.expectPOST('/buckets/dest/putitems/').respond(200, {job_id: 'abc'});
+            httpBackend.expectGET('/jobs/abc/json').respond(200, {
+                results: {state: 'complete', progress: 2, result: {errors: []}}});
+            scope.copyChunk();
+            httpBackend.flush();
+            expect(scope.progress).toEqual(2);
+            expect(scope.copyingAll).toBeFalsy();
+            expect(scope.$broadcast).toHaveBeenCalledWith('refresh');
+        });
+
+        it("Should stop copying when the copy job fails", function() {
+            spyOn(Notify, 'failure');
+            httpBackend.expectPOST('/buckets/dest/putitems/').respond(200, {job_id: 'abc'});
+            httpBackend.expectGET('/jobs/abc/json').respond(200, {results: {state: 'failed', error: 'oops'}});
+            scope.copyChunk();
+            httpBackend.flush();
+            expect(scope.copyingAll).toBeFalsy();
+            expect(Notify.failure).toHaveBeenCalled();
+            expect(scope.$broadcast).not.toHaveBeenCalled();
+        });
+    });
 });
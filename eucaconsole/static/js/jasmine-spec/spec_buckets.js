@@ -44,8 +44,8 @@ describe("BucketsPage", function() {
             expect(scope.copyingAll).not.toBeTruthy();
         });
 
-        it("Initial value of chunkSize is 10", function() {
-            expect(scope.chunkSize).toEqual(10);
+        it("Initial value of chunkSize is 100", function() {
+            expect(scope.chunkSize).toEqual(100);
         });
 
         it("Initial value of hasCopyItem is false", function() {
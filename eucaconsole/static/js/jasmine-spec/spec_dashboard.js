@@ -66,4 +66,13 @@ describe("Dashboard", function() {
             expect(scope.setInitialZone).toHaveBeenCalled();
         });
     });
+
+    describe("Function isPending() Test", function() {
+
+        it("Should report tiles returned as pending by the JSON endpoint", function() {
+            scope.pendingTiles = ['volumes', 'snapshots'];
+            expect(scope.isPending('volumes')).toBeTruthy();
+            expect(scope.isPending('key-pairs')).toBeFalsy();
+        });
+    });
 });
@@ -66,4 +66,40 @@ describe("LandingPage", function() {
             expect(scope.storeRegion).toHaveBeenCalled();
         });
     });
+
+    describe("Server-side paging Test", function() {
+
+        it("Should enable server paging when a page size is passed to initController()", function() {
+            scope.initController('instances', '[]', 'a', null, 50);
+            expect(scope.serverPaging).toBeTruthy();
+            expect(scope.serverFilter).toBeTruthy();
+        });
+
+        it("Should pass page size, sort, search and page token in paging params", function() {
+            scope.pageSize = 50;
+            scope.sortBy = '-launch_time';
+            scope.searchFilter = 'web';
+            scope.filterKeys = ['id', 'name'];
+            expect(scope.getPagingParams('abc')).toEqual(
+                'page_size=50&sort=-launch_time&search=web&filter_keys=id&filter_keys=name&page_token=abc');
+        });
+
+        it("Should fetch the next page when showMore() is called and all items are displayed", function() {
+            spyOn(scope, 'getItems');
+            scope.serverPaging = true;
+            scope.nextPageToken = 'abc';
+            scope.items = [];
+            scope.showMore();
+            expect(scope.getItems).toHaveBeenCalledWith(undefined, 'abc');
+        });
+
+        it("Should keep search and sort client-side when incremental paging is enabled", function() {
+            scope.initController('bucketcontents', 'name', 'a', null, 50, true);
+            expect(scope.incrementalPaging).toBeTruthy();
+            expect(scope.serverFilter).toBeFalsy();
+            scope.sortBy = '-name';
+            scope.searchFilter = 'web';
+            expect(scope.getPagingParams('abc')).toEqual('page_size=50&page_token=abc');
+        });
+    });
 });
@@ -10,10 +10,11 @@ describe("UsersPage", function() {
 
     beforeEach(angular.mock.module('UsersPage'));
 
-    var scope, ctrl;
+    var scope, ctrl, httpBackend;
     // inject the $controller and $rootScope services
     // in the beforeEach block
-    beforeEach(angular.mock.inject(function($controller, $rootScope) {
+    beforeEach(angular.mock.inject(function($controller, $rootScope, $httpBackend) {
+        httpBackend = $httpBackend;
         // Create a new scope that's a child of the $rootScope
         scope = $rootScope.$new();
         // Create the controller
@@ -56,4 +57,56 @@ describe("UsersPage", function() {
             expect(scope.userName).toEqual('username');
         });
     });
+
+    describe("Function addUserSummaryData() Test", function() {
+
+        beforeEach(function() {
+            scope.users_summary_url = '/users/summary';
+        });
+
+        it("Should summarize users in batches and add the summaries to the rows", function() {
+            var users = [{user_name: 'alice'}, {user_name: 'bob'}, {user_name: 'carol'}];
+            scope.summaryBatchSize = 2;
+            httpBackend.expectPOST('/users/summary', /user_name=alice&user_name=bob$/).respond(200, {results: [
+                {user_name: 'alice', num_keys: 1, has_password: true, user_enabled: true},
+                {user_name: 'bob', num_keys: 0, has_password: false, user_enabled: false}
+            ]});
+            httpBackend.expectPOST('/users/summary', /user_name=carol$/).respond(200, {results: [
+                {user_name: 'carol', num_keys: 2, has_password: true, user_enabled: true}
+            ]});
+            scope.addUserSummaryData(users);
+            httpBackend.flush();
+            expect(users[0].num_keys).toEqual(1);
+            expect(users[1].user_enabled).toBeFalsy();
+            expect(users[2].num_keys).toEqual(2);
+        });
+
+        it("Should request summaries again after a failed batch", function() {
+            var users = [{user_name: 'alice'}, {user_name: 'bob'}];
+            httpBackend.expectPOST('/users/summary').respond(504, {message: 'timed out'});
+            scope.addUserSummaryData(users);
+            httpBackend.flush();
+            expect(users[0].summaryRequested).toBeFalsy();
+            expect(users[1].summaryRequested).toBeFalsy();
+        });
+
+        it("Should request summaries again for users missing from the results", function() {
+            var users = [{user_name: 'alice'}, {user_name: 'bob'}];
+            httpBackend.expectPOST('/users/summary').respond(200, {results: [
+                {user_name: 'alice', num_keys: 1, has_password: true, user_enabled: true}
+            ]});
+            scope.addUserSummaryData(users);
+            httpBackend.flush();
+            expect(users[0].summaryRequested).toBeTruthy();
+            expect(users[1].summaryRequested).toBeFalsy();
+        });
+
+        it("Should only request summaries for visible rows not yet summarized", function() {
+            var items = [{user_name: 'carol'}, {user_name: 'alice', summaryRequested: true}, {user_name: 'bob'}];
+            var gridScope = {sortBy: 'user_name', displayCount: 2};
+            var visible = scope.getVisibleUsers(gridScope, items);
+            expect(visible.length).toEqual(1);
+            expect(visible[0].user_name).toEqual('bob');
+        });
+    });
 });
@@ -7,7 +7,8 @@
  */
 
 angular.module('BucketContentsPage', ['LandingPage', 'EucaConsoleUtils'])
-    .controller('BucketContentsCtrl', function ($scope, $http, eucaUnescapeJson, eucaHandleErrorS3) {
+    .controller('BucketContentsCtrl', function ($scope, $http, eucaUnescapeJson, eucaHandleErrorS3, eucaListBucketKeys,
+                                               eucaWaitForJob) {
         $http.defaults.headers.common['X-Requested-With'] = 'XMLHttpRequest';
         $scope.bucketName = '';
         $scope.prefix = '';
@@ -18,6 +19,7 @@ angular.module('BucketContentsPage', ['LandingPage', 'EucaConsoleUtils'])
         $scope.progress = 0;
         $scope.total = 0;
         $scope.chunkSize = 100;  // set this based on how many keys we want to delete at once
+        $scope.keysPageSize = 1000;  // keys listed per request when gathering keys to delete/copy
         $scope.index = 0;
         $scope.items = null;
         $scope.op_prefix = '';
@@ -32,6 +34,7 @@ angular.module('BucketContentsPage', ['LandingPage', 'EucaConsoleUtils'])
             $scope.copyObjUrl = options.copy_object_url;
             $scope.getKeysGenericUrl = options.get_keys_generic_url;
             $scope.putKeysUrl = options.put_keys_url;
+            $scope.jobStatusUrl = options.job_status_json_url;
             $scope.makeObjectPublicUrl = options.make_object_public_url;
             // set upload button target based on media query
             if (Foundation.utils.is_medium_up()) {
@@ -49,17 +52,15 @@ angular.module('BucketContentsPage', ['LandingPage', 'EucaConsoleUtils'])
                     url = url + '/' + encodeURIComponent(item.name);
                     $scope.folder = item.name;
                 }
-                var data = "csrf_token="+$('#csrf_token').val();
-                $http({method: 'POST', url: url, data: data,
-                    headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
-                    success(function (oData) {
-                        $scope.total = oData.results.length;
-                        $scope.all_items = oData.results;
+                eucaListBucketKeys(url, $scope.keysPageSize).then(
+                    function (keys) {
+                        $scope.total = keys.length;
+                        $scope.all_items = keys;
                         $scope.index = 0;
                         modal.foundation('reveal', 'open');
-                    }).
-                    error(function (oData, status) {
-                        Notify.failure(oData.message);
+                    },
+                    function (response) {
+                        Notify.failure(response.data.message);
                     });
             }
             else {
@@ -291,18 +292,16 @@ angular.module('BucketContentsPage', ['LandingPage', 'EucaConsoleUtils'])
             url = url.replace('_subpath_', $scope.src_path);
             // slice and dice to get portion of path to be excluded in new location
             $scope.folder = $scope.src_path.slice(0, $scope.src_path.slice(0, $scope.src_path.length-1).lastIndexOf('/')+1);
-            var data = "csrf_token="+$('#csrf_token').val();
-            $http({method: 'POST', url: url, data: data,
-                headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
-                success(function (oData) {
-                    $scope.total = oData.results.length;
-                    $scope.all_items = oData.results;
+            eucaListBucketKeys(url, $scope.keysPageSize).then(
+                function (keys) {
+                    $scope.total = keys.length;
+                    $scope.all_items = keys;
                     $scope.index = 0;
                     $('#copy-folder-modal').foundation('reveal', 'open');
                     $scope.copyFolder();
-                }).
-                error(function (oData, status) {
-                    Notify.failure(oData.message);
+                },
+                function (response) {
+                    Notify.failure(response.data.message);
                 });
         };
         $scope.copyFolder = function () {
@@ -327,26 +326,22 @@ angular.module('BucketContentsPage', ['LandingPage', 'EucaConsoleUtils'])
             $http({method: 'POST', url: url, data: data,
                 headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
                 success(function (oData) {
-                    if (oData.errors !== undefined) {
-                        console.log('error copying some keys ' + oData.errors);
-                    }
-                    $scope.progress = $scope.progress + $scope.chunkSize;
-                    if ($scope.progress > $scope.total) {
-                        $scope.progress = $scope.total;
-                    }
-                    if ($scope.copyingAll === true) {
-                        var chunks = $scope.total / $scope.chunkSize;
-                        $scope.index = $scope.index + 1;
-                        if ($scope.index >= chunks) {
-                            $('#copy-folder-modal').foundation('reveal', 'close');
-                            $scope.copyingAll = false;
-                            $scope.folder = '';
-                            $scope.$broadcast('refresh');
-                        }
-                        else {
-                            $scope.copyChunk();
+                    // The chunk is copied by a background job; track its progress until it finishes
+                    var chunkStart = $scope.progress;
+                    var statusUrl = $scope.jobStatusUrl.replace('_id_', oData.job_id);
+                    eucaWaitForJob(statusUrl, function (job) {
+                        $scope.progress = Math.min(chunkStart + job.progress, $scope.total);
+                    }).then(function (job) {
+                        if (job.result.errors.length > 0) {
+                            console.log('error copying some keys ' + job.result.errors);
                         }
-                    }
+                        $scope.progress = Math.min(chunkStart + chunk.length, $scope.total);
+                        $scope.chunkCopied();
+                    }, function (job) {
+                        $('#copy-folder-modal').foundation('reveal', 'close');
+                        $scope.copyingAll = false;
+                        Notify.failure(job.error || "some kind of error");
+                    });
                 }).
                 error(function (oData, status) {
                     $('#copy-folder-modal').foundation('reveal', 'close');
@@ -354,6 +349,21 @@ angular.module('BucketContentsPage', ['LandingPage', 'EucaConsoleUtils'])
                     Notify.failure("some kind of error");
                 });
         };
+        $scope.chunkCopied = function () {
+            if ($scope.copyingAll === true) {
+                var chunks = $scope.total / $scope.chunkSize;
+                $scope.index = $scope.index + 1;
+                if ($scope.index >= chunks) {
+                    $('#copy-folder-modal').foundation('reveal', 'close');
+                    $scope.copyingAll = false;
+                    $scope.folder = '';
+                    $scope.$broadcast('refresh');
+                }
+                else {
+                    $scope.copyChunk();
+                }
+            }
+        };
         $scope.cancelCopying = function () {
             $('#copy-folder-modal').foundation('reveal', 'close');
             $scope.copyingAll = false;
@@ -39,6 +39,8 @@ angular.module('BucketDetailsPage', ['S3SharingPanel', 'EucaConsoleUtils', 'Cors
                 var results = oData ? oData.results : {};
                 $scope.bucketCount = results.object_count;
                 $scope.versionCount = results.version_count;
+                $scope.bucketCountCapped = results.object_count_capped;
+                $scope.versionCountCapped = results.version_count_capped;
                 $scope.objectsCountLoading = false;
             }).error(function (oData, status) {
                 eucaHandleErrorS3(oData, status);
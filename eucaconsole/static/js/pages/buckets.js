@@ -7,12 +7,15 @@
  */
 
 angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
-    .controller('BucketsCtrl', function ($scope, $http, $timeout, eucaUnescapeJson, eucaFixHiddenTooltips) {
+    .controller('BucketsCtrl', function ($scope, $http, $timeout, eucaUnescapeJson, eucaFixHiddenTooltips, eucaListBucketKeys,
+                                        eucaWaitForJob) {
         $http.defaults.headers.common['X-Requested-With'] = 'XMLHttpRequest';
         $scope.bucketName = '';
         $scope.updateVersioningAction = '';
         $scope.bucketCounts = {};
         $scope.versionCounts = {};
+        $scope.bucketCountsCapped = {};  // true when a bucket has more objects than the server counts
+        $scope.versionCountsCapped = {};
         $scope.bucketVersioningStatus = {};
         $scope.bucketVersioningAction = {};
         $scope.countsLoading = {};
@@ -22,7 +25,8 @@ angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
         $scope.copyingAll = false;
         $scope.progress = 0;
         $scope.total = 0;
-        $scope.chunkSize = 10;  // set this based on how many keys we want to copy at once
+        $scope.chunkSize = 100;  // set this based on how many keys we want to copy at once
+        $scope.keysPageSize = 1000;  // keys listed per request when gathering keys to copy
         $scope.index = 0;
         $scope.items = null;
         $scope.hasCopyItem = false;
@@ -35,6 +39,7 @@ angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
             $scope.copyObjUrl = options.copy_object_url;
             $scope.getKeysGenericUrl = options.get_keys_generic_url;
             $scope.putKeysUrl = options.put_keys_url;
+            $scope.jobStatusUrl = options.job_status_json_url;
             $scope.uploadUrl = options.upload_url;
             $scope.contentsUrl = options.contents_url;
             $scope.itemUrl = options.bucket_item_url;
@@ -47,6 +52,7 @@ angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
             $scope.bucketName = bucket.bucket_name;
             $scope.bucketCount = $scope.bucketCounts[$scope.bucketName];
             $scope.versionCount = $scope.versionCounts[$scope.bucketName];
+            $scope.versionCountCapped = $scope.versionCountsCapped[$scope.bucketName];
             // Set form action based on bucket choice
             var form_action = $('#' + action + '-form').attr('action');
             form_action = form_action.replace('_name_', $scope.bucketName);
@@ -83,6 +89,8 @@ angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
                         versioningStatus = results.versioning_status;
                     $scope.bucketCounts[bucketName] = results.object_count;
                     $scope.versionCounts[bucketName] = results.version_count;
+                    $scope.bucketCountsCapped[bucketName] = results.object_count_capped;
+                    $scope.versionCountsCapped[bucketName] = results.version_count_capped;
                     $scope.bucketVersioningStatus[bucketName] = versioningStatus;
                     $scope.bucketVersioningAction[bucketName] = $scope.getVersioningActionFromStatus(versioningStatus);
                     $scope.countsLoading[bucketName] = false;
@@ -175,18 +183,16 @@ angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
             url = url.replace('_subpath_', $scope.src_path);
             // slice and dice to get portion of path to be excluded in new location
             $scope.folder = $scope.src_path.slice(0, $scope.src_path.slice(0, $scope.src_path.length-1).lastIndexOf('/')+1);
-            var data = "csrf_token="+$('#csrf_token').val();
-            $http({method: 'POST', url: url, data: data,
-                headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
-                success(function (oData) {
-                    $scope.total = oData.results.length;
-                    $scope.all_items = oData.results;
+            eucaListBucketKeys(url, $scope.keysPageSize).then(
+                function (keys) {
+                    $scope.total = keys.length;
+                    $scope.all_items = keys;
                     $scope.index = 0;
                     $('#copy-folder-modal').foundation('reveal', 'open');
                     $scope.copyFolder();
-                }).
-                error(function (oData, status) {
-                    Notify.failure(oData.message);
+                },
+                function (response) {
+                    Notify.failure(response.data.message);
                 });
         };
         $scope.copyFolder = function () {
@@ -211,26 +217,22 @@ angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
             $http({method: 'POST', url: url, data: data,
                 headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
                 success(function (oData) {
-                    if (oData.errors !== undefined) {
-                        console.log('error copying some keys ' + oData.errors);
-                    }
-                    $scope.progress = $scope.progress + $scope.chunkSize;
-                    if ($scope.progress > $scope.total) {
-                        $scope.progress = $scope.total;
-                    }
-                    if ($scope.copyingAll === true) {
-                        var chunks = $scope.total / $scope.chunkSize;
-                        $scope.index = $scope.index + 1;
-                        if ($scope.index >= chunks) {
-                            $('#copy-folder-modal').foundation('reveal', 'close');
-                            $scope.copyingAll = false;
-                            $scope.folder = '';
-                            $scope.$broadcast('refresh');
-                        }
-                        else {
-                            $scope.copyChunk();
+                    // The chunk is copied by a background job; track its progress until it finishes
+                    var chunkStart = $scope.progress;
+                    var statusUrl = $scope.jobStatusUrl.replace('_id_', oData.job_id);
+                    eucaWaitForJob(statusUrl, function (job) {
+                        $scope.progress = Math.min(chunkStart + job.progress, $scope.total);
+                    }).then(function (job) {
+                        if (job.result.errors.length > 0) {
+                            console.log('error copying some keys ' + job.result.errors);
                         }
-                    }
+                        $scope.progress = Math.min(chunkStart + chunk.length, $scope.total);
+                        $scope.chunkCopied();
+                    }, function (job) {
+                        $('#copy-folder-modal').foundation('reveal', 'close');
+                        $scope.copyingAll = false;
+                        Notify.failure(job.error || "error copying some keys");
+                    });
                 }).
                 error(function (oData, status) {
                     $('#copy-folder-modal').foundation('reveal', 'close');
@@ -238,6 +240,21 @@ angular.module('BucketsPage', ['LandingPage', 'EucaConsoleUtils'])
                     Notify.failure("error copying some keys");
                 });
         };
+        $scope.chunkCopied = function () {
+            if ($scope.copyingAll === true) {
+                var chunks = $scope.total / $scope.chunkSize;
+                $scope.index = $scope.index + 1;
+                if ($scope.index >= chunks) {
+                    $('#copy-folder-modal').foundation('reveal', 'close');
+                    $scope.copyingAll = false;
+                    $scope.folder = '';
+                    $scope.$broadcast('refresh');
+                }
+                else {
+                    $scope.copyChunk();
+                }
+            }
+        };
         $scope.cancelCopying = function () {
             $('#copy-folder-modal').foundation('reveal', 'close');
             $scope.copyingAll = false;
@@ -7,7 +7,7 @@
  */
 
 angular.module('Dashboard', ['EucaConsoleUtils'])
-    .controller('DashboardCtrl', function ($scope, $http, eucaUnescapeJson) {
+    .controller('DashboardCtrl', function ($scope, $http, $timeout, eucaUnescapeJson) {
         $http.defaults.headers.common['X-Requested-With'] = 'XMLHttpRequest';
         $scope.jsonEndpoint = '';
         $scope.statusEndpoint = '';
@@ -15,6 +15,8 @@ angular.module('Dashboard', ['EucaConsoleUtils'])
         $scope.storedZoneKey = '';
         $scope.zoneDropdown = $('#zone-dropdown');
         $scope.itemsLoading = true;
+        $scope.pendingTiles = [];
+        $scope.pendingPollInterval = 3000;
         $scope.health = [];
         $scope.setInitialZone = function () {
             var storedZone = Modernizr.localstorage && localStorage.getItem($scope.storedZoneKey);
@@ -63,18 +65,14 @@ angular.module('Dashboard', ['EucaConsoleUtils'])
             if ($scope.selectedZone) {
                 jsonUrl += '?zone=' + $scope.selectedZone;
             }
+            $scope.pendingTiles = [];
             $http.get(jsonUrl).success(function(oData) {
                 var results = oData ? oData : {};
                 $scope.itemsLoading = false;
                 $scope.totals = results;
-                if (Modernizr.localstorage) {
-                    var saved_names = localStorage.getItem($scope.storageKey);
-                    if (saved_names) {
-                        var names = saved_names.split(',');
-                        $scope.totals.buckets = $scope.totals.buckets + names.length;
-                    }
-                }
+                $scope.totals.buckets = $scope.totals.buckets + $scope.getSharedBucketsCount();
                 $scope.setServiceStatus(results.health.name, results.health.status);
+                $scope.setPendingTiles(results.pending);
             }).error(function (oData, status) {
                 var errorMsg = oData.message || null;
                 if (errorMsg && status === 403) {
@@ -83,6 +81,50 @@ angular.module('Dashboard', ['EucaConsoleUtils'])
                 
             });
         };
+        $scope.getSharedBucketsCount = function() {
+            if (Modernizr.localstorage) {
+                var saved_names = localStorage.getItem($scope.storageKey);
+                if (saved_names) {
+                    return saved_names.split(',').length;
+                }
+            }
+            return 0;
+        };
+        $scope.setPendingTiles = function(pending) {
+            $scope.pendingTiles = pending || [];
+            if ($scope.pendingTiles.length > 0) {
+                $timeout($scope.getPendingCounts, $scope.pendingPollInterval);
+            }
+        };
+        $scope.getPendingCounts = function() {
+            // Re-poll only the tiles that missed their deadline on the previous request
+            if ($scope.pendingTiles.length === 0) {
+                return;
+            }
+            var jsonUrl = $scope.jsonEndpoint + '?tiles=' + $scope.pendingTiles.join(',');
+            var zone = $scope.selectedZone;
+            if (zone) {
+                jsonUrl += '&zone=' + zone;
+            }
+            $http.get(jsonUrl).success(function(oData) {
+                var results = oData ? oData : {};
+                if (zone !== $scope.selectedZone) {
+                    return;  // zone changed while polling; getItemCounts already started over
+                }
+                angular.forEach(results, function(value, key) {
+                    if (key !== 'pending' && key !== 'health') {
+                        $scope.totals[key] = value;
+                    }
+                });
+                if (results.buckets !== undefined) {
+                    $scope.totals.buckets = results.buckets + $scope.getSharedBucketsCount();
+                }
+                $scope.setPendingTiles(results.pending);
+            });
+        };
+        $scope.isPending = function(tile) {
+            return $scope.pendingTiles.indexOf(tile) > -1;
+        };
         $scope.getServiceStatus = function() {
             angular.forEach($scope.health, function(value, key) {
                 if (key === 0) return;  // skip first, it's compute and that's fetch elsewhere
@@ -64,6 +64,7 @@ angular.module('ELBPage', ['EucaConsoleUtils', 'ELBListenerEditor', 'ELBSecurity
             }
             $scope.securityGroupJsonEndpoint = options.securitygroups_json_endpoint;
             $scope.pingPort = options.ping_port;
+            $scope.elbName = options.elb_name;
             $scope.bucketName = $scope.bucketNameField.val();
             $scope.bucketNameChoices = options.bucket_choices;
             $scope.loggingEnabled = options.logging_enabled;
@@ -125,6 +126,13 @@ angular.module('ELBPage', ['EucaConsoleUtils', 'ELBListenerEditor', 'ELBSecurity
         $scope.setWatch = function () {
             eucaHandleUnsavedChanges($scope);
             eucaFixHiddenTooltips();
+            // Updates are applied in the background (see BackgroundJobs); reload to show the updated load balancer
+            $(document).on('backgroundjob:finished', function (event, job) {
+                if (job.result && job.result.elb_name === $scope.elbName) {
+                    event.preventDefault();
+                    BackgroundJobs.reloadPage(job);
+                }
+            });
             $(document).on('submit', '[data-reveal] form', function () {
                 $(this).find('.dialog-submit-button').css('display', 'none');
                 $(this).find('.dialog-progress-display').css('display', 'block');
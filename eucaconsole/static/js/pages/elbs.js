@@ -7,13 +7,51 @@
  */
 
 // Pull in common landing page module
-angular.module('ELBsPage', ['LandingPage'])
-    .controller('ELBsPageCtrl', function ($scope) {
+angular.module('ELBsPage', ['LandingPage', 'EucaConsoleUtils'])
+    .controller('ELBsPageCtrl', function ($scope, $http, eucaHandleError) {
+        $http.defaults.headers.common['X-Requested-With'] = 'XMLHttpRequest';
         $scope.elbName = '';
+        $scope.healthJsonEndpoint = '';
+        $scope.initController = function (healthJsonEndpoint) {
+            $scope.healthJsonEndpoint = healthJsonEndpoint;
+        };
         $scope.revealModal = function (action, elb) {
             $scope.elbName = elb.name;
             var modal = $('#' + action + '-elb-modal');
             modal.foundation('reveal', 'open');
         };
+        $scope.getHealth = function (items) {
+            // Health and latency are fetched after the grid is displayed when the grid is returned without them
+            var pending = (items || []).filter(function (item) {
+                return item.health_pending;
+            });
+            if (pending.length === 0) {
+                return;
+            }
+            var data = "csrf_token=" + $('#csrf_token').val();
+            angular.forEach(pending, function (item) {
+                data += "&names=" + encodeURIComponent(item.name);
+            });
+            $http({method: 'POST', url: $scope.healthJsonEndpoint, data: data,
+                headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
+                success(function (oData) {
+                    var results = oData ? oData.results : {};
+                    angular.forEach(pending, function (item) {
+                        var health = results[item.name];
+                        if (health) {
+                            angular.extend(item, health);
+                        }
+                        item.health_pending = false;
+                    });
+                }).
+                error(function (oData, status) {
+                    angular.forEach(pending, function (item) {
+                        item.health_pending = false;
+                    });
+                    eucaHandleError(oData, status);
+                });
+        };
+        $scope.$on('itemsLoaded', function ($event, items) {
+            $scope.getHealth(items);
+        });
     });
-
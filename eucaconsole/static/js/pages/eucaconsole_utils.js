@@ -100,6 +100,84 @@ angular.module('EucaConsoleUtils', ['CustomFilters', 'ngSanitize'])
         });
     };
 })
+.service('eucaListBucketKeys', function($http, $q) {
+    /**
+     * List all key names under a bucket_keys URL, a page at a time
+     * @param {string} url - bucket_keys endpoint URL
+     * @param {number} pageSize - keys to fetch per request
+     * @return {promise} resolved with the array of key names, or rejected with the failed response
+     */
+    return function(url, pageSize) {
+        var deferred = $q.defer();
+        var keys = [];
+        var fetchPage = function (pageToken) {
+            var data = "csrf_token=" + $('#csrf_token').val() + "&page_size=" + pageSize;
+            if (pageToken) {
+                data += "&page_token=" + encodeURIComponent(pageToken);
+            }
+            $http({method: 'POST', url: url, data: data,
+                headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
+                success(function (oData) {
+                    keys = keys.concat(oData.results);
+                    if (oData.next_page_token) {
+                        fetchPage(oData.next_page_token);
+                    } else {
+                        deferred.resolve(keys);
+                    }
+                }).
+                error(function (oData, status) {
+                    deferred.reject({data: oData, status: status});
+                });
+        };
+        fetchPage();
+        return deferred.promise;
+    };
+})
+.service('eucaWaitForJob', function($http, $q, $timeout) {
+    /**
+     * Poll a background job (see eucaconsole/jobs.py) until it finishes
+     * @param {string} url - job_status_json endpoint URL for the job
+     * @param {function} onProgress - optional, called with the job's status after each poll
+     * @param {number} interval - milliseconds between polls (defaults to 1000)
+     * @return {promise} resolved with the completed job's status, or rejected with the failed job's
+     *     status (or the last failed response)
+     *
+     * Without memcached only the console worker that ran the job knows about it, so a poll answered by
+     * another worker gets a 404.  Failed polls are retried up to 5 times in a row before giving up.
+     */
+    return function(url, onProgress, interval) {
+        var deferred = $q.defer();
+        var maxMissedPolls = 5;
+        var missedPolls = 0;
+        var poll = function () {
+            $http.get(url).
+                success(function (oData) {
+                    var job = oData.results;
+                    missedPolls = 0;
+                    if (onProgress) {
+                        onProgress(job);
+                    }
+                    if (job.state === 'complete') {
+                        deferred.resolve(job);
+                    } else if (job.state === 'failed') {
+                        deferred.reject(job);
+                    } else {
+                        $timeout(poll, interval || 1000);
+                    }
+                }).
+                error(function (oData, status) {
+                    missedPolls += 1;
+                    if (missedPolls < maxMissedPolls) {
+                        $timeout(poll, interval || 1000);
+                    } else {
+                        deferred.reject({data: oData, status: status});
+                    }
+                });
+        };
+        poll();
+        return deferred.promise;
+    };
+})
 .service('eucaHandleErrorS3', function() {
     /**
      * Provide generic error handling in the browser for XHR calls to Object Storage. 
@@ -47,9 +47,26 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
         $scope.displayCount = $scope.limitCount;
         $scope.transitionalRefresh = true;
         $scope.serverFilter = false;
-        $scope.initController = function (pageResource, sortKey, jsonItemsEndpoint, cloud_type) {
+        $scope.serverPaging = false;  // When true, items are searched, sorted and paged by the JSON endpoint
+        $scope.incrementalPaging = false;  // When true, pages are only appended as the user scrolls (e.g. S3 listings)
+        $scope.pageSize = 0;
+        $scope.nextPageToken = null;
+        $scope.totalItems = 0;
+        $scope.pageLoading = false;
+        $scope.initController = function (pageResource, sortKey, jsonItemsEndpoint, cloud_type, pageSize, incremental) {
             pageResource = pageResource || window.location.pathname.split('/')[0];
             $scope.jsonEndpoint = jsonItemsEndpoint;
+            if (pageSize) {
+                $scope.serverPaging = true;
+                $scope.pageSize = pageSize;
+                if (incremental) {
+                    // Endpoint can only page in its own order, so search and sort apply to the items loaded so far
+                    $scope.incrementalPaging = true;
+                } else {
+                    $scope.serverFilter = true;
+                    $scope.jsonEndpoint = $scope.getFacetEndpoint(jsonItemsEndpoint);
+                }
+            }
             $scope.initLocalStorageKeys(pageResource);
             $scope.setInitialSort(sortKey);
             $scope.getItems();
@@ -62,6 +79,32 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
                 $scope.serverFilter = true;
             }
         };
+        $scope.getFacetEndpoint = function (jsonItemsEndpoint) {
+            // Pass facets in the page URL through to the JSON endpoint so they are applied server-side
+            var url = window.location.href;
+            if (url.indexOf("?") > -1) {
+                return jsonItemsEndpoint + "?" + url.split("?")[1];
+            }
+            return jsonItemsEndpoint;
+        };
+        $scope.getPagingParams = function (pageToken, refreshing) {
+            // When refreshing, re-fetch all pages loaded so far so the grid doesn't shrink
+            var pageSize = refreshing ? Math.max($scope.pageSize, $scope.unfilteredItems.length) : $scope.pageSize;
+            var params = ["page_size=" + pageSize];
+            if ($scope.sortBy && !$scope.incrementalPaging) {
+                params.push("sort=" + encodeURIComponent($scope.sortBy));
+            }
+            if ($scope.searchFilter && !$scope.incrementalPaging) {
+                params.push("search=" + encodeURIComponent($scope.searchFilter));
+                angular.forEach($scope.filterKeys, function (key) {
+                    params.push("filter_keys=" + encodeURIComponent(key));
+                });
+            }
+            if (pageToken) {
+                params.push("page_token=" + encodeURIComponent(pageToken));
+            }
+            return params.join("&");
+        };
         $scope.initLocalStorageKeys = function (pageResource){
             $scope.pageResource = pageResource;
             $scope.sortByKey = $scope.pageResource + "-sortBy";
@@ -83,7 +126,11 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
         $scope.setWatch = function () {
             // Dismiss sorting dropdown on sort selection
             var sortingDropdown = $('#sorting-dropdown');
-            $scope.$watch('sortBy',  function () {
+            $scope.$watch('sortBy',  function (newVal, oldVal) {
+                if ($scope.serverPaging && !$scope.incrementalPaging && newVal !== oldVal) {
+                    $scope.itemsLoading = true;
+                    $scope.getItems();
+                }
                 if (sortingDropdown.hasClass('open')) {
                     sortingDropdown.removeClass('open');
                     sortingDropdown.removeAttr('style');
@@ -186,9 +233,13 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
                 }
             });
         };
-        $scope.getItems = function (okToRefresh) {
+        $scope.getItems = function (okToRefresh, pageToken) {
             var csrf_token = $('#csrf_token').val();
             var data = "csrf_token="+csrf_token;
+            if ($scope.serverPaging) {
+                data += "&" + $scope.getPagingParams(pageToken, okToRefresh !== undefined);
+                $scope.pageLoading = true;
+            }
             $scope.detectOpenDropdown();
             $http({method:'POST', url:$scope.jsonEndpoint, data:data,
                    headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
@@ -196,6 +247,17 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
                 var results = oData ? oData.results : [];
                 var transitionalCount = 0;
                 $scope.itemsLoading = false;
+                if (oData && oData.message) {  // Error while streaming results, so the list may be incomplete
+                    Notify.failure(oData.message);
+                }
+                if ($scope.serverPaging) {
+                    $scope.pageLoading = false;
+                    $scope.nextPageToken = oData.next_page_token || null;
+                    $scope.totalItems = oData.total || 0;
+                    if (pageToken) {
+                        results = $scope.unfilteredItems.concat(results);
+                    }
+                }
                 $scope.unfilteredItems = results;
                 $scope.unfilteredItems.forEach(function (item) {
                     if (!!item.transitional) {
@@ -227,6 +289,7 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
                     $scope.facetItems = $scope.unfilteredItems;
                 }
             }).error(function (oData, status) {
+                $scope.pageLoading = false;
                 if (oData === undefined && status === 0) {  // likely interrupted request
                     return;
                 }
@@ -313,7 +376,7 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
          */
         $scope.searchFilterItems = function() {
             var filterText = ($scope.searchFilter || '').toLowerCase();
-            if (filterText === '') {
+            if (filterText === '' || ($scope.serverPaging && !$scope.incrementalPaging)) {
                 // If the search filter is empty, skip the filtering
                 $scope.items = $scope.facetItems;
                 return;
@@ -356,6 +419,8 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
         $scope.showMore = function () {
             if ($scope.displayCount < $scope.items.length) {
                 $scope.displayCount += $scope.limitCount;
+            } else if ($scope.serverPaging && $scope.nextPageToken && !$scope.pageLoading) {
+                $scope.getItems(undefined, $scope.nextPageToken);
             }
         };
         // listen for showMore to allow specialized screens to use this
@@ -377,6 +442,13 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
             $scope.itemsLoading=true;
             $scope.getItems();
         });
+        // refresh when a background job queued before the redirect (e.g. a delete) finishes
+        $(document).on('backgroundjob:finished', function () {
+            $scope.$apply(function () {
+                $scope.itemsLoading = true;
+                $scope.getItems();
+            });
+        });
         $scope.clickOpenDropdown = function () {
             if ($scope.openDropdownID !== '') {
                $('#' + $scope.openDropdownID).click();
@@ -451,6 +523,11 @@ angular.module('LandingPage', ['CustomFilters', 'ngSanitize', 'MagicSearch', 'Ex
         $scope.$on('textSearch', function($event, text, filter_keys) {
             $scope.searchFilter = text;
             $scope.filterKeys = filter_keys;
+            if ($scope.serverPaging && !$scope.incrementalPaging) {
+                $scope.itemsLoading = true;
+                $scope.getItems();
+                return;
+            }
             $timeout(function() {
                 $scope.searchFilterItems();
             });
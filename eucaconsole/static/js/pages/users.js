@@ -7,20 +7,24 @@
  */
 
 angular.module('UsersPage', ['LandingPage', 'EucaConsoleUtils'])
-    .controller('UsersCtrl', function ($scope, $http, eucaHandleError) {
+    .controller('UsersCtrl', function ($scope, $http, $filter, eucaHandleError) {
         $scope.userName = '';
         $scope.groupName = '';
         $scope.user_view_url = '';
         $scope.group_view_url = '';
         $scope.user_summary_url = '';
+        $scope.users_summary_url = '';
+        $scope.summaryBatchSize = 100;  // Users summarized per users_summary_json request
+        $scope.gridWatched = false;
         $scope.disable_url = '';
         $scope.enable_url = '';
         $scope.delete_url = '';
         $scope.getFileEndpoint = '';
-        $scope.initPage = function (user_view_url, group_view_url, user_summary_url, disable_url, enable_url, delete_url, getFileEndpoint) {
+        $scope.initPage = function (user_view_url, group_view_url, user_summary_url, users_summary_url, disable_url, enable_url, delete_url, getFileEndpoint) {
             $scope.user_view_url = user_view_url;
             $scope.group_view_url = group_view_url;
             $scope.user_summary_url = user_summary_url;
+            $scope.users_summary_url = users_summary_url;
             $scope.disable_url = disable_url;
             $scope.enable_url = enable_url;
             $scope.delete_url = delete_url;
@@ -116,28 +120,62 @@ angular.module('UsersPage', ['LandingPage', 'EucaConsoleUtils'])
             window.location = $scope.user_view_url.replace('_name_', user.user_name)+fragment;
         };
         $scope.$on('itemsLoaded', function($event, items) {
-            for (var i=0; i < items.length; i++) {
-                var url = $scope.user_summary_url.replace('_name_', items[i].user_name);
-                $scope.addUserSummaryData(items, url);
+            var gridScope = $event.targetScope;
+            $scope.addUserSummaryData($scope.getVisibleUsers(gridScope, items));
+            if (!$scope.gridWatched) {
+                // Summarize rows as they are shown, e.g. after "show more", sorting or filtering
+                $scope.gridWatched = true;
+                gridScope.$watchGroup(['items', 'displayCount', 'sortBy'], function () {
+                    $scope.addUserSummaryData($scope.getVisibleUsers(gridScope, gridScope.items));
+                });
             }
         });
-        $scope.addUserSummaryData = function(items, url) {
-            var theItems = items;
-            $http.get(url).success(function(oData) {
+        $scope.getVisibleUsers = function (gridScope, items) {
+            var visible = $filter('orderBy')(items || [], gridScope.sortBy).slice(0, gridScope.displayCount);
+            return visible.filter(function (item) {
+                return !item.summaryRequested;
+            });
+        };
+        $scope.addUserSummaryData = function(users) {
+            var batchSize = $scope.summaryBatchSize;
+            for (var i=0; i < users.length; i += batchSize) {
+                $scope.fetchUserSummaries(users.slice(i, i + batchSize));
+            }
+        };
+        $scope.fetchUserSummaries = function(users) {
+            var data = "csrf_token=" + $('#csrf_token').val();
+            users.forEach(function (user) {
+                user.summaryRequested = true;
+                data += "&user_name=" + encodeURIComponent(user.user_name);
+            });
+            $http({method:'POST', url:$scope.users_summary_url, data:data,
+                   headers: {'Content-Type': 'application/x-www-form-urlencoded'}}).
+              success(function(oData) {
                 var results = oData ? oData.results : [];
-                // search item list for this user
-                for (var k=0; k<theItems.length; k++) {
-                    if (theItems[k].user_name == results.user_name) {
+                var usersByName = {};
+                users.forEach(function (user) {
+                    usersByName[user.user_name] = user;
+                });
+                results.forEach(function (summary) {
+                    var user = usersByName[summary.user_name];
+                    if (user) {
                         // add these values to the item record so that angular will see them
-                        theItems[k].has_password = results.has_password;
-                        theItems[k].num_keys = results.num_keys;
-                        theItems[k].user_enabled = results.user_enabled;
-                        break;
+                        user.has_password = summary.has_password;
+                        user.num_keys = summary.num_keys;
+                        user.user_enabled = summary.user_enabled;
+                        delete usersByName[summary.user_name];
                     }
-                }
-            }).error(function (oData, status) {
-                // ignore
-            });
+                });
+                // users the server couldn't summarize in time are requested again when the grid next changes
+                angular.forEach(usersByName, function (user) {
+                    user.summaryRequested = false;
+                });
+              }).
+              error(function (oData, status) {
+                users.forEach(function (user) {
+                    user.summaryRequested = false;
+                });
+              });
         };
     })
 ;
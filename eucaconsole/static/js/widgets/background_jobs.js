@@ -0,0 +1,93 @@
+/**
+ * Copyright 2017 Ent. Services Development Corporation LP
+ *
+ * @fileOverview Reports background jobs (see eucaconsole/jobs.py) queued before a redirect
+ * @requires jQuery, Notify
+ *
+ * Polls each job listed in #background-jobs until it finishes, then triggers a 'backgroundjob:finished'
+ * event on the document (landing pages refresh their items) and shows how the job turned out.
+ * A handler may call preventDefault() and BackgroundJobs.reloadPage(job) to show the outcome on a fresh copy
+ * of the page instead (e.g. a detail page whose form the job changed).
+ *
+ * Without memcached only the console worker that ran a job knows about it, so a poll answered by another
+ * worker gets a 404.  Failed polls are retried up to maxMissedPolls times in a row before giving up.
+ *
+ */
+var BackgroundJobs = (function() {
+    var _statusUrl = '';
+    var _storageKey = 'background-job-outcome';
+
+    var _notify = function (job) {
+        if (job.state === 'complete') {
+            Notify.success(job.message || job.description);
+        } else {
+            Notify.failure(job.error || job.description);
+        }
+    };
+
+    var _finish = function (job) {
+        var event = $.Event('backgroundjob:finished');
+        $(document).trigger(event, [job]);
+        if (!event.isDefaultPrevented()) {
+            _notify(job);
+        }
+    };
+
+    var _poll = function (jobId, missedPolls) {
+        $.ajax({
+            url: _statusUrl.replace('_id_', jobId),
+            dataType: 'json',
+            headers: {'X-Requested-With': 'XMLHttpRequest'}
+        }).done(function (data) {
+            var job = data.results;
+            if (job.state === 'complete' || job.state === 'failed') {
+                _finish(job);
+            } else {
+                setTimeout(function () {
+                    _poll(jobId, 0);
+                }, BackgroundJobs.pollInterval);
+            }
+        }).fail(function () {
+            missedPolls = (missedPolls || 0) + 1;
+            if (missedPolls < BackgroundJobs.maxMissedPolls) {
+                setTimeout(function () {
+                    _poll(jobId, missedPolls);
+                }, BackgroundJobs.pollInterval);
+            } else {
+                Notify.failure('Unable to get the status of a background job');
+            }
+        });
+    };
+
+    return {
+        pollInterval: 5000,
+        maxMissedPolls: 5,
+        watch: function (statusUrl, jobIds) {
+            _statusUrl = statusUrl;
+            $.each(jobIds, function (idx, jobId) {
+                _poll(jobId, 0);
+            });
+        },
+        reloadPage: function (job) {
+            if (window.sessionStorage) {
+                sessionStorage.setItem(_storageKey, JSON.stringify(job));
+            }
+            window.location.reload();
+        },
+        notifyReloaded: function () {
+            var outcome = window.sessionStorage && sessionStorage.getItem(_storageKey);
+            if (outcome) {
+                sessionStorage.removeItem(_storageKey);
+                _notify(JSON.parse(outcome));
+            }
+        }
+    };
+}());
+
+$(document).ready(function () {
+    var jobsElem = $('#background-jobs');
+    BackgroundJobs.notifyReloaded();
+    if (jobsElem.length && jobsElem.data('job-ids')) {
+        BackgroundJobs.watch(jobsElem.data('status-url'), String(jobsElem.data('job-ids')).split(','));
+    }
+});
@@ -44,7 +44,9 @@ import threading
 
 from cgi import FieldStorage
 from contextlib import contextmanager
+from functools import partial
 from dateutil import tz
+from dogpile.cache.api import NO_VALUE
 from markupsafe import Markup
 from random import choice
 from urllib import urlencode
@@ -66,13 +68,20 @@ from pyramid.settings import asbool
 from pyramid.view import notfound_view_config, view_config
 
 from ..caches import long_term
-from ..caches import invalidate_cache
+from ..caches import short_term
+from ..caches import invalidate_cache, cache_get_multi, cache_set_multi
+from ..caches import iam_cache, alarm_status_cache, images_by_snapshot_cache
+from ..caches import resource_snapshots, resource_snapshot_cache
 from ..constants.images import AWS_IMAGE_OWNER_ALIAS_CHOICES, EUCA_IMAGE_OWNER_ALIAS_CHOICES
 from ..forms.login import EucaLogoutForm
 from ..models.auth import EucaAuthenticator, OIDCAuthenticator
 from ..i18n import _
+from ..jobs import background_jobs, MAX_TRACKED_JOBS
 from ..models import Notification
+from ..models.alarms import AlarmStatusIndex
 from ..models.auth import ConnectionManager, RegionCache
+from ..models.iam import GroupMembershipIndex
+from ..parallel import ParallelCalls, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT
 
 
 def escape_braces(event):
@@ -93,6 +102,66 @@ class JSONResponse(Response):
         )
 
 
+class StreamingJSONResponse(Response):
+    """JSON response that serializes results (a list or generator of dicts) as the WSGI server
+    iterates the body, so the full JSON document is never held in memory.
+
+    Extra keyword args are added as top-level keys after the results list.  Headers have already been
+    sent by the time results fail, so any error ends the list early and sets the "error" and "message" keys.
+    Pooled connections the results still use are passed as connections, and are returned once the body is closed.
+    """
+    ITEMS_PER_CHUNK = 100
+
+    def __init__(self, results, status=200, connections=None, **extra):
+        app_iter = self.iter_json(results, extra)
+        if connections:
+            app_iter = ConnectionReturningIter(app_iter, connections)
+        super(StreamingJSONResponse, self).__init__(
+            status=status, content_type='application/json', app_iter=app_iter)
+
+    @classmethod
+    def iter_json(cls, results, extra):
+        chunk = ['{"results": [']
+        try:
+            for idx, item in enumerate(results):
+                chunk.append(json.dumps(item) if idx == 0 else ', ' + json.dumps(item))
+                if len(chunk) >= cls.ITEMS_PER_CHUNK:
+                    yield ''.join(chunk)
+                    chunk = []
+        except Exception as err:
+            # Headers have already been sent, so close the document and report the error in the body
+            if isinstance(err, (BotoServerError, HTTPException, socket.error)):
+                logging.error(u'Error while streaming JSON results: {0}'.format(err))
+            else:
+                logging.exception(u'Error while streaming JSON results')
+            message = _(u'Unable to load all items.')
+            if isinstance(err, BotoServerError):
+                message = err.error_message or err.reason
+            extra = dict(extra, error=True, message=message)
+        chunk.append(']')
+        for key, value in extra.items():
+            chunk.append(', {0}: {1}'.format(json.dumps(key), json.dumps(value)))
+        chunk.append('}')
+        yield ''.join(chunk)
+
+
+class ConnectionReturningIter(object):
+    """Response body iterable that returns its pooled connections when the WSGI server closes it"""
+    def __init__(self, app_iter, connections):
+        self.app_iter = app_iter
+        self.connections = list(connections)
+
+    def __iter__(self):
+        return iter(self.app_iter)
+
+    def close(self):
+        try:
+            self.app_iter.close()
+        finally:
+            while self.connections:
+                ConnectionManager.return_connection(self.connections.pop())
+
+
 # Can use this for 1.5, but the fix below for 1.4 also works in 1.5.
 # class JSONError(HTTPException):
 class JSONError(HTTPUnprocessableEntity):
@@ -118,7 +187,6 @@ class BaseView(object):
 
     def get_connection(self, conn_type='ec2', cloud_type=None, region=None, access_key=None,
                        secret_key=None, security_token=None):
-        conn = None
         if cloud_type is None:
             cloud_type = self.cloud_type
 
@@ -131,31 +199,114 @@ class BaseView(object):
         if security_token is None:
             security_token = self.security_token
 
+        # Connections are checked out of the pool once per request and handed back when it finishes
+        request_key = (conn_type, cloud_type, region, access_key, security_token)
+        checked_out = self._get_checked_out_connections_()
+        if request_key in checked_out:
+            return checked_out[request_key]
+
+        conn = self._connect_(conn_type, cloud_type, region, access_key, secret_key, security_token)
+        if conn is not None:
+            checked_out[request_key] = conn
+        return conn
+
+    def checkout_connection(self, conn_type='ec2'):
+        """Check a connection out of the pool for work that may outlive this request (e.g. a worker thread)
+
+        Unlike get_connection(), the connection isn't shared with the rest of the request or returned when
+        it finishes; hand it back with ConnectionManager.return_connection() once done with it.
+        """
+        return self._connect_(
+            conn_type, self.cloud_type, self.region, self.access_key, self.secret_key, self.security_token)
+
+    def get_connection_factory(self, conn_type='ec2'):
+        """Returns a function checking a connection out of the pool from values captured now, without the request
+
+        Work that may run after the request has finished (e.g. a background cache refresh) calls it to get a
+        connection of its own; hand the connection back with ConnectionManager.return_connection() once done.
+        """
+        return self._get_connection_factory_(
+            conn_type, self.cloud_type, self.region, self.access_key, self.secret_key, self.security_token)
+
+    def _connect_(self, conn_type, cloud_type, region, access_key, secret_key, security_token):
+        conn = None
+        try:
+            conn = self._get_connection_factory_(
+                conn_type, cloud_type, region, access_key, secret_key, security_token)()
+        except socket.error as err:
+            BaseView.handle_error(err=BotoServerError(504, str(err)), request=self.request)
+        return conn
+
+    def _get_connection_factory_(self, conn_type, cloud_type, region, access_key, secret_key, security_token):
         validate_certs = False
         if self.request.registry.settings:  # do this to pass tests
             validate_certs = asbool(self.request.registry.settings.get('connection.ssl.validation', False))
             certs_file = self.request.registry.settings.get('connection.ssl.certfile', None)
-        try:
-            if cloud_type == 'aws':
-                conn = ConnectionManager.aws_connection(
-                    region, access_key, secret_key, security_token, conn_type, validate_certs)
-            elif cloud_type == 'euca':
-                host = self._get_ufs_host_setting_()
-                port = self._get_ufs_port_setting_()
-                dns_enabled = self.request.session.get('dns_enabled', True)
-                regions = RegionCache(None).regions()
-                if len(regions) > 0:
-                    for region in regions:
-                        if region['endpoints']['ec2'].find(host) > -1:
-                            self.default_region = region['name']
-                conn = ConnectionManager.euca_connection(
-                    host, port, region, access_key, secret_key, security_token,
-                    conn_type, dns_enabled, validate_certs, certs_file
-                )
-        except socket.error as err:
-            BaseView.handle_error(err=BotoServerError(504, str(err)), request=self.request)
+        if cloud_type == 'aws':
+            return partial(
+                ConnectionManager.aws_connection,
+                region, access_key, secret_key, security_token, conn_type, validate_certs)
+        elif cloud_type == 'euca':
+            host = self._get_ufs_host_setting_()
+            port = self._get_ufs_port_setting_()
+            dns_enabled = self.request.session.get('dns_enabled', True)
+            regions = RegionCache(None).regions()
+            if len(regions) > 0:
+                for region in regions:
+                    if region['endpoints']['ec2'].find(host) > -1:
+                        self.default_region = region['name']
+            return partial(
+                ConnectionManager.euca_connection,
+                host, port, region, access_key, secret_key, security_token,
+                conn_type, dns_enabled, validate_certs, certs_file
+            )
+        return lambda: None
 
-        return conn
+    def _get_checked_out_connections_(self):
+        checked_out = getattr(self.request, 'checked_out_connections', None)
+        if checked_out is None:
+            checked_out = self.request.checked_out_connections = {}
+            self.request.add_finished_callback(self._return_connections_)
+        return checked_out
+
+    @staticmethod
+    def _return_connections_(request):
+        for conn in request.checked_out_connections.values():
+            ConnectionManager.return_connection(conn)
+        request.checked_out_connections.clear()
+
+    def get_parallel_calls(self):
+        """Returns a ParallelCalls runner configured from the connection.parallel.* settings"""
+        settings = self.request.registry.settings or {}
+        return ParallelCalls(
+            max_workers=self.get_parallel_workers(),
+            timeout=int(settings.get('connection.parallel.timeout', DEFAULT_TIMEOUT)),
+        )
+
+    def get_parallel_workers(self):
+        """Max number of concurrent backend calls per request (connection.parallel.workers setting)"""
+        settings = self.request.registry.settings or {}
+        return int(settings.get('connection.parallel.workers', DEFAULT_MAX_WORKERS))
+
+    def get_job_owner(self):
+        """Identifies the user whose background jobs may be polled from this session"""
+        return u'{0}|{1}|{2}'.format(
+            self.cloud_type, self.get_account_display_name(), self.request.session.get('username', ''))
+
+    def submit_job(self, description, func, *args, **kwargs):
+        """Run func(job, *args, **kwargs) in the background (see jobs.JobRunner), returning the job id"""
+        # Connections passed to the job stay with it rather than going back to the pool after this request
+        checked_out = self._get_checked_out_connections_()
+        passed = list(args) + kwargs.values()
+        for request_key, conn in checked_out.items():
+            if any(conn is arg for arg in passed):
+                del checked_out[request_key]
+        return background_jobs.submit(self.get_job_owner(), description, func, *args, **kwargs)
+
+    def track_job(self, job_id):
+        """Have the pages shown after a redirect report how the job turns out"""
+        job_ids = self.request.session.get('background_jobs', [])
+        self.request.session['background_jobs'] = (job_ids + [job_id])[-MAX_TRACKED_JOBS:]
 
     def get_account_display_name(self):
         if self.cloud_type == 'euca':
@@ -247,9 +398,7 @@ class BaseView(object):
         This method sets the right account value so we cache private images per-acct
         and handles caching error by fetching the data from the server.
         """
-        acct = self.request.session.get('account', '')
-        if acct == '':
-            acct = self.request.session.get('access_id', '')
+        acct = self.get_cache_account(self.request)
         if 'amazon' in owners or 'aws-marketplace' in owners:
             acct = ''
         ufshost = self.get_connection().host if self.cloud_type == 'euca' else ''
@@ -264,13 +413,177 @@ class BaseView(object):
 
     def invalidate_images_cache(self):
         region = self.request.session.get('region')
-        acct = self.request.session.get('account', '')
-        if acct == '':
-            acct = self.request.session.get('access_id', '')
+        acct = self.get_cache_account(self.request)
         ufshost = self.get_connection().host if self.cloud_type == 'euca' else ''
         invalidate_cache(long_term, 'images', None, [], [], region, acct, ufshost)
         invalidate_cache(long_term, 'images', None, [u'self'], [], region, acct, ufshost)
         invalidate_cache(long_term, 'images', None, [], [u'self'], region, acct, ufshost)
+        self.invalidate_images_by_snapshot()
+
+    def _get_images_by_snapshot_cache_key_(self):
+        return images_by_snapshot_cache.make_key(
+            'images_by_snapshot', self._get_resource_snapshot_scope_(), self._get_cache_identity_())
+
+    def invalidate_images_by_snapshot(self):
+        """Drop the images by snapshot index cached for every user of the account"""
+        self._images_by_snapshot_ = None
+        if short_term.is_configured:
+            images_by_snapshot_cache.invalidate(*self._get_resource_snapshot_scope_())
+
+    @staticmethod
+    def get_cache_account(request):
+        """Account that cached values are kept under: the account name on Eucalyptus, the access key on AWS"""
+        return request.session.get('account', '') or request.session.get('access_id', '')
+
+    def _get_resource_snapshot_scope_(self):
+        acct = self.get_cache_account(self.request)
+        region = self.request.session.get('region', '')
+        ufshost = self._get_ufs_host_setting_() if self.cloud_type == 'euca' else ''
+        return acct, region, ufshost
+
+    def _get_cache_identity_(self):
+        # IAM policies can limit what each user of an account may describe, so cached listings are per user
+        return self.request.session.get('username', '')
+
+    def get_resource_snapshot(self, namespace, fetch, *args):
+        """
+        Return a (possibly stale) cached resource listing for the current user, fetched as fetch(ec2_conn),
+        refreshing it in the background once it is older than cache.resource_snapshots.expire.
+        invalidate_resource_snapshots() drops the listings of every user in the account.
+        Falls back to calling fetch with the request's connection when the cache is disabled or unavailable.
+
+        A refresh can run after the request has finished, so cached listings are fetched on a connection
+        checked out for the purpose; fetch must not use the request or its connections.
+        """
+        settings = self.request.registry.settings or {}
+        if asbool(settings.get('cache.resource_snapshots.disable', False)) or not resource_snapshots.is_configured:
+            return fetch(self.get_connection())
+        acct, region, ufshost = self._get_resource_snapshot_scope_()
+        connect = self.get_connection_factory()
+
+        def creator():
+            conn = connect()
+            try:
+                return fetch(conn)
+            finally:
+                ConnectionManager.return_connection(conn)
+
+        try:
+            return resource_snapshot_cache.get_or_create(
+                namespace, creator, acct, region, ufshost, self._get_cache_identity_(), *args)
+        except pylibmc.Error:
+            logging.warn('memcached not responding')
+            return fetch(self.get_connection())
+
+    def invalidate_resource_snapshots(self):
+        self.invalidate_resource_snapshot_scope(self._get_resource_snapshot_scope_())
+
+    @staticmethod
+    def invalidate_resource_snapshot_scope(scope):
+        """Invalidate the listings cached for scope (see _get_resource_snapshot_scope_), e.g. from a background job"""
+        if resource_snapshots.is_configured:
+            resource_snapshot_cache.invalidate(*scope)
+
+    def get_alarm_status_index(self, cw_conn=None):
+        """Alarm status by resource for the account and region, built from all alarms and cached per user"""
+        cw_conn = cw_conn or self.get_connection(conn_type='cloudwatch')
+
+        def creator():
+            return AlarmStatusIndex.index_alarms(AlarmStatusIndex.describe_all_alarms(cw_conn)) if cw_conn else {}
+
+        if not short_term.is_configured:
+            return AlarmStatusIndex(creator())
+        try:
+            cache_key = alarm_status_cache.make_key(
+                'alarm_status_index', self._get_resource_snapshot_scope_(), self._get_cache_identity_())
+            return AlarmStatusIndex(short_term.get_or_create(cache_key, creator))
+        except pylibmc.Error:
+            logging.warn('memcached not responding')
+            return AlarmStatusIndex(creator())
+
+    def invalidate_alarm_status_index(self):
+        """Drop the alarm status index cached for every user of the account, e.g. after changing an alarm"""
+        if short_term.is_configured:
+            alarm_status_cache.invalidate(*self._get_resource_snapshot_scope_())
+
+    def _get_iam_cache_key_(self, namespace, *args):
+        # IAM is global, so every region of an account shares the account's generation (see invalidate_iam_caches)
+        acct, region, ufshost = self._get_resource_snapshot_scope_()
+        return iam_cache.make_key(namespace, (acct, ufshost), self._get_cache_identity_(), *args)
+
+    def invalidate_iam_caches(self):
+        """Drop the IAM lookups cached for every user of the account, e.g. after changing a user or group"""
+        if not short_term.is_configured:
+            return
+        acct, region, ufshost = self._get_resource_snapshot_scope_()
+        iam_cache.invalidate(acct, ufshost)
+
+    def get_group_membership_index(self, iam_conn=None):
+        """Group names by user for the account, fetched with bounded parallel calls and cached in short_term"""
+        iam_conn = iam_conn or self.get_connection(conn_type='iam')
+
+        def creator():
+            if not iam_conn:
+                return {}
+            group_names = [group.group_name for group in iam_conn.get_all_groups().groups]
+            user_names = [user.user_name for user in iam_conn.get_all_users().users]
+            return GroupMembershipIndex.index_groups(iam_conn, group_names, user_names, self.get_parallel_calls())
+
+        if not short_term.is_configured:
+            return GroupMembershipIndex(creator())
+        try:
+            return GroupMembershipIndex(
+                short_term.get_or_create(self._get_iam_cache_key_('group_membership_index'), creator))
+        except pylibmc.Error:
+            logging.warn('memcached not responding')
+            return GroupMembershipIndex(creator())
+
+    def get_cached_iam_lookups(self, namespace, names, fetch):
+        """Return a dict of {name: fetch(name)} for IAM entity names (users, groups, accounts...)
+
+        Values come from short_term where possible.  The rest are fetched concurrently on a
+        get_parallel_calls() pool and cached, except for None, which fetch may return when a lookup fails.
+        Names whose lookup misses the pool's deadline are left out of the result.
+        """
+        names = list(set(names))
+        cache_keys = {}
+        if short_term.is_configured and names:
+            try:
+                # Keys include the account's IAM cache generation, which is itself read from memcached
+                cache_keys = dict((name, self._get_iam_cache_key_(namespace, name)) for name in names)
+            except pylibmc.Error:
+                logging.warn('memcached not responding')
+        cached_names = cache_keys.keys()
+        cached = cache_get_multi(short_term, [cache_keys[name] for name in cached_names])
+        values = dict((name, value) for name, value in zip(cached_names, cached) if value is not NO_VALUE)
+        missing = [name for name in names if name not in values]
+        if missing:
+            calls = self.get_parallel_calls()
+            for name in missing:
+                calls.add(name, fetch, name)
+            fetched, errors, pending = calls.run_partial()
+            for name in missing:
+                if name in errors:
+                    raise errors[name]
+            if pending:
+                logging.warn(u'Timed out looking up {0} for {1}'.format(namespace, ', '.join(pending)))
+            values.update(fetched)
+            cache_set_multi(short_term, dict(
+                (cache_keys[name], value) for name, value in fetched.items()
+                if value is not None and name in cache_keys))
+        return values
+
+    def get_json_results(self, results):
+        """Return results (a list or generator of dicts) for a JSON view, streaming them when json.streaming is set"""
+        settings = self.request.registry.settings or {}
+        if asbool(settings.get('json.streaming', False)):
+            # The results are generated after the request has finished, so its connections stay checked
+            # out until the response body is closed rather than going back to the pool with the request
+            checked_out = self._get_checked_out_connections_()
+            connections = checked_out.values()
+            checked_out.clear()
+            return StreamingJSONResponse(results, connections=connections)
+        return dict(results=list(results))
 
     def get_euca_authenticator(self):
         """
@@ -524,6 +837,7 @@ class TaggedItemView(BaseView):
         if self.tagged_obj is not None:
             self.remove_tags()
             self.add_tags()
+            self.invalidate_resource_snapshots()
 
     def update_name_tag(self, value):
         if self.tagged_obj is not None:
@@ -532,6 +846,7 @@ class TaggedItemView(BaseView):
                 if value and not value.startswith('aws:'):
                     tag_value = self.unescape_braces(value)
                     self.tagged_obj.add_tag('Name', tag_value)
+                self.invalidate_resource_snapshots()
 
     def _normalize_tags(self, tags):
         if type(tags) is dict:
@@ -672,7 +987,15 @@ class LandingPageView(BaseView):
     :ivar prefix: The prefix for each landing page, relevant to the section
         For example, prefix = '/instances' for Instances
 
+    Landing page JSON views may return a single page of results via get_paged_results().
+    Paging is enabled when the page_size param is passed (see PAGING_PARAMS).
+
     """
+    # Request params used by get_paged_results(), never treated as item filters
+    # (filter_keys is still sent by landingpage.js, but searches always use the view's filter_keys)
+    PAGING_PARAMS = ['page_size', 'page_token', 'sort', 'search', 'filter_keys']
+    MAX_PAGE_SIZE = 1000
+
     def __init__(self, request, **kwargs):
         super(LandingPageView, self).__init__(request, **kwargs)
         self.filter_keys = []
@@ -684,6 +1007,7 @@ class LandingPageView(BaseView):
     def filter_items(self, items, ignore=None, autoscale=False):
         ignore = ignore or []  # Pass list of filters to ignore
         ignore.append('csrf_token')
+        ignore.extend(self.PAGING_PARAMS)
         filtered_items = []
         if hasattr(self.request.params, 'dict_of_lists'):
             filter_params = self.request.params.dict_of_lists()
@@ -692,6 +1016,8 @@ class LandingPageView(BaseView):
                     del filter_params[skip]
             if not filter_params:
                 return items
+            # Match against sets of param values so filtering stays linear in the number of items
+            filter_value_sets = dict((key, set(value)) for key, value in filter_params.items())
             for item in items:
                 matchedkey_count = 0
                 for filter_key, filter_value in filter_params.items():
@@ -704,10 +1030,11 @@ class LandingPageView(BaseView):
                             if filterkey_val:
                                 if isinstance(filterkey_val, list):
                                     for fitem in filterkey_val:
-                                        if fitem in filter_value:
+                                        if self._is_filter_match_(fitem, filter_value, filter_value_sets[filter_key]):
                                             matchedkey_count += 1
                                 else:
-                                    if filterkey_val in filter_value:
+                                    if self._is_filter_match_(
+                                            filterkey_val, filter_value, filter_value_sets[filter_key]):
                                         matchedkey_count += 1
                             elif 'none' in filter_value or 'None' in filter_value:
                                 # Handle the special case where 'filterkey_val' value is None
@@ -719,6 +1046,13 @@ class LandingPageView(BaseView):
                     filtered_items.append(item)
         return filtered_items
 
+    @staticmethod
+    def _is_filter_match_(value, filter_value, filter_value_set):
+        try:
+            return value in filter_value_set
+        except TypeError:  # unhashable attribute value (e.g. a dict)
+            return value in filter_value
+
     def match_tags(self, item=None, tags=None, autoscale=False):
         for tag in tags:
             tag = self.unescape_braces(tag.strip())
@@ -732,6 +1066,107 @@ class LandingPageView(BaseView):
                     return True
         return False
 
+    def get_page_size(self):
+        """Page size for landing pages that support server-side paging (0 loads all items at once)"""
+        settings = self.request.registry.settings or {}
+        return int(settings.get('landingpage.page_size', 0))
+
+    def get_paged_results(self, results):
+        """Search, sort and page result dicts when the page_size param is passed, otherwise return all results.
+
+        Params (all optional except page_size):
+            page_size: number of results per page (capped at MAX_PAGE_SIZE)
+            page_token: next_page_token from the previous page
+            sort: key from the view's sort_keys, prefixed with '-' for a descending sort
+                (any other key falls back to the view's initial_sort_key)
+            search: text to match (case-insensitive) against the view's filter_keys props of each result
+
+        :returns: dict with results, plus total, page_size and next_page_token in paged mode
+            (see get_json_results() for the unpaged response)
+        """
+        params = self.request.params
+        if not params.get('page_size'):
+            return self.get_json_results(results)
+        results = list(results)
+        try:
+            page_size = min(int(params.get('page_size')), self.MAX_PAGE_SIZE)
+        except ValueError:
+            page_size = 0
+        if page_size < 1:
+            raise JSONError(status=400, message=_(u'Invalid page size'))
+        sort_key = params.get('sort', '')
+        if sort_key.lstrip('-') not in [sort['key'].lstrip('-') for sort in self.sort_keys]:
+            sort_key = self.initial_sort_key
+        search = params.get('search', '').strip().lower()
+        if search:
+            results = self.search_results(results, search, self.filter_keys)
+        if sort_key:
+            results = self.sort_results(results, sort_key)
+        offset = self.decode_page_token(params.get('page_token'), sort_key, search)
+        next_offset = offset + page_size
+        next_page_token = None
+        if next_offset < len(results):
+            next_page_token = self.encode_page_token(next_offset, sort_key, search)
+        return dict(
+            results=results[offset:next_offset],
+            total=len(results),
+            page_size=page_size,
+            next_page_token=next_page_token,
+        )
+
+    @staticmethod
+    def search_results(results, search, filter_keys):
+        """Text search matching the client-side searchFilterItems() in landingpage.js"""
+        def get_search_text(value):
+            if isinstance(value, basestring):
+                return value
+            if isinstance(value, dict):
+                value = value.values()
+            if isinstance(value, (list, tuple)):
+                names = []
+                for item in value:
+                    if isinstance(item, dict):
+                        names.extend([item.get('name') or '', item.get('res_name') or ''])
+                return u' '.join(names)
+            return u''
+
+        matched = []
+        for result in results:
+            for key in filter_keys:
+                if search in get_search_text(result.get(key)).lower():
+                    matched.append(result)
+                    break
+        return matched
+
+    @staticmethod
+    def sort_results(results, sort_key):
+        reverse = sort_key.startswith('-')
+        key = sort_key.lstrip('-')
+
+        def get_sort_value(result):
+            value = result.get(key)
+            return value.lower() if isinstance(value, basestring) else value
+
+        return sorted(results, key=get_sort_value, reverse=reverse)
+
+    @staticmethod
+    def encode_page_token(offset, sort_key, search):
+        token = json.dumps(dict(offset=offset, sort=sort_key, search=search))
+        return base64.urlsafe_b64encode(token)
+
+    @staticmethod
+    def decode_page_token(page_token, sort_key, search):
+        """Return the offset for a page token, which is only valid for the sort and search it was issued with"""
+        if not page_token:
+            return 0
+        try:
+            token = json.loads(base64.urlsafe_b64decode(str(page_token)))
+            if token.get('sort') == sort_key and token.get('search') == search:
+                return max(int(token.get('offset')), 0)
+        except (TypeError, ValueError, AttributeError):
+            pass
+        raise JSONError(status=400, message=_(u'Invalid page token'))
+
     def get_json_endpoint(self, route, path=False):
         return self.request.route_path(route) if path is False else route
 
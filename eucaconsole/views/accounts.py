@@ -109,37 +109,49 @@ class AccountsJsonView(BaseView):
     def accounts_json(self):
         # TODO: take filters into account??
         accounts = []
-        for account in self.get_items():
-            policies = []
-            try:
-                policies = self.conn.get_response(
-                    'ListAccountPolicies',
-                    params={'AccountName': account.account_name}, list_marker='PolicyNames')
-                policies = policies.policy_names
-            except BotoServerError:
-                pass
+        items = self.get_items()
+        with boto_error_handler(self.request):
+            policy_names = self.get_cached_iam_lookups(
+                'account_policy_names', [account.account_name for account in items], self.fetch_account_policy_names)
+        for account in items:
             accounts.append(dict(
                 account_name=account.account_name,
                 account_id=account.account_id,
-                policy_count=len(policies),
+                policy_count=len(policy_names.get(account.account_name) or []),
             ))
         return dict(results=accounts)
 
+    def fetch_account_policy_names(self, account_name):
+        try:
+            policies = self.conn.get_response(
+                'ListAccountPolicies', params={'AccountName': account_name}, list_marker='PolicyNames')
+            return policies.policy_names
+        except BotoServerError:
+            return None
+
     @view_config(route_name='account_summary_json', renderer='json', request_method='GET')
     def account_summary_json(self):
         name = self.request.matchdict.get('name')
         with boto_error_handler(self.request):
-            users = self.conn.get_response('ListUsers', params={'DelegateAccount': name}, list_marker='Users')
-            groups = self.conn.get_response('ListGroups', params={'DelegateAccount': name}, list_marker='Groups')
-            roles = self.conn.get_response('ListRoles', params={'DelegateAccount': name}, list_marker='Roles')
-            return dict(
-                results=dict(
-                    account_name=name,
-                    user_count=len(users.list_users_response.list_users_result.users),
-                    group_count=len(groups.list_groups_response.list_groups_result.groups),
-                    role_count=len(roles.list_roles_response.list_roles_result.roles),
-                )
-            )
+            summary = self.get_cached_iam_lookups('account_summary', [name], self.fetch_account_summary).get(name)
+        if summary is None:
+            return JSONResponse(status=504, message=_(u"Timed out fetching the account summary"))
+        return dict(results=summary)
+
+    def fetch_account_summary(self, name):
+        """Count the account's users, groups and roles, listing them concurrently"""
+        params = {'DelegateAccount': name}
+        calls = self.get_parallel_calls()
+        calls.add('users', self.conn.get_response, 'ListUsers', params=params, list_marker='Users')
+        calls.add('groups', self.conn.get_response, 'ListGroups', params=params, list_marker='Groups')
+        calls.add('roles', self.conn.get_response, 'ListRoles', params=params, list_marker='Roles')
+        results = calls.run()
+        return dict(
+            account_name=name,
+            user_count=len(results['users'].list_users_response.list_users_result.users),
+            group_count=len(results['groups'].list_groups_response.list_groups_result.groups),
+            role_count=len(results['roles'].list_roles_response.list_roles_result.roles),
+        )
 
     def get_items(self):
         with boto_error_handler(self.request):
@@ -370,6 +382,7 @@ class AccountView(BaseView):
             result = self.conn.get_response('PutAccountPolicy',
                                             params={'AccountName': self.account.account_name, 'PolicyName': policy,
                                                     'PolicyDocument': policy_text}, verb='POST')
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully updated account policy"), results=result)
 
     @view_config(route_name='account_delete_policy', request_method='POST', renderer='json')
@@ -383,5 +396,6 @@ class AccountView(BaseView):
             result = self.conn.get_response('DeleteAccountPolicy',
                                             params={'AccountName': self.account.account_name, 'PolicyName': policy},
                                             verb='POST')
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully deleted account policy"), results=result)
 
@@ -315,6 +315,7 @@ class CloudWatchAlarmsView(LandingPageView):
                     description=description, dimensions=dimensions
                 )
                 self.cloudwatch_conn.put_metric_alarm(alarm)
+                self.invalidate_alarm_status_index()
                 prefix = _(u'Successfully created alarm')
                 msg = u'{0} {1}'.format(prefix, alarm.name)
             if self.request.is_xhr:
@@ -370,6 +371,7 @@ class CloudWatchAlarmsView(LandingPageView):
         with boto_error_handler(self.request):
             self.log_request(_(u'Updating alarm {0}').format(alarm.get('name')))
             action = self.cloudwatch_conn.put_metric_alarm(metric_alarm)
+            self.invalidate_alarm_status_index()
 
             if action:
                 if update:
@@ -403,6 +405,7 @@ class CloudWatchAlarmsView(LandingPageView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Deleting alarm(s) {0}").format(alarms))
             action = self.cloudwatch_conn.delete_alarms(alarms)
+            self.invalidate_alarm_status_index()
 
             if action:
                 prefix = _(u'Successfully deleted alarm(s)')
@@ -29,13 +29,15 @@ Pyramid views for Eucalyptus Object Store and AWS S3 Buckets
 
 """
 from datetime import datetime
+import itertools
+import logging
 import mimetypes
+import pylibmc
 import simplejson as json
 import urllib
 
 from boto.exception import StorageCreateError, S3ResponseError
 from boto.s3.acl import ACL, Grant, Policy
-from boto.s3.bucket import Bucket
 from boto.s3.key import Key
 from boto.s3.prefix import Prefix
 from boto.exception import BotoServerError
@@ -46,6 +48,8 @@ from pyramid.httpexceptions import HTTPNotFound, HTTPFound, HTTPBadRequest
 from pyramid.settings import asbool
 from pyramid.view import view_config
 
+from ..caches import short_term
+from ..caches import objects_count_cache
 from ..constants.buckets import CORS_XML_RELAXNG_SCHEMA, SAMPLE_CORS_CONFIGURATION
 from ..forms.buckets import (
     BucketDetailsForm, BucketItemDetailsForm, SharingPanelForm, BucketUpdateVersioningForm,
@@ -53,12 +57,15 @@ from ..forms.buckets import (
     BucketItemSharedURLForm, CorsConfigurationForm, CorsDeletionForm)
 from ..i18n import _
 from ..models import Notification
-from ..views import BaseView, LandingPageView, JSONResponse
+from ..parallel import BatchOperation
+from ..views import BaseView, LandingPageView, JSONError, JSONResponse
 from . import boto_error_handler
 from .. import utils
 
 
 DELIMITER = '/'
+BATCH_MAX_WORKERS = 8  # Concurrent S3 requests for bulk copy and ACL propagation
+OBJECTS_COUNT_CAP = 10000  # Bucket object/version counts stop at this many and are reported as "N+"
 BUCKET_ITEM_URL_EXPIRES = 300  # Link to item expires in ___ seconds (after page load)
 BUCKET_NAME_PATTERN = '^[a-z0-9-\.]+$'
 FOLDER_NAME_PATTERN = '^[^\/]+$'
@@ -86,6 +93,12 @@ class BucketMixin(object):
             subpath = path.split('/')
         return tuple(subpath)
 
+    @staticmethod
+    def get_batch_workers(request):
+        """Number of concurrent S3 requests used by bulk copy and ACL propagation"""
+        settings = request.registry.settings or {}
+        return int(settings.get('buckets.batch.max_workers', BATCH_MAX_WORKERS))
+
 
 class BucketsView(LandingPageView):
     """Views for Buckets landing page"""
@@ -151,6 +164,7 @@ class BucketsView(LandingPageView):
             'copy_object_url': self.request.route_path('bucket_put_item', name='_name_', subpath='_subpath_'),
             'get_keys_generic_url': self.request.route_path('bucket_keys', name='_name_', subpath='_subpath_'),
             'put_keys_url': self.request.route_path('bucket_put_items', name='_name_', subpath='_subpath_'),
+            'job_status_json_url': self.request.route_path('job_status_json', id='_id_'),
             'upload_url': self.request.route_path('bucket_upload', name='_name_', subpath=''),
             'contents_url': self.request.route_path('bucket_contents', name='_name_', subpath=''),
             'bucket_item_url': self.request.route_path('bucket_item_url', name='_name_', subpath='_subpath_'),
@@ -185,16 +199,66 @@ class BucketsJsonView(BaseView):
         with boto_error_handler(self.request):
             bucket = BucketContentsView.get_bucket(self.request, self.s3_conn) if self.s3_conn else []
             versioning_status = BucketDetailsView.get_versioning_status(bucket)
-            versions = []
-            if versioning_status != "Disabled":
-                versions = bucket.get_all_versions()
-        results = dict(
-            object_count=len(tuple(bucket.list())),
-            version_count=len(versions),
-            versioning_status=versioning_status
-        )
+            counts = self.get_objects_count(bucket, versioning_status)
+        results = dict(versioning_status=versioning_status)
+        results.update(counts)
         return dict(results=results)
 
+    def get_objects_count(self, bucket, versioning_status):
+        """Object and version counts for a bucket, cached per user in the short_term region"""
+        cap = self.get_objects_count_cap()
+
+        def creator():
+            object_count, object_count_capped = self.count_keys(bucket.list(), cap)
+            version_count, version_count_capped = 0, False
+            if versioning_status != "Disabled":
+                version_count, version_count_capped = self.count_keys(bucket.list_versions(), cap)
+            return dict(
+                object_count=object_count,
+                object_count_capped=object_count_capped,
+                version_count=version_count,
+                version_count_capped=version_count_capped,
+            )
+
+        if not short_term.is_configured:
+            return creator()
+        try:
+            scope = self.objects_count_scope(self.request, bucket.name)
+            cache_key = objects_count_cache.make_key('bucket_objects_count', scope, self._get_cache_identity_())
+            return short_term.get_or_create(cache_key, creator)
+        except pylibmc.Error:
+            return creator()
+
+    def get_objects_count_cap(self):
+        settings = self.request.registry.settings or {}
+        return int(settings.get('buckets.objects_count.cap', OBJECTS_COUNT_CAP))
+
+    @staticmethod
+    def count_keys(keys, cap):
+        """Count a lazily paged key (or version) listing without keeping the keys, stopping after cap keys
+
+        :returns: tuple of (count, capped), where capped is True if there are more than cap keys
+        """
+        count = sum(1 for key in itertools.islice(keys, cap + 1))
+        if count > cap:
+            return cap, True
+        return count, False
+
+    @staticmethod
+    def objects_count_scope(request, bucket_name):
+        return BaseView.get_cache_account(request), bucket_name
+
+    @staticmethod
+    def invalidate_objects_count(request, bucket_name):
+        """Drop the objects count cached for every user of the account after adding or deleting a bucket's objects"""
+        BucketsJsonView.invalidate_objects_count_scope(BucketsJsonView.objects_count_scope(request, bucket_name))
+
+    @staticmethod
+    def invalidate_objects_count_scope(scope):
+        """Same as invalidate_objects_count(), for background jobs that have no request"""
+        if short_term.is_configured:
+            objects_count_cache.invalidate(*scope)
+
     def get_items(self):
         return self.s3_conn.get_all_buckets() if self.s3_conn else []
 
@@ -227,6 +291,7 @@ class BucketXHRView(BaseView, BucketMixin):
         self.log_request(u"Deleting keys from {0} : {1}".format(self.bucket_name, deleted_keys))
         with boto_error_handler(self.request):
             result = bucket.delete_keys(keys.split(','))
+            BucketsJsonView.invalidate_objects_count(self.request, self.bucket_name)
             if result.errors:
                 msg = _(u"Some key(s) couldn't be deleted. ") + \
                     ','.join([err.key + '(' + err.message + ')' for err in result.errors])
@@ -251,26 +316,46 @@ class BucketXHRView(BaseView, BucketMixin):
         subpath = self.request.subpath
         src_bucket = self.request.params.get('src_bucket')
         folder_loc = self.request.params.get('folder_loc')
-        with boto_error_handler(self.request):
-            self.log_request(u"Copying key(s) from {0} to {1} : {2}".format(
-                src_bucket, self.bucket_name + '/' + '/'.join(subpath), keys))
-            bucket = self.s3_conn.get_bucket(self.bucket_name, validate=False)
-            errors = []
-            for k in keys.split(','):
-                dest_key = '/'.join(subpath + (k[len(folder_loc):],))
-                try:
-                    bucket.copy_key(
-                        new_key_name=dest_key,
-                        src_bucket_name=src_bucket,
-                        src_key_name=k
-                    )
-                except BotoServerError as err:
-                    self.log_request("Couldn't copy " + k + ":" + err.message)
-                    errors.append(k)
-            if len(errors) == 0:
-                return dict(message=_(u"Successfully copied object(s)."))
-            else:
-                return dict(message=_(u"Failed to copy all keys."), errors=errors)
+        self.log_request(u"Copying key(s) from {0} to {1} : {2}".format(
+            src_bucket, self.bucket_name + '/' + '/'.join(subpath), keys))
+        # Copies run in the background; the page polls job_status_json for progress and failed keys
+        job_id = self.submit_job(
+            _(u'Copy objects to {0}').format(self.bucket_name), self.copy_keys, self.s3_conn, self.bucket_name,
+            src_bucket, keys.split(','), subpath, folder_loc, self.get_batch_workers(self.request),
+            BucketsJsonView.objects_count_scope(self.request, self.bucket_name))
+        return dict(job_id=job_id)
+
+    @staticmethod
+    def copy_keys(job, s3_conn, bucket_name, src_bucket, keys, subpath, folder_loc, max_workers, count_scope=None):
+        """Background job copying keys into bucket, reporting the keys that couldn't be copied in its result"""
+        bucket = s3_conn.get_bucket(bucket_name, validate=False)
+
+        def copy_key(k):
+            dest_key = '/'.join(subpath + (k[len(folder_loc):],))
+            bucket.copy_key(
+                new_key_name=dest_key,
+                src_bucket_name=src_bucket,
+                src_key_name=k
+            )
+
+        job.set_progress(0, len(keys))
+        batch = BatchOperation(
+            copy_key, max_workers=max_workers,
+            on_progress=lambda completed, failed: job.set_progress(completed), progress_interval=10)
+        batch.run(keys)
+        if count_scope is not None:
+            BucketsJsonView.invalidate_objects_count_scope(count_scope)
+        errors = []
+        for k, err in batch.errors:
+            if not isinstance(err, BotoServerError):
+                raise err
+            logging.info(u"Couldn't copy {0}: {1}".format(k, err.message))
+            errors.append(k)
+        if len(errors) == 0:
+            job.update(message=_(u"Successfully copied object(s)."))
+        else:
+            job.update(message=_(u"Failed to copy all keys."))
+        return dict(errors=errors)
 
     # TODO thinking this method can go away in favor of the other one above.
     @view_config(route_name='bucket_put_item', renderer='json', request_method='POST', xhr=True)
@@ -290,6 +375,7 @@ class BucketXHRView(BaseView, BucketMixin):
                 src_bucket_name=src_bucket,
                 src_key_name=src_key
             )
+            BucketsJsonView.invalidate_objects_count(self.request, self.bucket_name)
             return dict(message=_(u"Successfully copied object."))
 
     @view_config(route_name='bucket_item_make_public', renderer='json', request_method='POST', xhr=True)
@@ -339,8 +425,14 @@ class BucketContentsView(LandingPageView, BucketMixin):
             versioning_form=BucketUpdateVersioningForm(request, formdata=self.request.params or None),
             delete_form=BucketDeleteForm(request),
             create_folder_form=self.create_folder_form,
+            page_size=self.get_contents_page_size(),
         )
 
+    def get_contents_page_size(self):
+        """Number of keys the contents page lists per request as the user scrolls (0 lists all keys at once)"""
+        settings = self.request.registry.settings or {}
+        return int(settings.get('buckets.contents.page_size', 0))
+
     @view_config(route_name='bucket_contents', renderer=VIEW_TEMPLATE)
     def bucket_contents(self):
         # sort_keys are passed to sorting drop-down
@@ -457,6 +549,7 @@ class BucketContentsView(LandingPageView, BucketMixin):
                 bucket_item.set_metadata('Content-Type', upload_file.type)
                 headers = {'Content-Type': upload_file.type}
                 bucket_item.set_contents_from_file(fp=upload_file.file, headers=headers, replace=True)
+                BucketsJsonView.invalidate_objects_count(self.request, bucket_name)
                 BucketDetailsView.update_acl(self.request, bucket_object=bucket_item)
                 metadata_param = self.request.params.get('metadata') or '{}'
                 metadata = json.loads(metadata_param)
@@ -471,7 +564,6 @@ class BucketContentsView(LandingPageView, BucketMixin):
                     # The only way to update the metadata appears to be to copy the object
                     bucket_item.copy(
                         bucket_name, bucket_item.name, metadata=bucket_item.metadata, preserve_acl=True)
-
             return dict(results=True)
 
     @view_config(route_name='bucket_sign_req', renderer='json', request_method='POST', xhr=True)
@@ -514,6 +606,7 @@ class BucketContentsView(LandingPageView, BucketMixin):
                 bucket = self.get_bucket(self.request, self.s3_conn, bucket_name=self.bucket_name)
                 new_folder = bucket.new_key(new_folder_key)
                 new_folder.set_contents_from_string('')
+                BucketsJsonView.invalidate_objects_count(self.request, self.bucket_name)
                 msg = u'{0} {1}'.format(_(u'Successfully added folder'), folder_name)
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             return HTTPFound(location=location)
@@ -530,6 +623,7 @@ class BucketContentsView(LandingPageView, BucketMixin):
             'copy_object_url': self.request.route_path('bucket_put_item', name='_name_', subpath='_subpath_'),
             'get_keys_generic_url': self.request.route_path('bucket_keys', name='_name_', subpath='_subpath_'),
             'put_keys_url': self.request.route_path('bucket_put_items', name=self.bucket_name, subpath='_subpath_'),
+            'job_status_json_url': self.request.route_path('job_status_json', id='_id_'),
             'make_object_public_url': self.request.route_path(
                 'bucket_item_make_public', name=self.bucket_name, subpath='_subpath_'),
         }))
@@ -597,6 +691,8 @@ class BucketContentsView(LandingPageView, BucketMixin):
 
 
 class BucketContentsJsonView(BaseView, BucketMixin):
+    MAX_KEYS = 1000  # Most keys S3 returns in a single listing request
+
     def __init__(self, request, bucket=None, **kwargs):
         super(BucketContentsJsonView, self).__init__(request, **kwargs)
         self.bucket = bucket
@@ -612,55 +708,101 @@ class BucketContentsJsonView(BaseView, BucketMixin):
     def bucket_contents_json(self):
         if not(self.is_csrf_valid()):
             return JSONResponse(status=400, message="missing CSRF token")
-        items = []
         list_prefix = u'{0}/'.format(DELIMITER.join(self.subpath)) if self.subpath else ''
         params = dict(delimiter=DELIMITER)
         if list_prefix:
             params.update(dict(prefix=list_prefix))
+        page_size = self.get_page_size_param()
+        if page_size:
+            keys, next_page_token = self.get_keys_page(page_size, **params)
+            return dict(
+                results=[self.get_item_dict(key) for key in keys if not self.skip_item(key)],
+                page_size=page_size,
+                next_page_token=next_page_token,
+            )
         bucket_items = self.bucket.list(**params)
 
-        for key in bucket_items:
-            if self.skip_item(key):
-                continue
-            if isinstance(key, Prefix):  # Is folder
-                item = dict(
-                    size=0,
-                    is_folder=True,
-                    last_modified=None,
-                    icon='fi-folder',
-                    download_url='',
-                )
-            else:  # Is not folder
-                item = dict(
-                    size=key.size,
-                    is_folder=False,
-                    last_modified=key.last_modified,
-                    icon=BucketContentsView.get_icon_class(key.name),
-                    download_url=BucketContentsView.get_item_download_url(key),
-                )
-            item.update(dict(
-                name=BucketContentsView.get_unprefixed_key_name(key.name),
-                full_key_name=key.name,
-                absolute_path=self.get_absolute_path(key.name),
-                details_url=self.request.route_path('bucket_item_details', name=self.bucket.name, subpath=key.name),
-            ))
-            items.append(item)
-        return dict(results=items)
+        # bucket.list() fetches keys from S3 a page at a time as the response is streamed
+        def iter_items():
+            for key in bucket_items:
+                if self.skip_item(key):
+                    continue
+                yield self.get_item_dict(key)
+
+        return self.get_json_results(iter_items())
 
     @view_config(route_name='bucket_keys', renderer='json', request_method='POST', xhr=True)
     def bucket_keys_json(self):
         if not(self.is_csrf_valid()):
             return JSONResponse(status=400, message="missing CSRF token")
-        items = []
         list_prefix = u'{0}/'.format(DELIMITER.join(self.subpath)) if len(self.subpath) > 0 else ''
         params = dict()
         if list_prefix:
             params.update(dict(prefix=list_prefix))
+        page_size = self.get_page_size_param()
+        if page_size:
+            keys, next_page_token = self.get_keys_page(page_size, **params)
+            return dict(results=[key.name for key in keys], page_size=page_size, next_page_token=next_page_token)
         bucket_items = self.bucket.list(**params)
+        return self.get_json_results(key.name for key in bucket_items)
 
-        for key in bucket_items:
-            items.append(key.name)
-        return dict(results=items)
+    def get_page_size_param(self):
+        """Return the page_size request param (capped at MAX_PAGE_SIZE), or 0 to list all keys"""
+        page_size = self.request.params.get('page_size')
+        if not page_size:
+            return 0
+        try:
+            page_size = min(int(page_size), LandingPageView.MAX_PAGE_SIZE)
+        except ValueError:
+            page_size = 0
+        if page_size < 1:
+            raise JSONError(status=400, message=_(u'Invalid page size'))
+        return page_size
+
+    def get_keys_page(self, page_size, **params):
+        """List up to page_size keys following the marker passed as the page_token request param.
+
+        S3 returns at most MAX_KEYS keys per request, so larger pages take more than one request.
+        The next page token is the marker to continue listing from, or None after the last key.
+        """
+        keys = []
+        marker = self.request.params.get('page_token', '')
+        with boto_error_handler(self.request):
+            while True:
+                max_keys = min(page_size - len(keys), self.MAX_KEYS)
+                result_set = self.bucket.get_all_keys(marker=marker, max_keys=max_keys, **params)
+                keys.extend(result_set)
+                if not result_set.is_truncated or len(result_set) == 0:
+                    return keys, None
+                # NextMarker is only returned when listing with a delimiter
+                marker = result_set.next_marker or result_set[-1].name
+                if len(keys) >= page_size:
+                    return keys, marker
+
+    def get_item_dict(self, key):
+        if isinstance(key, Prefix):  # Is folder
+            item = dict(
+                size=0,
+                is_folder=True,
+                last_modified=None,
+                icon='fi-folder',
+                download_url='',
+            )
+        else:  # Is not folder
+            item = dict(
+                size=key.size,
+                is_folder=False,
+                last_modified=key.last_modified,
+                icon=BucketContentsView.get_icon_class(key.name),
+                download_url=BucketContentsView.get_item_download_url(key),
+            )
+        item.update(dict(
+            name=BucketContentsView.get_unprefixed_key_name(key.name),
+            full_key_name=key.name,
+            absolute_path=self.get_absolute_path(key.name),
+            details_url=self.request.route_path('bucket_item_details', name=self.bucket.name, subpath=key.name),
+        ))
+        return item
 
     def get_absolute_path(self, key_name):
         key_name = urllib.quote(key_name.encode('utf-8'), '')
@@ -743,9 +885,18 @@ class BucketDetailsView(BaseView, BucketMixin):
             location = self.request.route_path('bucket_details', name=self.bucket.name)
             with boto_error_handler(self.request, location):
                 self.log_request(u"Modifying bucket {0} acl".format(self.bucket.name))
-                self.update_acl(self.request, bucket_object=self.bucket)
-                msg = u'{0} {1}'.format(_(u'Successfully modified bucket'), self.bucket.name)
-                self.request.session.flash(msg, queue=Notification.SUCCESS)
+                sharing_acl = self.update_acl(self.request, bucket_object=self.bucket)
+                if sharing_acl and self.request.params.get('propagate_acls') == 'y':
+                    # Setting the ACL on every key can take a while for large buckets, so do it in the background
+                    job_id = self.submit_job(
+                        _(u'Update sharing for objects in bucket {0}').format(self.bucket.name), self.propagate_acl,
+                        self.s3_conn, self.bucket.name, sharing_acl, self.get_batch_workers(self.request))
+                    self.track_job(job_id)
+                    msg = _(u'Modified bucket {0}.  Sharing for its objects is being updated.').format(self.bucket.name)
+                    self.request.session.flash(msg, queue=Notification.INFO)
+                else:
+                    msg = u'{0} {1}'.format(_(u'Successfully modified bucket'), self.bucket.name)
+                    self.request.session.flash(msg, queue=Notification.SUCCESS)
             return HTTPFound(location=location)
         else:
             self.request.error_messages = self.details_form.get_errors_list()
@@ -818,18 +969,35 @@ class BucketDetailsView(BaseView, BucketMixin):
 
     @staticmethod
     def update_acl(request, bucket_object=None):
-        is_bucket = isinstance(bucket_object, Bucket)
-        propagate_acls = request.params.get('propagate_acls') == 'y'
+        """Save the sharing panel ACL, returning it (or None when there was nothing to save)"""
         # Save manually entered ACLs
         sharing_acl = BucketDetailsView.get_sharing_acl(
             request, bucket_object=bucket_object, item_acl=bucket_object.get_acl())
         if sharing_acl:
             bucket_object.set_acl(sharing_acl)
-            if is_bucket and propagate_acls:
-                bucket_keys = bucket_object.get_all_keys()
-                # Set manual ACL recursively
-                for key in bucket_keys:
-                    key.set_acl(sharing_acl)
+        return sharing_acl
+
+    @staticmethod
+    def propagate_acl(job, s3_conn, bucket_name, sharing_acl, max_workers):
+        """Background job setting the bucket's ACL on each of its keys, reporting the keys it couldn't update"""
+        bucket = s3_conn.get_bucket(bucket_name, validate=False)
+        job.set_progress(0)
+        batch = BatchOperation(
+            lambda key: key.set_acl(sharing_acl), max_workers=max_workers,
+            on_progress=lambda completed, failed: job.set_progress(completed), progress_interval=100)
+        batch.run(bucket.list())
+        errors = []
+        for key, err in batch.errors:
+            if not isinstance(err, BotoServerError):
+                raise err
+            logging.info(u"Couldn't set ACL on {0}: {1}".format(key.name, err.message))
+            errors.append(key.name)
+        if errors:
+            job.update(message=_(u'Could not update sharing for {0} object(s) in bucket {1}: {2}').format(
+                len(errors), bucket_name, ', '.join(errors[:10])))
+        else:
+            job.update(message=_(u'Successfully updated sharing for objects in bucket {0}').format(bucket_name))
+        return dict(errors=errors)
 
     @staticmethod
     def get_sharing_acl(request, bucket_object=None, item_acl=None):
@@ -28,16 +28,23 @@
 Pyramid views for Dashboard
 
 """
+import logging
 import simplejson as json
+import threading
 
+from dogpile.cache.api import NO_VALUE
 from pyramid.httpexceptions import HTTPFound
 from pyramid.security import forget
 from pyramid.view import view_config
 from boto.exception import BotoServerError
 
+from ..caches import short_term
+from ..caches import euca_key_generator, cache_get_multi, cache_set_multi
 from ..forms import ChoicesManager
 from . import BaseView
 from ..i18n import _
+from ..models.auth import ConnectionManager
+from ..parallel import ParallelCalls, DEFAULT_TIMEOUT
 from . import boto_error_handler
 from .. import utils
 
@@ -61,6 +68,51 @@ TILE_MASTER_LIST = [
     ('roles', _(u'Roles'))
 ]
 
+# Maps each tile to the count query that supplies its data (several tiles can share a query)
+DASHBOARD_TILE_QUERIES = {
+    'instances-running': 'instances',
+    'instances-stopped': 'instances',
+    'scaling-groups': 'instances',
+    'stacks': 'stacks',
+    'elastic-ips': 'eips',
+    'security-groups': 'securitygroups',
+    'key-pairs': 'keypairs',
+    'load-balancers': 'loadbalancers',
+    'volumes': 'volumes',
+    'snapshots': 'snapshots',
+    'buckets': 'buckets',
+    'accounts': 'accounts',
+    'users': 'users',
+    'groups': 'groups',
+    'roles': 'roles',
+}
+
+# Connection type each count query runs on
+DASHBOARD_QUERY_CONNECTIONS = {
+    'instances': 'ec2',
+    'volumes': 'ec2',
+    'snapshots': 'ec2',
+    'securitygroups': 'ec2',
+    'keypairs': 'ec2',
+    'eips': 'ec2',
+    'buckets': 's3',
+    'loadbalancers': 'elb',
+    'stacks': 'cloudformation',
+    'accounts': 'iam',
+    'users': 'iam',
+    'groups': 'iam',
+    'roles': 'iam',
+}
+
+DASHBOARD_EMPTY_COUNTS = dict(
+    instance_total=0, instances_running=0, instances_stopped=0, instances_scaling=0, stacks=0, volumes=0,
+    snapshots=0, buckets=0, securitygroups=0, keypairs=0, loadbalancers=0, eips=0, accounts=0, users=0,
+    groups=0, roles=0,
+)
+
+# Default number of seconds to wait for a tile's count before returning it as pending
+DASHBOARD_TILE_TIMEOUT = 5
+
 
 class DashboardView(BaseView):
 
@@ -153,97 +205,249 @@ class DashboardView(BaseView):
 
 
 class DashboardJsonView(BaseView):
-    @view_config(route_name='dashboard_json', request_method='GET', renderer='json')
-    def dashboard_json(self):
-        ec2_conn = self.get_connection()
-        elb_conn = self.get_connection(conn_type='elb')
+    """Tile counts for the dashboard
 
-        # Fetch availability zone if set
+    Each count query runs concurrently with its own timeout.  Tiles whose query misses its deadline are
+    returned in the 'pending' list; the query keeps running and its count is cached in the short_term
+    region so that the client can re-poll just those tiles (via the 'tiles' param) and get it right away.
+    A query still running for an earlier poll isn't started again.  Without short_term there is nowhere
+    to pick a late count up from, so nothing is reported as pending and every query gets the
+    connection.parallel.timeout.
+
+    Count queries may outlive the request, so each runs on its own pooled connection rather than the request's.
+    """
+    # Cache keys (account, user, region, zone and query) of the count queries running in this process
+    _running_counts_ = set()
+    _running_counts_lock_ = threading.Lock()
+
+    def __init__(self, request):
+        super(DashboardJsonView, self).__init__(request)
         zone = self.request.params.get('zone')
-        filters = {}
-        if zone:
-            filters = {'availability-zone': zone}
+        self.filters = {'availability-zone': zone} if zone else {}
 
-        # Instances counts
-        instances_total_count = instances_running_count = instances_stopped_count = instances_scaling_count = 0
+    @view_config(route_name='dashboard_json', request_method='GET', renderer='json')
+    def dashboard_json(self):
+        repoll_tiles = self.request.params.get('tiles')
+        if repoll_tiles is not None:
+            tiles = repoll_tiles.split(',')
+        else:
+            # Get list of tiles so we can fetch only data for tiles the user is showing
+            tiles = self.request.cookies.get(u"{0}_dash_order".format(
+                self.request.session['account' if self.cloud_type == 'euca' else 'access_id']))
+            if tiles is None:
+                tiles = ','.join([tile for (tile, label) in TILE_MASTER_LIST])
+            tiles = tiles.replace('%2C', ',').split(',')
+        queries = self.get_tile_queries(tiles)
+        cache_keys = dict((query, self._count_cache_key_(query)) for query in queries)
+        can_repoll = short_term.is_configured
 
-        # Get list of tiles so we can fetch only data for tiles the user is showing
-        tiles = self.request.cookies.get(u"{0}_dash_order".format(
-            self.request.session['account' if self.cloud_type == 'euca' else 'access_id']))
-        if tiles is None:
-            tiles = ','.join([tile for (tile, label) in TILE_MASTER_LIST])
+        counts = {}
+        if repoll_tiles is None:
+            counts.update(DASHBOARD_EMPTY_COUNTS)
+        if repoll_tiles is not None:
+            cached_counts = cache_get_multi(short_term, [cache_keys[query] for query in queries])
+        else:
+            cached_counts = [NO_VALUE] * len(queries)
+        pending = []
+        calls = ParallelCalls(max_workers=max(1, len(queries)), timeout=self.get_tile_timeout())
         with boto_error_handler(self.request):
-            if ('instances-running' or 'instances-stopped' or 'scaling-groups') in tiles:
-                for instance in ec2_conn.get_only_instances(filters=filters):
-                    instances_total_count += 1
-                    if instance.tags.get('aws:autoscaling:groupName') and instance.state == u'running':
-                        instances_scaling_count += 1
-                    if instance.state == u'running':
-                        instances_running_count += 1
-                    elif instance.state == u'stopped':
-                        instances_stopped_count += 1
-
-            # Volume/snapshot counts
-            volumes_count = len(ec2_conn.get_all_volumes(filters=filters)) if 'volumes' in tiles else 0
-            snapshots_count = len(ec2_conn.get_all_snapshots(owner='self')) if 'snapshots' in tiles else 0
-            buckets_count = 0
             try:
-                s3_conn = self.get_connection(conn_type="s3")
-                buckets_count = len(s3_conn.get_all_buckets()) if 'buckets' in tiles else 0
-            except BotoServerError:
-                pass
+                for query, cached in zip(queries, cached_counts):
+                    if cached is not NO_VALUE:
+                        counts.update(cached)
+                    elif self.start_count(cache_keys[query]):
+                        self.add_count_call(calls, query, cache_keys[query], can_repoll)
+                    elif can_repoll:
+                        pending.append(query)  # still running for an earlier poll
+            except Exception:
+                self.cancel_count_calls(calls)
+                raise
+            if can_repoll:
+                timeouts = dict((query, self.get_tile_timeout(query)) for query in queries)
+            else:
+                timeouts = dict((query, self.get_count_timeout()) for query in queries)
+            results, errors, late = calls.run_partial(timeouts=timeouts)
+            for query in queries:
+                if query in errors:
+                    raise errors[query]
+        for query in queries:
+            if query in results:
+                counts.update(results[query])
+        if can_repoll:
+            pending.extend(late)
+        elif late:
+            logging.warn(u'Timed out counting {0} for the dashboard'.format(', '.join(late)))
+        counts.update(
+            pending=[tile for tile in tiles if DASHBOARD_TILE_QUERIES.get(tile) in pending],
+            health=dict(name=_(u'Compute'), status='up'),  # this determined client-side
+        )
+        return counts
 
-            # Security groups, key pairs, IP addresses
-            securitygroups_count = len(ec2_conn.get_all_security_groups()) if 'security-groups' in tiles else 0
-            keypairs_count = len(ec2_conn.get_all_key_pairs()) if 'key-pairs' in tiles else 0
-            elasticips_count = len(ec2_conn.get_all_addresses()) if 'elastic-ips' in tiles else 0
-            loadbalancers_count = len(elb_conn.get_all_load_balancers()) if 'load-balancers' in tiles else 0
-
-            # TODO: catch errors in this block and turn iam health off
-            # IAM counts
-            accounts_count = 0
-            users_count = 0
-            groups_count = 0
-            roles_count = 0
-            session = self.request.session
-            if session['cloud_type'] == 'euca':
-                iam_conn = self.get_connection(conn_type="iam")
-                if session['account_access']:
-                    accounts_count = len(iam_conn.get_response(
-                        'ListAccounts', params={}, list_marker='Accounts').accounts)
-                if session['user_access']:
-                    users_count = len(iam_conn.get_all_users().users) if 'users' in tiles else 0
-                if session['group_access']:
-                    groups_count = len(iam_conn.get_all_groups().groups) if 'groups' in tiles else 0
-                if session['role_access']:
-                    roles_count = len(iam_conn.list_roles().roles) if 'roles' in tiles else 0
-
-            stacks_count = 0
-            try:
-                cf_conn = self.get_connection(conn_type="cloudformation")
-                stacks_count = len(cf_conn.describe_stacks()) if 'stacks' in tiles else 0
-            except BotoServerError:
-                pass
+    def get_tile_queries(self, tiles):
+        """Returns the count queries needed for the tiles, skipping IAM queries the user can't run"""
+        session = self.request.session
+        iam_access = dict(
+            accounts=session.get('account_access'),
+            users=session.get('user_access'),
+            groups=session.get('group_access'),
+            roles=session.get('role_access'),
+        )
+        queries = []
+        for tile in tiles:
+            query = DASHBOARD_TILE_QUERIES.get(tile)
+            if query is None or query in queries:
+                continue
+            if query in iam_access and (self.cloud_type != 'euca' or not iam_access[query]):
+                continue
+            queries.append(query)
+        return queries
+
+    def add_count_call(self, calls, query, cache_key, cache_result):
+        """Queue a count query, checking out its connection here on the request thread"""
+        try:
+            conn = self.checkout_connection(DASHBOARD_QUERY_CONNECTIONS[query])
+        except Exception:
+            self.finish_count(cache_key)
+            raise
+        calls.add(query, self.run_count, query, conn, self.filters, cache_key, cache_result)
+
+    @classmethod
+    def cancel_count_calls(cls, calls):
+        """Undo add_count_call() for queries that won't be run after all"""
+        for name, func, args, kwargs in calls.calls:
+            query, conn, filters, cache_key, cache_result = args
+            ConnectionManager.return_connection(conn)
+            cls.finish_count(cache_key)
+
+    @classmethod
+    def run_count(cls, query, conn, filters, cache_key, cache_result):
+        """Run a count query on a worker thread, which may outlive the request, caching its result if asked to"""
+        try:
+            count = getattr(cls, 'count_{0}'.format(query))(conn, filters)
+            if cache_result:
+                cache_set_multi(short_term, {cache_key: count})
+            return count
+        finally:
+            ConnectionManager.return_connection(conn)
+            cls.finish_count(cache_key)
+
+    @classmethod
+    def start_count(cls, cache_key):
+        """Mark a count query as running, returning False if it already is"""
+        with cls._running_counts_lock_:
+            if cache_key in cls._running_counts_:
+                return False
+            cls._running_counts_.add(cache_key)
+            return True
+
+    @classmethod
+    def finish_count(cls, cache_key):
+        with cls._running_counts_lock_:
+            cls._running_counts_.discard(cache_key)
+
+    def get_count_timeout(self):
+        settings = self.request.registry.settings or {}
+        return float(settings.get('connection.parallel.timeout', DEFAULT_TIMEOUT))
+
+    def get_tile_timeout(self, query=None):
+        """Tile timeouts are set via dashboard.tile.timeout, or dashboard.tile.timeout.<query> for a single query"""
+        settings = self.request.registry.settings or {}
+        timeout = settings.get('dashboard.tile.timeout', DASHBOARD_TILE_TIMEOUT)
+        if query is not None:
+            timeout = settings.get('dashboard.tile.timeout.{0}'.format(query), timeout)
+        return float(timeout)
+
+    def _count_cache_key_(self, query):
+        acct = self.get_cache_account(self.request)
+        username = self.request.session.get('username', '')
+        zone = self.filters.get('availability-zone', '')
+        return euca_key_generator('dashboard_tiles', None)(None, acct, username, self.region, zone, query)
+
+    @staticmethod
+    def count_instances(conn, filters):
+        instances_total_count = instances_running_count = instances_stopped_count = instances_scaling_count = 0
+        for instance in conn.get_only_instances(filters=filters):
+            instances_total_count += 1
+            if instance.tags.get('aws:autoscaling:groupName') and instance.state == u'running':
+                instances_scaling_count += 1
+            if instance.state == u'running':
+                instances_running_count += 1
+            elif instance.state == u'stopped':
+                instances_stopped_count += 1
+        return dict(
+            instance_total=instances_total_count,
+            instances_running=instances_running_count,
+            instances_stopped=instances_stopped_count,
+            instances_scaling=instances_scaling_count,
+        )
+
+    @staticmethod
+    def count_volumes(conn, filters):
+        return dict(volumes=len(conn.get_all_volumes(filters=filters)))
+
+    @staticmethod
+    def count_snapshots(conn, filters):
+        return dict(snapshots=len(conn.get_all_snapshots(owner='self')))
+
+    @staticmethod
+    def count_buckets(s3_conn, filters):
+        buckets_count = 0
+        try:
+            buckets_count = len(s3_conn.get_all_buckets())
+        except BotoServerError:
+            pass
+        return dict(buckets=buckets_count)
+
+    @staticmethod
+    def count_securitygroups(conn, filters):
+        return dict(securitygroups=len(conn.get_all_security_groups()))
+
+    @staticmethod
+    def count_keypairs(conn, filters):
+        return dict(keypairs=len(conn.get_all_key_pairs()))
+
+    @staticmethod
+    def count_eips(conn, filters):
+        return dict(eips=len(conn.get_all_addresses()))
+
+    @staticmethod
+    def count_loadbalancers(elb_conn, filters):
+        return dict(loadbalancers=len(elb_conn.get_all_load_balancers()))
+
+    @staticmethod
+    def _count_iam_(name, list_entities):
+        """Count IAM entities, reporting 0 rather than failing the other tiles when IAM doesn't respond"""
+        try:
+            return {name: len(list_entities())}
+        except BotoServerError as err:
+            logging.warn(u'Unable to count IAM {0}: {1}'.format(name, err.message))
+            return {name: 0}
+
+    @classmethod
+    def count_accounts(cls, iam_conn, filters):
+        return cls._count_iam_('accounts', lambda: iam_conn.get_response(
+            'ListAccounts', params={}, list_marker='Accounts').accounts)
+
+    @classmethod
+    def count_users(cls, iam_conn, filters):
+        return cls._count_iam_('users', lambda: iam_conn.get_all_users().users)
+
+    @classmethod
+    def count_groups(cls, iam_conn, filters):
+        return cls._count_iam_('groups', lambda: iam_conn.get_all_groups().groups)
+
+    @classmethod
+    def count_roles(cls, iam_conn, filters):
+        return cls._count_iam_('roles', lambda: iam_conn.list_roles().roles)
 
-            return dict(
-                instance_total=instances_total_count,
-                instances_running=instances_running_count,
-                instances_stopped=instances_stopped_count,
-                instances_scaling=instances_scaling_count,
-                stacks=stacks_count,
-                volumes=volumes_count,
-                snapshots=snapshots_count,
-                buckets=buckets_count,
-                securitygroups=securitygroups_count,
-                keypairs=keypairs_count,
-                loadbalancers=loadbalancers_count,
-                eips=elasticips_count,
-                accounts=accounts_count,
-                users=users_count,
-                groups=groups_count,
-                roles=roles_count,
-                health=dict(name=_(u'Compute'), status='up'),  # this determined client-side
-            )
+    @staticmethod
+    def count_stacks(cf_conn, filters):
+        stacks_count = 0
+        try:
+            stacks_count = len(cf_conn.describe_stacks())
+        except BotoServerError:
+            pass
+        return dict(stacks=stacks_count)
 
     @view_config(route_name='service_status_json', request_method='GET', renderer='json')
     def service_status_json(self):
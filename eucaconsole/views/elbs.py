@@ -34,7 +34,6 @@ import re
 import simplejson as json
 import time
 
-from itertools import chain
 from urllib import quote
 
 import boto.utils
@@ -44,9 +43,13 @@ from boto.ec2.elb.attributes import ConnectionSettingAttribute, AccessLogAttribu
 from boto.exception import BotoServerError
 from boto.s3.acl import ACL, Grant, Policy
 
+from dogpile.cache.api import NO_VALUE
 from pyramid.httpexceptions import HTTPNotFound, HTTPFound
+from pyramid.settings import asbool
 from pyramid.view import view_config
 
+from ..caches import short_term
+from ..caches import euca_key_generator, cache_get_multi, cache_set_multi
 from ..constants.cloudwatch import (
     MONITORING_DURATION_CHOICES, GRANULARITY_CHOICES, DURATION_GRANULARITY_CHOICES_MAPPING,
     METRIC_TITLE_MAPPING,
@@ -62,8 +65,8 @@ from ..forms.elbs import (
     ELBInstancesForm, ELBInstancesFiltersForm, CertificateForm, BackendCertificateForm, SecurityPolicyForm,
 )
 from ..i18n import _
+from ..jobs import JobError, get_error_message
 from ..models import Notification
-from ..models.alarms import Alarm
 from ..views import LandingPageView, BaseView, TaggedItemView, JSONResponse
 from ..views.cloudwatchapi import CloudWatchAPIMixin
 from . import boto_error_handler
@@ -79,7 +82,7 @@ class ELBsView(LandingPageView):
         self.location = self.get_redirect_location('elbs')
         self.initial_sort_key = 'name'
         self.prefix = '/elbs'
-        self.filter_keys = ['name']
+        self.filter_keys = self.get_filter_keys()
         self.sort_keys = self.get_sort_keys()
         self.json_items_endpoint = self.get_json_endpoint('elbs_json')
         self.delete_form = ELBDeleteForm(self.request, formdata=self.request.params or None)
@@ -94,6 +97,7 @@ class ELBsView(LandingPageView):
             prefix=self.prefix,
             initial_sort_key=self.initial_sort_key,
             json_items_endpoint=self.json_items_endpoint,
+            health_json_endpoint=self.request.route_path('elbs_health_json'),
             delete_form=self.delete_form,
         )
 
@@ -121,6 +125,10 @@ class ELBsView(LandingPageView):
             self.request.error_messages = self.delete_form.get_errors_list()
         return self.render_dict
 
+    @staticmethod
+    def get_filter_keys():
+        return ['name']
+
     @staticmethod
     def get_sort_keys():
         return [
@@ -135,10 +143,73 @@ class ELBsView(LandingPageView):
         ]
 
 
-class ELBsJsonView(LandingPageView, CloudWatchAPIMixin):
+class ELBHealthMixin(CloudWatchAPIMixin):
+    """Health counts and average latency for ELBs (requires elb_conn and cw_conn)"""
+
+    def get_elbs_health(self, names):
+        """Health and latency for each ELB name, fetched concurrently and cached in the short_term region
+
+        :returns: dict of healthy_hosts, unhealthy_hosts and latency dicts keyed by ELB name
+        """
+        cache_keys = [self._health_cache_key_(name) for name in names]
+        health = {}
+        calls = self.get_parallel_calls()
+        for name, cached in zip(names, cache_get_multi(short_term, cache_keys)):
+            if cached is NO_VALUE:
+                calls.add(('health', name), self.get_elb_health_counts, name)
+                calls.add(('latency', name), self.get_average_latency, name)
+            else:
+                health[name] = cached
+        if not calls.calls:
+            return health
+        results = calls.run()
+        fetched = {}
+        for name, cache_key in zip(names, cache_keys):
+            if name in health:
+                continue
+            health_counts = results.get(('health', name))
+            fetched[cache_key] = health[name] = dict(
+                healthy_hosts=health_counts.get('healthy'),
+                unhealthy_hosts=health_counts.get('unhealthy'),
+                latency=results.get(('latency', name)),
+            )
+        cache_set_multi(short_term, fetched)
+        return health
+
+    def get_elb_health_counts(self, elb_name=None):
+        healthy_count = 0
+        unhealthy_count = 0
+        if elb_name:
+            instances = self.elb_conn.describe_instance_health(elb_name)
+            for instance in instances:
+                if instance.state == 'InService':
+                    healthy_count += 1
+                elif instance.state == 'OutOfService':
+                    unhealthy_count += 1
+        return dict(healthy=healthy_count, unhealthy=unhealthy_count)
+
+    def get_average_latency(self, elb_name=None, duration=21600):
+        """Get average latency for a given duration in milliseconds"""
+        period = self.modify_granularity(duration)
+        stats = self.get_cloudwatch_stats(
+            cw_conn=self.cw_conn, period=period, duration=duration, metric='Latency',
+            namespace='AWS/ELB', idtype='LoadBalancerName', ids=[elb_name])
+        if stats:
+            return sum(stat.get('Average') * 1000 for stat in stats) / len(stats)
+        return None
+
+    def _health_cache_key_(self, name):
+        return euca_key_generator('elb_health', None)(
+            None, self.get_cache_account(self.request), self.region, self._get_cache_identity_(), name)
+
+
+class ELBsJsonView(LandingPageView, ELBHealthMixin):
     """JSON response view for ELB landing page"""
     def __init__(self, request, elb_conn=None, cw_conn=None, **kwargs):
         super(ELBsJsonView, self).__init__(request, **kwargs)
+        self.filter_keys = ELBsView.get_filter_keys()
+        self.sort_keys = ELBsView.get_sort_keys()
+        self.initial_sort_key = 'name'
         self.elb_conn = elb_conn or self.get_connection(conn_type='elb')
         self.cw_conn = cw_conn or self.get_connection(conn_type='cloudwatch')
         with boto_error_handler(request):
@@ -156,31 +227,34 @@ class ELBsJsonView(LandingPageView, CloudWatchAPIMixin):
 
     @view_config(route_name='elbs_json', renderer='json', request_method='POST')
     def elbs_json(self):
+        """ELBs for the landing page grid
+
+        When health is deferred (via the elbs.health.deferred setting or defer_health param), items are
+        returned with health_pending set and the client fetches health and latency from elbs_health_json.
+        """
         if not(self.is_csrf_valid()):
             return JSONResponse(status=400, message="missing CSRF token")
-        # Get alarms for ELBs and build a list of resource ids to optimize alarm status fetch
-        alarms = [alarm for alarm in self.cw_conn.describe_alarms() if 'LoadBalancerName' in alarm.dimensions]
-        alarm_resource_ids = set(list(
-            chain.from_iterable([chain.from_iterable(alarm.dimensions.values()) for alarm in alarms])
-        ))
+        settings = self.request.registry.settings or {}
+        defer_health = asbool(self.request.params.get('defer_health', settings.get('elbs.health.deferred', False)))
         with boto_error_handler(self.request):
+            alarm_status_index = self.get_alarm_status_index(self.cw_conn)
+            health = {} if defer_health else self.get_elbs_health([elb.name for elb in self.items])
             elbs_array = []
             for elb in self.items:
-                alarm_status = ''
-                if elb.name in alarm_resource_ids:
-                    alarm_status = Alarm.get_resource_alarm_status(elb.name, alarms)
+                alarm_status = alarm_status_index.get_status(elb.name, 'LoadBalancerName')
                 name = elb.name
-                health_counts = self.get_elb_health_counts(elb)
+                elb_health = health.get(name, {})
                 elbs_array.append(dict(
                     dns_name=elb.dns_name,
                     name=name,
                     availability_zones=', '.join(sorted(elb.availability_zones)),
-                    healthy_hosts=health_counts.get('healthy'),
-                    unhealthy_hosts=health_counts.get('unhealthy'),
-                    latency=self.get_average_latency(elb),
+                    healthy_hosts=elb_health.get('healthy_hosts'),
+                    unhealthy_hosts=elb_health.get('unhealthy_hosts'),
+                    latency=elb_health.get('latency'),
+                    health_pending=defer_health,
                     alarm_status=alarm_status,
                 ))
-            return dict(results=elbs_array)
+            return self.get_paged_results(elbs_array)
 
     def get_items(self):
         return self.elb_conn.get_all_load_balancers() if self.elb_conn else []
@@ -193,27 +267,21 @@ class ELBsJsonView(LandingPageView, CloudWatchAPIMixin):
     def filter_by_vpc_subnet(items, subnet=None):
         return [item for item in items if subnet in item.subnets]
 
-    def get_elb_health_counts(self, elb=None):
-        healthy_count = 0
-        unhealthy_count = 0
-        if elb:
-            instances = self.elb_conn.describe_instance_health(elb.name)
-            for instance in instances:
-                if instance.state == 'InService':
-                    healthy_count += 1
-                elif instance.state == 'OutOfService':
-                    unhealthy_count += 1
-        return dict(healthy=healthy_count, unhealthy=unhealthy_count)
 
-    def get_average_latency(self, elb=None, duration=21600):
-        """Get average latency for a given duration in milliseconds"""
-        period = self.modify_granularity(duration)
-        stats = self.get_cloudwatch_stats(
-            cw_conn=self.cw_conn, period=period, duration=duration, metric='Latency',
-            namespace='AWS/ELB', idtype='LoadBalancerName', ids=[elb.name])
-        if stats:
-            return sum(stat.get('Average') * 1000 for stat in stats) / len(stats)
-        return None
+class ELBsHealthJsonView(BaseView, ELBHealthMixin):
+    """Health and latency for the ELBs listed on the landing page, fetched after the grid is displayed"""
+    def __init__(self, request, elb_conn=None, cw_conn=None, **kwargs):
+        super(ELBsHealthJsonView, self).__init__(request, **kwargs)
+        self.elb_conn = elb_conn or self.get_connection(conn_type='elb')
+        self.cw_conn = cw_conn or self.get_connection(conn_type='cloudwatch')
+
+    @view_config(route_name='elbs_health_json', renderer='json', request_method='POST')
+    def elbs_health_json(self):
+        if not(self.is_csrf_valid()):
+            return JSONResponse(status=400, message="missing CSRF token")
+        names = self.request.params.getall('names')
+        with boto_error_handler(self.request):
+            return dict(results=self.get_elbs_health(names))
 
 
 class LbTagSet(dict):
@@ -318,6 +386,17 @@ class BaseELBView(TaggedItemView):
         self.elb_conn.configure_health_check(name, health_check)
 
     def configure_access_logs(self, elb_name=None, elb=None):
+        config = self.get_access_log_config(elb=elb)
+        if config is not None:
+            elb_name = elb.name if elb is not None else elb_name
+            self.apply_access_log_config(self.elb_conn, self.s3_conn, elb_name, config)
+
+    def get_access_log_config(self, elb=None):
+        """Access log settings posted with the form, or None when they match the existing ELB's settings
+
+        :returns: dict of the AccessLogAttribute to set and, when logging is enabled, the bucket to prepare for it
+            (see apply_access_log_config)
+        """
         req_params = self.request.params
         params_logging_enabled = req_params.get('logging_enabled') == 'y'
         params_bucket_name = req_params.get('bucket_name')
@@ -333,48 +412,57 @@ class BaseELBView(TaggedItemView):
             ]
             if all(unchanged_conditions):
                 return None  # Skip if nothing has changed in the ELB's access log config
-        # Set Access Logs
-        elb_name = elb.name if elb is not None else elb_name
-        bucket_prefix = params_bucket_prefix
-        if params_logging_enabled:
-            self.configure_logging_bucket(bucket_name=params_bucket_name, bucket_prefix=bucket_prefix)
         new_access_log_config = AccessLogAttribute()
         new_access_log_config.enabled = params_logging_enabled
         new_access_log_config.s3_bucket_name = params_bucket_name
-        new_access_log_config.s3_bucket_prefix = bucket_prefix
+        new_access_log_config.s3_bucket_prefix = params_bucket_prefix
         new_access_log_config.emit_interval = params_collection_interval
-        self.elb_conn.modify_lb_attribute(elb_name, 'accessLog', new_access_log_config)
+        logging_bucket = None
+        if params_logging_enabled and params_bucket_name:
+            logging_bucket = dict(
+                name=params_bucket_name, prefix=params_bucket_prefix, grant_id=self.get_logging_grant_id())
+        return dict(access_log=new_access_log_config, logging_bucket=logging_bucket)
 
-    def configure_logging_bucket(self, bucket_name=None, bucket_prefix=None):
-        if bucket_name and bucket_prefix is not None and self.s3_conn:
-            existing_bucket_names = [bucket.name for bucket in self.s3_conn.get_all_buckets()]
-            if bucket_name in existing_bucket_names:
-                bucket = self.s3_conn.lookup(bucket_name, validate=False)
-            else:
-                self.log_request(u"Creating ELB access logs bucket {0}".format(bucket_name))
-                bucket = self.s3_conn.create_bucket(bucket_name)
-            # Create access logs folder
-            bucket_prefix_exists = bucket.get_key(u'{0}/'.format(bucket_prefix))
-            if not bucket_prefix_exists:
-                bucket_prefix = bucket_prefix.replace('/', '_')
-                bucket_prefix_key = u'{0}/'.format(bucket_prefix)
-                self.log_request(u"Creating ELB access logs folder {0} in bucket {1}".format(
-                    bucket_prefix_key, bucket_name))
-                new_folder = bucket.new_key(bucket_prefix_key)
-                new_folder.set_contents_from_string('')
-            self.configure_logging_bucket_acl(bucket)
-
-    def configure_logging_bucket_acl(self, bucket=None):
+    @staticmethod
+    def apply_access_log_config(elb_conn, s3_conn, elb_name, config):
+        logging_bucket = config.get('logging_bucket')
+        if logging_bucket and s3_conn:
+            BaseELBView.configure_logging_bucket(
+                s3_conn, logging_bucket['name'], logging_bucket['prefix'], logging_bucket['grant_id'])
+        elb_conn.modify_lb_attribute(elb_name, 'accessLog', config['access_log'])
+
+    @staticmethod
+    def configure_logging_bucket(s3_conn, bucket_name, bucket_prefix, grant_id):
+        existing_bucket_names = [bucket.name for bucket in s3_conn.get_all_buckets()]
+        if bucket_name in existing_bucket_names:
+            bucket = s3_conn.lookup(bucket_name, validate=False)
+        else:
+            logging.info(u"Creating ELB access logs bucket {0}".format(bucket_name))
+            bucket = s3_conn.create_bucket(bucket_name)
+        # Create access logs folder
+        bucket_prefix_exists = bucket.get_key(u'{0}/'.format(bucket_prefix))
+        if not bucket_prefix_exists:
+            bucket_prefix = bucket_prefix.replace('/', '_')
+            bucket_prefix_key = u'{0}/'.format(bucket_prefix)
+            logging.info(u"Creating ELB access logs folder {0} in bucket {1}".format(bucket_prefix_key, bucket_name))
+            new_folder = bucket.new_key(bucket_prefix_key)
+            new_folder.set_contents_from_string('')
+        BaseELBView.configure_logging_bucket_acl(bucket, grant_id)
+
+    def get_logging_grant_id(self):
+        """The account ELB writes access logs as, which needs WRITE access to the logging bucket"""
         if self.cloud_type == 'aws':
             # Get AWS ELB account ID based on region
-            grant_id = AWS_ELB_ACCOUNT_IDS.get(self.region)
-        else:
-            admin = self.get_connection(conn_type='admin')
-            elb_svc = admin.get_all_services(service_type='loadbalancing')
-            # log additional info for unexpected condition
-            if len(elb_svc) < 1 and len(elb_svc[0].accounts) < 1:
-                logging.error('ERROR: Eucalyptus not returning account info with loadbalancing service!')
-            grant_id = elb_svc[0].accounts[0].account_number
+            return AWS_ELB_ACCOUNT_IDS.get(self.region)
+        admin = self.get_connection(conn_type='admin')
+        elb_svc = admin.get_all_services(service_type='loadbalancing')
+        # log additional info for unexpected condition
+        if len(elb_svc) < 1 and len(elb_svc[0].accounts) < 1:
+            logging.error('ERROR: Eucalyptus not returning account info with loadbalancing service!')
+        return elb_svc[0].accounts[0].account_number
+
+    @staticmethod
+    def configure_logging_bucket_acl(bucket, grant_id):
         sharing_acl = ACL()
         sharing_acl.add_grant(Grant(
             permission='WRITE',
@@ -387,14 +475,22 @@ class BaseELBView(TaggedItemView):
         bucket.set_acl(sharing_policy)
 
     def handle_backend_certificate_create(self, elb_name):
+        self.create_backend_certificate_policies(self.elb_conn, elb_name, self.get_backend_certificates())
+
+    def get_backend_certificates(self):
         if self.cloud_type == 'aws':
-            return None  # Eucalyptus only
+            return []  # Eucalyptus only
         backend_certificates_json = self.request.params.get('backend_certificates')
-        backend_certificates = json.loads(backend_certificates_json) if backend_certificates_json else []
+        return json.loads(backend_certificates_json) if backend_certificates_json else []
+
+    @staticmethod
+    def create_backend_certificate_policies(elb_conn, elb_name, backend_certificates):
+        if not backend_certificates:
+            return None
         public_policy_attributes = dict()
         public_policy_type = u'PublicKeyPolicyType'
         backend_policy_type = u'BackendServerAuthenticationPolicyType'
-        random_string = self.generate_random_string(length=8)
+        random_string = BaseView.generate_random_string(length=8)
         backend_policy_name = u'BackendPolicy-{0}-{1}'.format(random_string, elb_name)
         backend_policy_params = {'LoadBalancerName': elb_name,
                                  'PolicyName': backend_policy_name,
@@ -403,21 +499,27 @@ class BaseELBView(TaggedItemView):
         for cert in backend_certificates:
             public_policy_name = u'{0}-{1}'.format(ELB_BACKEND_CERTIFICATE_NAME_PREFIX, cert.get('name'))
             public_policy_attributes['PublicKey'] = cert.get('certificateBody')
-            self.elb_conn.create_lb_policy(elb_name, public_policy_name, public_policy_type, public_policy_attributes)
+            elb_conn.create_lb_policy(elb_name, public_policy_name, public_policy_type, public_policy_attributes)
             backend_policy_params['PolicyAttributes.member.%d.AttributeName' % index] = 'PublicKeyPolicyName'
             backend_policy_params['PolicyAttributes.member.%d.AttributeValue' % index] = public_policy_name
             index += 1
-        self.elb_conn.get_status('CreateLoadBalancerPolicy', backend_policy_params)
+        elb_conn.get_status('CreateLoadBalancerPolicy', backend_policy_params)
         # sleep is needed for the previous policy creation to complete
         time.sleep(index)
         instance_port = 443
-        self.elb_conn.set_lb_policies_of_backend_server(elb_name, instance_port, backend_policy_name)
+        elb_conn.set_lb_policies_of_backend_server(elb_name, instance_port, backend_policy_name)
 
     def set_security_policy(self, elb_name, create=False):
+        security_policy = self.get_security_policy_config(create=create)
+        if security_policy is not None:
+            self.apply_security_policy(self.elb_conn, elb_name, security_policy)
+
+    def get_security_policy_config(self, create=False):
         """
+        The SSL negotiation policy to set for the posted HTTPS listener, or None (see apply_security_policy)
         See http://docs.aws.amazon.com/ElasticLoadBalancing/latest/DeveloperGuide/ssl-config-update.html
         """
-        if self.cloud_type == 'aws':
+        if self.cloud_type == 'aws' or not self.elb_conn:
             return None  # Eucalyptus only
         req_params = self.request.params
         flattened_listeners = [x for x in itertools.chain.from_iterable(self.get_listeners_args())]
@@ -433,34 +535,39 @@ class BaseELBView(TaggedItemView):
         using_custom_policy = req_params.get('elb_ssl_using_custom_policy') == 'on'
         selected_predefined_policy = req_params.get('elb_predefined_policy')
         random_string = self.generate_random_string(length=8)
-        if self.elb_conn:
-            policy_type = 'SSLNegotiationPolicyType'
-            if using_custom_policy:
-                # Create custom security policy
-                elb_ssl_protocols = json.loads(req_params.get('elb_ssl_protocols', '[]'))
-                elb_ssl_ciphers = json.loads(req_params.get('elb_ssl_ciphers', '[]'))
-                using_server_order_pref = req_params.get('elb_ssl_server_order_pref') == 'on'
-                policy_name = '{0}-{1}'.format(ELB_CUSTOM_SECURITY_POLICY_NAME_PREFIX, random_string)
-                policy_attributes = {'Reference-Security-Policy': latest_predefined_policy}
-                for protocol in elb_ssl_protocols:
-                    policy_attributes.update({protocol: True})
-                for cipher in elb_ssl_ciphers:
-                    policy_attributes.update({cipher: True})
-                if using_server_order_pref:
-                    policy_attributes.update({'Server-Defined-Cipher-Order': True})
-                self.elb_conn.create_lb_policy(elb_name, policy_name, policy_type, policy_attributes)
-                time.sleep(1)  # Give new policy time to persist before setting ELB security policy for HTTPS listener
-            else:
-                # Create predefined security policy
-                policy_name = '{0}-{1}'.format(selected_predefined_policy, random_string)
-                policy_attributes = {'Reference-Security-Policy': selected_predefined_policy}
-                self.elb_conn.create_lb_policy(elb_name, policy_name, policy_type, policy_attributes)
-                time.sleep(1)  # Give new policy time to persist before setting ELB security policy for HTTPS listener
-            # Set security policy for HTTPS listener in ELB
-            policies = [policy_name]
-            self.elb_conn.set_lb_policies_of_listener(elb_name, 443, policies)
-            if create:  # Delete default policy auto-assigned during ELB creation to ensure only selected policy is set
-                self.elb_conn.delete_lb_policy(elb_name, latest_predefined_policy)
+        if using_custom_policy:
+            # Create custom security policy
+            elb_ssl_protocols = json.loads(req_params.get('elb_ssl_protocols', '[]'))
+            elb_ssl_ciphers = json.loads(req_params.get('elb_ssl_ciphers', '[]'))
+            using_server_order_pref = req_params.get('elb_ssl_server_order_pref') == 'on'
+            policy_name = '{0}-{1}'.format(ELB_CUSTOM_SECURITY_POLICY_NAME_PREFIX, random_string)
+            policy_attributes = {'Reference-Security-Policy': latest_predefined_policy}
+            for protocol in elb_ssl_protocols:
+                policy_attributes.update({protocol: True})
+            for cipher in elb_ssl_ciphers:
+                policy_attributes.update({cipher: True})
+            if using_server_order_pref:
+                policy_attributes.update({'Server-Defined-Cipher-Order': True})
+        else:
+            # Create predefined security policy
+            policy_name = '{0}-{1}'.format(selected_predefined_policy, random_string)
+            policy_attributes = {'Reference-Security-Policy': selected_predefined_policy}
+        return dict(
+            name=policy_name,
+            attributes=policy_attributes,
+            # Delete default policy auto-assigned during ELB creation to ensure only selected policy is set
+            replaces=latest_predefined_policy if create else None,
+        )
+
+    @staticmethod
+    def apply_security_policy(elb_conn, elb_name, security_policy):
+        policy_name = security_policy['name']
+        elb_conn.create_lb_policy(elb_name, policy_name, 'SSLNegotiationPolicyType', security_policy['attributes'])
+        time.sleep(1)  # Give new policy time to persist before setting ELB security policy for HTTPS listener
+        # Set security policy for HTTPS listener in ELB
+        elb_conn.set_lb_policies_of_listener(elb_name, 443, [policy_name])
+        if security_policy.get('replaces'):
+            elb_conn.delete_lb_policy(elb_name, security_policy['replaces'])
 
     def get_latest_predefined_policy(self):
         if self.predefined_policy_choices:
@@ -564,18 +671,28 @@ class BaseELBView(TaggedItemView):
         return availability_zones
 
     def add_elb_tags(self, elb_name):
+        self.apply_elb_tags(self.elb_conn, elb_name, self.get_elb_tags())
+
+    def get_elb_tags(self):
         tags_json = self.request.params.get('tags', '{}')
         tags_dict = self._normalize_tags(json.loads(tags_json))
-        add_tags_params = {'LoadBalancerNames.member.1': elb_name}
-        index = 1
+        tags = {}
         for key, value in tags_dict.items():
             key = self.unescape_braces(key.strip())
             if not any([key.startswith('aws:'), key.startswith('euca:')]):
-                add_tags_params['Tags.member.%d.Key' % index] = key
-                add_tags_params['Tags.member.%d.Value' % index] = self.unescape_braces(value.strip())
-                index += 1
+                tags[key] = self.unescape_braces(value.strip())
+        return tags
+
+    @staticmethod
+    def apply_elb_tags(elb_conn, elb_name, tags):
+        add_tags_params = {'LoadBalancerNames.member.1': elb_name}
+        index = 1
+        for key, value in tags.items():
+            add_tags_params['Tags.member.%d.Key' % index] = key
+            add_tags_params['Tags.member.%d.Value' % index] = value
+            index += 1
         if index > 1:
-            self.elb_conn.get_status('AddTags', add_tags_params)
+            elb_conn.get_status('AddTags', add_tags_params)
 
     def get_vpc_network_name(self, elb=None):
         if elb and self.is_vpc_supported:
@@ -672,35 +789,68 @@ class ELBView(BaseELBView):
     @view_config(route_name='elb_update', request_method='POST', renderer=TEMPLATE)
     def elb_update(self):
         if self.elb_form.validate():
-            idle_timeout = self.request.params.get('idle_timeout')
-            securitygroup = self.request.params.getall('securitygroup') or None
-            listeners_args = self.get_listeners_args()
             location = self.request.route_path('elb_view', id=self.elb.name)
-            prefix = _(u'Unable to update load balancer')
-            template = u'{0} {1} - {2}'.format(prefix, self.elb.name, '{0}')
-            backend_certificates = self.request.params.get('backend_certificates') or None
-            with boto_error_handler(self.request, location, template):
-                self.update_elb_idle_timeout(self.elb.name, idle_timeout)
-                self.update_listeners(listeners_args)
-                time.sleep(1)  # Delay is needed to avoid missing listeners post-update
-                self.update_elb_tags(self.elb.name)
-                self.set_security_policy(self.elb.name)
-                self.cleanup_security_policies(delete_stale_policies=True)
-                self.configure_access_logs(elb=self.elb)
-                if self.is_vpc_supported and self.elb.security_groups != securitygroup:
-                    self.elb_conn.apply_security_groups_to_lb(self.elb.name, securitygroup)
-                if backend_certificates is not None and backend_certificates != '[]':
-                    self.handle_backend_certificate_create(self.elb.name)
-                msg = _(u"Updating load balancer")
-                self.log_request(u"{0} {1}".format(msg, self.elb.name))
-                prefix = _(u'Successfully updated load balancer.')
-                msg = u'{0} {1}'.format(prefix, self.elb.name)
-                self.request.session.flash(msg, queue=Notification.SUCCESS)
+            msg = _(u"Updating load balancer")
+            with boto_error_handler(self.request, location):
+                changes = self.get_elb_changes()
+            self.log_request(u"{0} {1}".format(msg, self.elb.name))
+            # The updates need pauses between steps for Eucalyptus, so apply them in the background
+            job_id = self.submit_job(
+                u'{0} {1}'.format(msg, self.elb.name), self.apply_elb_update,
+                self.elb_conn, self.s3_conn, self.elb, changes)
+            self.track_job(job_id)
+            msg = _(u'Updating load balancer {0}.  The page will reload once the changes have been applied.')
+            self.request.session.flash(msg.format(self.elb.name), queue=Notification.INFO)
             return HTTPFound(location=location)
         else:
             self.request.error_messages = self.elb_form.get_errors_list()
         return self.render_dict
 
+    def get_elb_changes(self):
+        """Read everything apply_elb_update needs from the request, since the job runs outside of it"""
+        is_euca = self.cloud_type == 'euca'
+        securitygroup = self.request.params.getall('securitygroup') or None
+        security_policy_updated = self.request.params.get('elb_security_policy_updated') == 'on'
+        elb_listener_ports = [x[0] for x in self.elb.listeners]
+        return dict(
+            is_euca=is_euca,
+            idle_timeout=self.request.params.get('idle_timeout'),
+            listeners_args=self.get_listeners_args(),
+            tags=self.get_elb_tags(),
+            security_policy=self.get_security_policy_config(),
+            delete_stale_policies=is_euca and security_policy_updated and 443 in elb_listener_ports,
+            access_log=self.get_access_log_config(elb=self.elb),
+            security_groups=securitygroup if self.is_vpc_supported else self.elb.security_groups,
+            backend_certificates=self.get_backend_certificates(),
+        )
+
+    @staticmethod
+    def apply_elb_update(job, elb_conn, s3_conn, elb, changes):
+        """Background job applying the changes posted to elb_update (see get_elb_changes)"""
+        try:
+            ELBView.update_elb_idle_timeout(elb_conn, elb.name, changes.get('idle_timeout'))
+            job.update(message=_(u'Updating listeners'))
+            ELBView.update_listeners(elb_conn, elb, changes.get('listeners_args'), is_euca=changes.get('is_euca'))
+            time.sleep(1)  # Delay is needed to avoid missing listeners post-update
+            ELBView.remove_all_elb_tags(elb_conn, elb)
+            BaseELBView.apply_elb_tags(elb_conn, elb.name, changes.get('tags'))
+            job.update(message=_(u'Updating security policy'))
+            if changes.get('security_policy') is not None:
+                BaseELBView.apply_security_policy(elb_conn, elb.name, changes.get('security_policy'))
+            if changes.get('delete_stale_policies'):
+                ELBView.delete_stale_policies(elb_conn, elb)
+            if changes.get('access_log') is not None:
+                BaseELBView.apply_access_log_config(elb_conn, s3_conn, elb.name, changes.get('access_log'))
+            if elb.security_groups != changes.get('security_groups'):
+                elb_conn.apply_security_groups_to_lb(elb.name, changes.get('security_groups'))
+            BaseELBView.create_backend_certificate_policies(elb_conn, elb.name, changes.get('backend_certificates'))
+        except BotoServerError as err:
+            prefix = _(u'Unable to update load balancer')
+            raise JobError(u'{0} {1} - {2}'.format(prefix, elb.name, get_error_message(err)))
+        prefix = _(u'Successfully updated load balancer.')
+        job.update(message=u'{0} {1}'.format(prefix, elb.name))
+        return dict(elb_name=elb.name)
+
     @view_config(route_name='elb_delete', request_method='POST', renderer=TEMPLATE)
     def elb_delete(self):
         if self.delete_form.validate():
@@ -732,13 +882,15 @@ class ELBView(BaseELBView):
             'bucket_choices': dict(self.elb_form.bucket_name.choices),
             'securitygroups_json_endpoint': self.request.route_path('securitygroups_json'),
             'ping_port': self.get_health_check_port(self.elb),
+            'elb_name': self.elb.name if self.elb else '',
         }))
 
-    def update_elb_idle_timeout(self, elb_name, idle_timeout):
-        if self.elb_conn:
+    @staticmethod
+    def update_elb_idle_timeout(elb_conn, elb_name, idle_timeout):
+        if elb_conn:
             setting_attribute = ConnectionSettingAttribute()
             setting_attribute.idle_timeout = idle_timeout
-            self.elb_conn.modify_lb_attribute(elb_name, 'connectingSettings', setting_attribute)
+            elb_conn.modify_lb_attribute(elb_name, 'connectingSettings', setting_attribute)
 
     def get_listener_list(self):
         listener_list = []
@@ -767,52 +919,45 @@ class ELBView(BaseELBView):
                     [policy.policy_name for policy in backend.policies if backend.instance_port == 443])
         return backend_certificates
 
-    def update_listeners(self, listeners_args):
-        if self.elb_conn and self.elb:
+    @staticmethod
+    def update_listeners(elb_conn, elb, listeners_args, is_euca=False):
+        if elb_conn and elb:
             # Convert strs in existing ELB listeners to unicode objects for add/remove comparisons
             normalized_elb_listeners = []
-            if self.elb.listeners:
-                for listener in self.elb.listeners:
-                    normalized_elb_listeners.append(self.normalize_listener(listener))
+            if elb.listeners:
+                for listener in elb.listeners:
+                    normalized_elb_listeners.append(ELBView.normalize_listener(listener))
 
             listeners_to_add = [x for x in listeners_args if x not in normalized_elb_listeners]
             listeners_to_remove = [x[0] for x in normalized_elb_listeners if x not in listeners_args]
             if listeners_to_remove:
-                if 443 in listeners_to_remove:
-                    self.cleanup_backend_policies()  # Note: this must be before HTTPS listeners are removed
-                self.elb_conn.delete_load_balancer_listeners(self.elb.name, listeners_to_remove)
+                if 443 in listeners_to_remove and is_euca:
+                    # Note: this must be before HTTPS listeners are removed
+                    ELBView.cleanup_backend_policies(elb_conn, elb)
+                elb_conn.delete_load_balancer_listeners(elb.name, listeners_to_remove)
                 time.sleep(1)  # sleep is needed for Eucalyptus to avoid not finding the elb error
 
             if listeners_to_add:
-                self.elb_conn.create_load_balancer_listeners(self.elb.name, complex_listeners=listeners_to_add)
+                elb_conn.create_load_balancer_listeners(elb.name, complex_listeners=listeners_to_add)
                 time.sleep(1)  # sleep is needed for Eucalyptus to avoid not finding the elb error
 
-    def cleanup_security_policies(self, delete_stale_policies=False):
-        """Empty security policies before setting them in ELB"""
-        if self.elb_conn and self.elb and self.cloud_type == 'euca':
-            elb_security_policy_updated = self.request.params.get('elb_security_policy_updated') == 'on'
-            if not elb_security_policy_updated:
-                return None  # Skip cleanup if security policy wasn't updated
-            elb_listener_ports = [x[0] for x in self.elb.listeners]
-            if 443 in elb_listener_ports:
-                if delete_stale_policies:
-                    self.delete_stale_policies()
-
-    def delete_stale_policies(self):
-        if self.elb and self.elb.policies and self.elb.policies.other_policies and self.cloud_type == 'euca':
-            for policy in self.elb.policies.other_policies:
+    @staticmethod
+    def delete_stale_policies(elb_conn, elb):
+        """Empty security policies before setting them in ELB (Eucalyptus only)"""
+        if elb.policies and elb.policies.other_policies:
+            for policy in elb.policies.other_policies:
                 policy_name_conditions = [
                     policy.policy_name.startswith(ELB_PREDEFINED_SECURITY_POLICY_NAME_PREFIX),
                     policy.policy_name.startswith(ELB_CUSTOM_SECURITY_POLICY_NAME_PREFIX),
                 ]
                 if any(policy_name_conditions):
-                    self.elb_conn.delete_lb_policy(self.elb.name, policy.policy_name)
+                    elb_conn.delete_lb_policy(elb.name, policy.policy_name)
 
-    def cleanup_backend_policies(self):
-        if self.elb_conn and self.elb and self.cloud_type == 'euca':
-            elb_listener_ports = [x[0] for x in self.elb.listeners]
-            if self.elb.backends and 443 in elb_listener_ports:
-                self.elb_conn.set_lb_policies_of_backend_server(self.elb.name, 443, [])
+    @staticmethod
+    def cleanup_backend_policies(elb_conn, elb):
+        elb_listener_ports = [x[0] for x in elb.listeners]
+        if elb.backends and 443 in elb_listener_ports:
+            elb_conn.set_lb_policies_of_backend_server(elb.name, 443, [])
 
     @staticmethod
     def normalize_listener(listener):
@@ -831,22 +976,18 @@ class ELBView(BaseELBView):
             normalized_listener.append(normalized_listener[2])
         return tuple(normalized_listener)
 
-    def update_elb_tags(self, elb_name):
-        if elb_name:
-            self.remove_all_elb_tags(elb_name)
-            self.add_elb_tags(elb_name)
-
-    def remove_all_elb_tags(self, elb_name):
-        if self.elb.tags:
-            remove_tags_params = {'LoadBalancerNames.member.1': elb_name}
+    @staticmethod
+    def remove_all_elb_tags(elb_conn, elb):
+        if elb.tags:
+            remove_tags_params = {'LoadBalancerNames.member.1': elb.name}
             index = 1
-            for tag in self.elb.tags.items():
-                key = self.unescape_braces(tag[0].strip())
+            for tag in elb.tags.items():
+                key = BaseView.unescape_braces(tag[0].strip())
                 if not any([key.startswith('aws:'), key.startswith('euca:')]):
                     remove_tags_params['Tags.member.%d.Key' % index] = key
                     index += 1
             if index > 1:
-                self.elb_conn.get_status('RemoveTags', remove_tags_params, verb='POST')
+                elb_conn.get_status('RemoveTags', remove_tags_params, verb='POST')
 
     def get_security_groups(self):
         securitygroups = []
@@ -87,6 +87,7 @@ class GroupsView(LandingPageView):
                 self.log_request(_(u"Deleting group {0}").format(group.group_name))
                 params = {'GroupName': group.group_name, 'IsRecursive': 'true'}
                 self.conn.get_response('DeleteGroup', params)
+                self.invalidate_iam_caches()
                 msg = _(u'Successfully deleted group')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
         else:
@@ -107,28 +108,28 @@ class GroupsJsonView(BaseView):
             return JSONResponse(status=400, message="missing CSRF token")
         # TODO: take filters into account??
         groups = []
-        for group in self.get_items():
-            policies = []
-            try:
-                policies = self.conn.get_all_group_policies(group_name=group.group_name)
-                policies = policies.policy_names
-            except BotoServerError:
-                pass
-            user_count = 0
-            try:
-                group = self.conn.get_group(group_name=group.group_name)
-                user_count = len(group.users) if hasattr(group, 'users') else 0
-            except BotoServerError:
-                pass
+        items = self.get_items()
+        with boto_error_handler(self.request):
+            membership = self.get_group_membership_index(iam_conn=self.conn)
+            policy_names = self.get_cached_iam_lookups(
+                'group_policy_names', [group.group_name for group in items], self.fetch_group_policy_names)
+        member_counts = membership.count_members()
+        for group in items:
             groups.append(dict(
                 path=group.path,
                 group_name=group.group_name,
                 create_date=group.create_date,
-                user_count=user_count,
-                policy_count=len(policies),
+                user_count=member_counts.get(group.group_name, 0),
+                policy_count=len(policy_names.get(group.group_name) or []),
             ))
         return dict(results=groups)
 
+    def fetch_group_policy_names(self, group_name):
+        try:
+            return self.conn.get_all_group_policies(group_name=group_name).policy_names
+        except BotoServerError:
+            return None
+
     def get_items(self):
         with boto_error_handler(self.request):
             return self.conn.get_all_groups().groups
@@ -248,6 +249,7 @@ class GroupView(BaseView):
             self.log_request(_(u"Deleting group {0}").format(self.group.group_name))
             params = {'GroupName': self.group.group_name, 'IsRecursive': 'true'}
             self.conn.get_response('DeleteGroup', params)
+            self.invalidate_iam_caches()
             msg = _(u'Successfully deleted group')
             self.request.session.flash(msg, queue=Notification.SUCCESS)
         return HTTPFound(location=location)
@@ -255,6 +257,7 @@ class GroupView(BaseView):
     def group_update_name_and_path(self, new_group_name, new_path):
         this_group_name = new_group_name if new_group_name is not None else self.group.group_name
         self.conn.update_group(self.group.group_name, new_group_name=new_group_name, new_path=new_path)
+        self.invalidate_iam_caches()
         msg_template = _(u'Successfully modified group {group}')
         msg = msg_template.format(group=this_group_name)
         self.request.session.flash(msg, queue=Notification.SUCCESS)
@@ -265,6 +268,7 @@ class GroupView(BaseView):
 
         self.group_add_new_users(group_name, new_users)
         self.group_remove_deleted_users(group_name, new_users)
+        self.invalidate_iam_caches()
 
         return 
 
@@ -365,6 +369,7 @@ class GroupView(BaseView):
             policy_text = self.request.params.get('policy_text')
             result = self.conn.put_group_policy(
                 group_name=self.group.group_name, policy_name=policy, policy_json=policy_text)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully updated group policy"), results=result)
 
     @view_config(route_name='group_delete_policy', request_method='POST', renderer='json')
@@ -376,5 +381,6 @@ class GroupView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Deleting policy {0} for group {1}").format(policy, self.group.group_name))
             result = self.conn.delete_group_policy(group_name=self.group.group_name, policy_name=policy)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully deleted group policy"), results=result)
 
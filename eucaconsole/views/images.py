@@ -44,6 +44,7 @@ from ..i18n import _
 from ..models import Notification
 from ..models.auth import User
 from ..views import BaseView, LandingPageView, TaggedItemView, JSONResponse, BlockDeviceMappingItemView
+from .snapshots import ImagesBySnapshotMixin
 from . import boto_error_handler
 from ..layout import __version__ as curr_version
 
@@ -145,7 +146,7 @@ class ImageBundlingMixin(BlockDeviceMappingItemView):
         return None
 
 
-class ImagesView(LandingPageView):
+class ImagesView(LandingPageView, ImagesBySnapshotMixin):
     TEMPLATE = '../templates/images/images.pt'
 
     def __init__(self, request):
@@ -196,7 +197,7 @@ class ImagesView(LandingPageView):
                     root_dev = None
                     if image.root_device_type == 'ebs' and delete_snapshot_param:
                         snapshot_id = ImageView.get_image_snapshot_id(image)
-                        registered_images = self.get_images_registered(snapshot_id)
+                        registered_images = self.get_images_by_snapshot().get(snapshot_id, [])
                         if len(registered_images) == 1:
                             delete_snapshot = True
                             root_dev = panels.get_root_device_name(image)
@@ -218,16 +219,6 @@ class ImagesView(LandingPageView):
             return HTTPFound(location=location)
         return self.render_dict
 
-    def get_images_registered(self, snap_id):
-        ret = []
-        images = self.conn.get_all_images(owners='self')
-        for img in images:
-            if img.block_device_mapping is not None:
-                vol = img.block_device_mapping.get(panels.get_root_device_name(img), None)
-                if vol is not None and snap_id == vol.snapshot_id:
-                    ret.append(img)
-        return ret or None
-
     def get_controller_options_json(self):
         return BaseView.escape_json(json.dumps({
             'snapshot_images_json_url': self.request.route_path('snapshot_images_json', id='_id_'),
@@ -257,6 +248,9 @@ class ImagesJsonView(LandingPageView, ImageBundlingMixin):
 
     def __init__(self, request):
         super(ImagesJsonView, self).__init__(request)
+        self.filter_keys = ImagesView.get_filter_keys()
+        self.sort_keys = ImagesView.get_sort_keys()
+        self.initial_sort_key = 'name'
         self.conn = self.get_connection()
 
     """Images returned as JSON"""
@@ -308,7 +302,7 @@ class ImagesJsonView(LandingPageView, ImageBundlingMixin):
             ))
         if should_invalidate_image_cache:
             self.invalidate_images_cache()
-        return dict(results=images)
+        return self.get_paged_results(images)
 
     @view_config(route_name='image_json', renderer='json', request_method='GET')
     def image_json(self):
@@ -32,7 +32,6 @@ import base64
 import re
 import simplejson as json
 
-from itertools import chain
 from M2Crypto import RSA
 from operator import attrgetter
 from urllib2 import HTTPError, URLError
@@ -61,8 +60,8 @@ from ..forms import ChoicesManager, GenerateFileForm
 from ..forms.keypairs import KeyPairForm
 from ..forms.securitygroups import SecurityGroupForm
 from ..i18n import _
+from ..indexes import ResourceIndex
 from ..models import Notification
-from ..models.alarms import Alarm
 from ..views import BaseView, LandingPageView, TaggedItemView, BlockDeviceMappingItemView, JSONResponse
 from ..views.images import ImageView
 from ..views.roles import RoleView
@@ -141,13 +140,13 @@ class BaseInstanceView(BaseView):
         ip_addresses = self.conn.get_all_addresses(addresses=[ip_address]) if self.conn else []
         return ip_addresses[0] if ip_addresses else []
 
-    def get_vpc_subnet_display(self, subnet_id, vpc_subnet_list=None):
+    def get_vpc_subnet_display(self, subnet_id, vpc_subnet_index=None):
         if self.vpc_conn and subnet_id:
             cidr_block = ''
-            if vpc_subnet_list:
-                for vpc in vpc_subnet_list:
-                    if vpc.id == subnet_id:
-                        cidr_block = vpc.cidr_block
+            if vpc_subnet_index:
+                vpc_subnet = vpc_subnet_index.get(subnet_id)
+                if vpc_subnet:
+                    cidr_block = vpc_subnet.cidr_block
             else:
                 with boto_error_handler(self.request):
                     vpc_subnet = self.vpc_conn.get_all_subnets(subnet_ids=[subnet_id])
@@ -205,25 +204,15 @@ class InstancesView(LandingPageView, BaseInstanceView):
             disassociate_ip_form=self.disassociate_ip_form,
             is_vpc_supported=self.is_vpc_supported,
             controller_options_json=controller_options_json,
+            page_size=self.get_page_size(),
         )
 
     @view_config(route_name='instances', renderer='../templates/instances/instances.pt')
     def instances_landing(self):
-        filter_keys = [
-            'id', 'name', 'image_id', 'instance_type', 'ip_address', 'key_name', 'placement',
-            'root_device', 'security_groups', 'state', 'tags', 'roles', 'vpc_id', 'subnet_id']
         # filter_keys are passed to client-side filtering in search box
-        self.filter_keys = filter_keys
+        self.filter_keys = self.get_filter_keys()
         # sort_keys are passed to sorting drop-down
-        self.sort_keys = [
-            dict(key='launch_time', name=_(u'Launch time: Oldest to Newest')),
-            dict(key='-launch_time', name=_(u'Launch time: Newest to Oldest')),
-            dict(key='id', name=_(u'Instance ID')),
-            dict(key='name', name=_(u'Instance name: A to Z')),
-            dict(key='-name', name=_(u'Instance name: Z to A')),
-            dict(key='placement', name=_(u'Availability zone')),
-            dict(key='key_name', name=_(u'Key pair')),
-        ]
+        self.sort_keys = self.get_sort_keys()
         autoscale_conn = self.get_connection(conn_type='autoscale')
         iam_conn = None
         if BaseView.has_role_access(self.request):
@@ -257,6 +246,7 @@ class InstancesView(LandingPageView, BaseInstanceView):
                 self.log_request(_(u"Starting instances {0}").format(instance_id_param))
                 # Can only start an instance if it has a volume attached
                 started = self.conn.start_instances(instance_ids=instance_ids)
+                self.invalidate_resource_snapshots()
                 if len(instance_ids) == 1:
                     msg = _(u'Successfully sent start instance request.  It may take a moment to start the instance.')
                 else:
@@ -280,6 +270,7 @@ class InstancesView(LandingPageView, BaseInstanceView):
             self.log_request(_(u"Stopping instance(s) {0}").format(instance_id_param))
             with boto_error_handler(self.request, self.location):
                 stopped = self.conn.stop_instances(instance_ids=instance_ids)
+                self.invalidate_resource_snapshots()
                 if len(instance_ids) == 1:
                     msg = _(u'Successfully sent stop instance request.  It may take a moment to stop the instance.')
                 else:
@@ -303,6 +294,7 @@ class InstancesView(LandingPageView, BaseInstanceView):
             with boto_error_handler(self.request, self.location):
                 self.log_request(_(u"Rebooting instance(s) {0}").format(instance_id_param))
                 rebooted = self.conn.reboot_instances(instance_ids=instance_ids)
+                self.invalidate_resource_snapshots()
                 if len(instance_ids) == 1:
                     msg = _(u'Successfully sent reboot request.  It may take a moment to reboot the instance.')
                 else:
@@ -326,6 +318,7 @@ class InstancesView(LandingPageView, BaseInstanceView):
             with boto_error_handler(self.request, self.location):
                 self.log_request(_(u"Terminating instance {0}").format(instance_id_param))
                 self.conn.terminate_instances(instance_ids=instance_ids)
+                self.invalidate_resource_snapshots()
                 if len(instance_ids) == 1:
                     msg = _(
                         u'Successfully sent terminate request.  It may take a moment to shut down the instance(s).')
@@ -353,6 +346,7 @@ class InstancesView(LandingPageView, BaseInstanceView):
                     self.conn.associate_address(instance_id, new_ip, allocation_id=address.allocation_id)
                 else:
                     self.conn.associate_address(instance_id, new_ip)
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully associated the IP to the instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             return HTTPFound(location=self.location)
@@ -373,6 +367,7 @@ class InstancesView(LandingPageView, BaseInstanceView):
                         self.conn.disassociate_address(ip_address, association_id=address.association_id)
                     else:
                         self.conn.disassociate_address(ip_address)
+                self.invalidate_resource_snapshots()
                 if len(ip_addresses) == 1:
                     msg = _(u'Successfully disassociated the IP from the instance.')
                 else:
@@ -384,28 +379,40 @@ class InstancesView(LandingPageView, BaseInstanceView):
         self.request.session.flash(msg, queue=Notification.ERROR)
         return HTTPFound(location=self.location)
 
+    @staticmethod
+    def get_filter_keys():
+        return [
+            'id', 'name', 'image_id', 'instance_type', 'ip_address', 'key_name', 'placement',
+            'root_device', 'security_groups', 'state', 'tags', 'roles', 'vpc_id', 'subnet_id']
+
+    @staticmethod
+    def get_sort_keys():
+        return [
+            dict(key='launch_time', name=_(u'Launch time: Oldest to Newest')),
+            dict(key='-launch_time', name=_(u'Launch time: Newest to Oldest')),
+            dict(key='id', name=_(u'Instance ID')),
+            dict(key='name', name=_(u'Instance name: A to Z')),
+            dict(key='-name', name=_(u'Instance name: Z to A')),
+            dict(key='placement', name=_(u'Availability zone')),
+            dict(key='key_name', name=_(u'Key pair')),
+        ]
+
 
 class InstancesJsonView(LandingPageView, BaseInstanceView):
     def __init__(self, request):
         super(InstancesJsonView, self).__init__(request)
+        self.filter_keys = InstancesView.get_filter_keys()
+        self.sort_keys = InstancesView.get_sort_keys()
+        self.initial_sort_key = '-launch_time'
         self.conn = self.get_connection()
         self.vpc_conn = self.get_connection(conn_type='vpc')
         self.cw_conn = self.get_connection(conn_type='cloudwatch')
-        self.vpcs = self.get_all_vpcs()
+        self.vpcs = None
 
     @view_config(route_name='instances_json', renderer='json', request_method='POST')
     def instances_json(self):
         if not (self.is_csrf_valid()):
             return JSONResponse(status=400, message="missing CSRF token")
-        vpc_subnets = self.vpc_conn.get_all_subnets()
-        keypairs = self.get_all_keypairs()
-        security_groups = self.get_all_security_groups()
-        # Get alarms for instances and build a list of instance ids to optimize alarm status fetch
-        alarms = [alarm for alarm in self.cw_conn.describe_alarms() if 'InstanceId' in alarm.dimensions]
-        alarm_resource_ids = set(list(
-            chain.from_iterable([chain.from_iterable(alarm.dimensions.values()) for alarm in alarms])
-        ))
-        instances = []
         filters = {}
         availability_zone_param = self.request.params.getall('availability_zone')
         if availability_zone_param:
@@ -422,78 +429,100 @@ class InstancesJsonView(LandingPageView, BaseInstanceView):
         root_device_type_param = self.request.params.getall('root_device_type')
         if root_device_type_param:
             filters.update({'root-device-type': root_device_type_param})
+        # The describe calls below are independent of each other, so fetch them concurrently
+        with boto_error_handler(self.request):
+            calls = self.get_parallel_calls()
+            calls.add('vpcs', self.get_all_vpcs)
+            calls.add('vpc_subnets', self.get_all_subnets)
+            calls.add('keypairs', self.get_all_keypairs)
+            calls.add('security_groups', self.get_all_security_groups)
+            calls.add('alarm_status', self.get_alarm_status_index, self.cw_conn)
+            calls.add('reservations', self.get_reservations_snapshot, filters=filters)
+            calls.add('addresses', self.get_all_addresses)
+            results = calls.run()
+        # Index the describe results so each instance row is assembled with dict/set lookups
+        self.vpcs = ResourceIndex(results.get('vpcs'))
+        vpc_subnets = ResourceIndex(results.get('vpc_subnets'))
+        keypairs = ResourceIndex(results.get('keypairs'), key='name')
+        security_groups = ResourceIndex(results.get('security_groups'))
+        alarm_status_index = results.get('alarm_status')
         # Don't filter by these request params in Python, as they're included in the "filters" params sent to the CLC
         # Note: the choices are from attributes in InstancesFiltersForm
         ignore_params = [
             'availability_zone', 'instance_type', 'state', 'security_group',
             'scaling_group', 'root_device_type', 'roles']
-        filtered_items = self.filter_items(self.get_items(filters=filters), ignore=ignore_params)
+        items = self.get_items(reservations=results.get('reservations'))
+        filtered_items = self.filter_items(items, ignore=ignore_params)
         if self.request.params.get('scaling_group'):
             filtered_items = self.filter_by_scaling_group(filtered_items)
         if self.request.params.get('roles'):
             filtered_items = self.filter_by_roles(filtered_items)
         transitional_states = ['pending', 'stopping', 'shutting-down']
-        elastic_ips = [ip.public_ip for ip in self.conn.get_all_addresses()]
-        for instance in filtered_items:
-            is_transitional = instance.state in transitional_states
-            security_groups_array = sorted({
-                'name': group.name,
-                'id': group.id,
-                'rules_count': self.get_security_group_rules_count_by_id(security_groups, group.id)
-            } for group in instance.groups)
-            security_group_names = [group.name for group in instance.groups]  # Needed for sortable tables
-            if instance.platform is None:
-                instance.platform = _(u"linux")
-            has_elastic_ip = instance.ip_address in elastic_ips
-            exists_key = True if self.get_keypair_by_name(keypairs, instance.key_name) else False
-            sortable_ip = self.get_sortable_ip(instance.ip_address)
-            alarm_status = ''
-            if instance.id in alarm_resource_ids:
-                alarm_status = Alarm.get_resource_alarm_status(instance.id, alarms)
-            vpc_subnet_display = self.get_vpc_subnet_display(
-                instance.subnet_id, vpc_subnet_list=vpc_subnets) if instance.subnet_id else ''
-            sortable_subnet_zone = "{0}{1}{2}".format(vpc_subnet_display, instance.vpc_name, instance.placement)
-            instances.append(dict(
-                id=instance.id,
-                name=TaggedItemView.get_display_name(instance, escapebraces=False),
-                instance_type=instance.instance_type,
-                image_id=instance.image_id,
-                ip_address=instance.ip_address,
-                sortable_ip=sortable_ip,
-                has_elastic_ip=has_elastic_ip,
-                public_dns_name=instance.public_dns_name,
-                launch_time=instance.launch_time,
-                availability_zone=instance.placement,
-                platform=instance.platform,
-                root_device_type=instance.root_device_type,
-                security_groups=security_groups_array,
-                sortable_secgroups=','.join(security_group_names),
-                sortable_subnet_zone=sortable_subnet_zone,
-                key_name=instance.key_name,
-                exists_key=exists_key,
-                vpc_name=instance.vpc_name,
-                subnet_id=instance.subnet_id if instance.subnet_id else None,
-                vpc_subnet_display=vpc_subnet_display,
-                status=instance.state,
-                alarm_status=alarm_status,
-                tags=TaggedItemView.get_tags_display(instance.tags),
-                transitional=is_transitional,
-                running_create=True if instance.tags.get('ec_bundling') else False,
-                scaling_group=instance.tags.get('aws:autoscaling:groupName')
-            ))
-        image_ids = [i['image_id'] for i in instances]
-        image_ids = list(set(image_ids))
-        images = self.conn.get_all_images(filters={'image-id': image_ids})
-        for instance in instances:
-            image = self.get_image_by_id(images, instance['image_id'])
-            image_name = None
-            if image:
-                image_name = u'{0}{1}'.format(
-                    image.name if image.name else image.id,
-                    u' ({0})'.format(image.id) if image.name else ''
+        elastic_ips = set(ip.public_ip for ip in results.get('addresses'))
+        image_ids = list(set([instance.image_id for instance in filtered_items]))
+        images = ResourceIndex()
+        if image_ids:
+            with boto_error_handler(self.request):
+                images = ResourceIndex(self.conn.get_all_images(filters={'image-id': image_ids}))
+
+        # Build each instance's dict as it is serialized (see StreamingJSONResponse)
+        def iter_instances():
+            for instance in filtered_items:
+                is_transitional = instance.state in transitional_states
+                security_groups_array = sorted({
+                    'name': group.name,
+                    'id': group.id,
+                    'rules_count': self.get_security_group_rules_count_by_id(security_groups, group.id)
+                } for group in instance.groups)
+                security_group_names = [group.name for group in instance.groups]  # Needed for sortable tables
+                if instance.platform is None:
+                    instance.platform = _(u"linux")
+                has_elastic_ip = instance.ip_address in elastic_ips
+                exists_key = True if self.get_keypair_by_name(keypairs, instance.key_name) else False
+                sortable_ip = self.get_sortable_ip(instance.ip_address)
+                alarm_status = alarm_status_index.get_status(instance.id, 'InstanceId')
+                vpc_subnet_display = self.get_vpc_subnet_display(
+                    instance.subnet_id, vpc_subnet_index=vpc_subnets) if instance.subnet_id else ''
+                sortable_subnet_zone = "{0}{1}{2}".format(vpc_subnet_display, instance.vpc_name, instance.placement)
+                instance_dict = dict(
+                    id=instance.id,
+                    name=TaggedItemView.get_display_name(instance, escapebraces=False),
+                    instance_type=instance.instance_type,
+                    image_id=instance.image_id,
+                    ip_address=instance.ip_address,
+                    sortable_ip=sortable_ip,
+                    has_elastic_ip=has_elastic_ip,
+                    public_dns_name=instance.public_dns_name,
+                    launch_time=instance.launch_time,
+                    availability_zone=instance.placement,
+                    platform=instance.platform,
+                    root_device_type=instance.root_device_type,
+                    security_groups=security_groups_array,
+                    sortable_secgroups=','.join(security_group_names),
+                    sortable_subnet_zone=sortable_subnet_zone,
+                    key_name=instance.key_name,
+                    exists_key=exists_key,
+                    vpc_name=instance.vpc_name,
+                    subnet_id=instance.subnet_id if instance.subnet_id else None,
+                    vpc_subnet_display=vpc_subnet_display,
+                    status=instance.state,
+                    alarm_status=alarm_status,
+                    tags=TaggedItemView.get_tags_display(instance.tags),
+                    transitional=is_transitional,
+                    running_create=True if instance.tags.get('ec_bundling') else False,
+                    scaling_group=instance.tags.get('aws:autoscaling:groupName')
                 )
-            instance['image_name'] = image_name
-        return dict(results=instances)
+                image = self.get_image_by_id(images, instance.image_id)
+                image_name = None
+                if image:
+                    image_name = u'{0}{1}'.format(
+                        image.name if image.name else image.id,
+                        u' ({0})'.format(image.id) if image.name else ''
+                    )
+                instance_dict['image_name'] = image_name
+                yield instance_dict
+
+        return self.get_paged_results(iter_instances())
 
     @view_config(route_name='instances_roles_json', renderer='json', request_method='GET')
     def instances_roles_json(self):
@@ -501,21 +530,24 @@ class InstancesJsonView(LandingPageView, BaseInstanceView):
         iam_conn = self.get_connection(conn_type='iam')
         result = iam_conn.list_instance_profiles()
         instance_profiles_list = result.list_instance_profiles_response.list_instance_profiles_result.instance_profiles
+        instance_profiles = ResourceIndex(instance_profiles_list, key='instance_profile_name')
         for item in self.get_items():
             if item.instance_profile:
                 arn = item.instance_profile['arn']
                 profile_name = arn[(arn.rindex('/') + 1):]
-                # look up profile in list
-                for profile in instance_profiles_list:
-                    if profile.instance_profile_name == profile_name:
-                        instances[item.id] = profile.roles.role_name
+                profile = instance_profiles.get(profile_name)
+                if profile:
+                    instances[item.id] = profile.roles.role_name
         return dict(results=instances)
 
-    def get_items(self, filters=None):
+    def get_items(self, filters=None, reservations=None):
+        """Returns instances, optionally from reservations that have already been fetched"""
         if self.conn:
             instances = []
             with boto_error_handler(self.request):
-                for reservation in self.conn.get_all_reservations(filters=filters):
+                if reservations is None:
+                    reservations = self.get_all_reservations(filters=filters)
+                for reservation in reservations:
                     for instance in reservation.instances:
                         if instance.vpc_id:
                             vpc = self.get_vpc_by_id(instance.vpc_id)
@@ -526,29 +558,44 @@ class InstancesJsonView(LandingPageView, BaseInstanceView):
             return instances
         return []
 
+    def get_all_reservations(self, filters=None):
+        return self.conn.get_all_reservations(filters=filters) if self.conn else []
+
+    def get_reservations_snapshot(self, filters=None):
+        """Returns reservations from the per-account resource snapshot cache"""
+        return self.get_resource_snapshot(
+            'reservations', lambda conn: conn.get_all_reservations(filters=filters) if conn else [],
+            sorted((filters or {}).items()))
+
     def get_all_vpcs(self):
         return self.vpc_conn.get_all_vpcs() if self.vpc_conn else []
 
+    def get_all_subnets(self):
+        return self.vpc_conn.get_all_subnets() if self.vpc_conn else []
+
+    def get_all_addresses(self):
+        return self.conn.get_all_addresses() if self.conn else []
+
     def get_vpc_by_id(self, vpc_id):
-        for vpc in self.vpcs:
-            if vpc_id == vpc.id:
-                return vpc
+        if self.vpcs is None:
+            self.vpcs = ResourceIndex(self.get_all_vpcs())
+        return self.vpcs.get(vpc_id)
 
     def get_all_keypairs(self):
         return self.conn.get_all_key_pairs() if self.conn else []
 
-    def get_keypair_by_name(self, keypairs, keypair_name):
-        for keypair in keypairs:
-            if keypair_name == keypair.name:
-                return keypair
+    @staticmethod
+    def get_keypair_by_name(keypairs, keypair_name):
+        """Look up a key pair in a ResourceIndex keyed by name"""
+        return keypairs.get(keypair_name)
 
     def get_all_security_groups(self):
         return self.conn.get_all_security_groups() if self.conn else []
 
-    def get_security_group_by_id(self, security_groups, id):
-        for sgroup in security_groups:
-            if sgroup.id == id:
-                return sgroup
+    @staticmethod
+    def get_security_group_by_id(security_groups, id):
+        """Look up a security group in a ResourceIndex keyed by id"""
+        return security_groups.get(id)
 
     def get_security_group_rules_count_by_id(self, security_groups, id):
         sgroup = self.get_security_group_by_id(security_groups, id)
@@ -558,10 +605,9 @@ class InstancesJsonView(LandingPageView, BaseInstanceView):
 
     @staticmethod
     def get_image_by_id(images, image_id):
+        """Look up an image in a ResourceIndex keyed by id"""
         if images:
-            for image in images:
-                if image.id == image_id:
-                    return image
+            return images.get(image_id)
         return None
 
     @staticmethod
@@ -571,24 +617,23 @@ class InstancesJsonView(LandingPageView, BaseInstanceView):
         return long("".join(["{0:08b}".format(int(num)) for num in ip_address.split('.')]), 2)
 
     def filter_by_scaling_group(self, items):
+        scaling_groups = set(self.unescape_braces(group) for group in self.request.params.getall('scaling_group'))
         filtered_items = []
         for item in items:
             autoscaling_tag = item.tags.get('aws:autoscaling:groupName')
-            if autoscaling_tag:
-                for scaling_group in self.request.params.getall('scaling_group'):
-                    if autoscaling_tag == self.unescape_braces(scaling_group):
-                        filtered_items.append(item)
+            if autoscaling_tag and autoscaling_tag in scaling_groups:
+                filtered_items.append(item)
         return filtered_items
 
     def filter_by_roles(self, items):
         iam_conn = self.get_connection(conn_type="iam")
         filtered_items = []
-        profiles = []
+        profiles = set()
         for role in self.request.params.getall('roles'):
             instance_profiles_list = iam_conn.list_instance_profiles(
                 path_prefix='/' + role).list_instance_profiles_response.list_instance_profiles_result.instance_profiles
             for profile in instance_profiles_list:
-                profiles.append(profile.instance_profile_id)
+                profiles.add(profile.instance_profile_id)
         for item in items:
             if len(item.instance_profile) > 0 and item.instance_profile['id'] in profiles:
                 filtered_items.append(item)
@@ -702,6 +747,7 @@ class InstanceView(TaggedItemView, BaseInstanceView):
                     self.log_request(_(u"Starting instance {0}").format(self.instance.id))
                     self.instance.start()
 
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully modified instance')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
                 return HTTPFound(location=self.location)
@@ -716,6 +762,7 @@ class InstanceView(TaggedItemView, BaseInstanceView):
                 self.log_request(_(u"Starting instance {0}").format(self.instance.id))
                 # Can only start an instance if it has a volume attached
                 self.instance.start()
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully sent start instance request.  It may take a moment to start the instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             return HTTPFound(location=self.location)
@@ -729,6 +776,7 @@ class InstanceView(TaggedItemView, BaseInstanceView):
                 with boto_error_handler(self.request, self.location):
                     self.log_request(_(u"Stopping instance {0}").format(self.instance.id))
                     self.instance.stop()
+                    self.invalidate_resource_snapshots()
                     msg = _(u'Successfully sent stop instance request.  It may take a moment to stop the instance.')
                     self.request.session.flash(msg, queue=Notification.SUCCESS)
                 return HTTPFound(location=self.location)
@@ -741,6 +789,7 @@ class InstanceView(TaggedItemView, BaseInstanceView):
             with boto_error_handler(self.request, self.location):
                 self.log_request(_(u"Rebooting instance {0}").format(self.instance.id))
                 rebooted = self.instance.reboot()
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully sent reboot request.  It may take a moment to reboot the instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
                 if not rebooted:
@@ -755,6 +804,7 @@ class InstanceView(TaggedItemView, BaseInstanceView):
             with boto_error_handler(self.request, self.location):
                 self.log_request(_(u"Terminating instance {0}").format(self.instance.id))
                 self.instance.terminate()
+                self.invalidate_resource_snapshots()
                 msg = _(
                     u'Successfully sent terminate instance request.  It may take a moment to shut down the instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
@@ -789,6 +839,7 @@ class InstanceView(TaggedItemView, BaseInstanceView):
                     self.conn.associate_address(self.instance.id, new_ip, allocation_id=address.allocation_id)
                 else:
                     self.conn.associate_address(self.instance.id, new_ip)
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully associated the IP to the instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             return HTTPFound(location=self.location)
@@ -805,6 +856,7 @@ class InstanceView(TaggedItemView, BaseInstanceView):
                     self.conn.disassociate_address(elastic_ip.public_ip, association_id=elastic_ip.association_id)
                 else:
                     self.conn.disassociate_address(elastic_ip.public_ip)
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully disassociated the IP from the instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             return HTTPFound(location=self.location)
@@ -1032,6 +1084,7 @@ class InstanceVolumesView(BaseInstanceView):
                     self.log_request(_(u"Attaching volume {0} to {1} as {2}").format(
                         volume_id, self.instance.id, device))
                     self.conn.attach_volume(volume_id=volume_id, instance_id=self.instance.id, device=device)
+                    self.invalidate_resource_snapshots()
                     msg = _(u'Request successfully submitted.  It may take a moment to attach the volume.')
                     self.request.session.flash(msg, queue=Notification.SUCCESS)
                 return HTTPFound(location=location)
@@ -1045,6 +1098,7 @@ class InstanceVolumesView(BaseInstanceView):
                 with boto_error_handler(self.request, location):
                     self.log_request(_(u"Dettaching volume {0} from {1}").format(volume_id, self.instance.id))
                     self.conn.detach_volume(volume_id=volume_id)
+                    self.invalidate_resource_snapshots()
                     msg = _(u'Request successfully submitted.  It may take a moment to detach the volume.')
                     self.request.session.flash(msg, queue=Notification.SUCCESS)
                 return HTTPFound(location=location)
@@ -1260,6 +1314,7 @@ class InstanceLaunchView(BaseInstanceView, BlockDeviceMappingItemView):
                         security_group_ids=securitygroup_ids,
                     ))
                     reservation = self.conn.run_instances(image_id, **params)
+                self.invalidate_resource_snapshots()
 
                 for idx, instance in enumerate(reservation.instances):
                     # Add tags for newly launched instance(s)
@@ -1428,6 +1483,7 @@ class InstanceLaunchMoreView(BaseInstanceView, BlockDeviceMappingItemView):
                         security_group_ids=security_groups,
                     ))
                     reservation = self.conn.run_instances(image_id, **params)
+                self.invalidate_resource_snapshots()
 
                 for idx, instance in enumerate(reservation.instances):
                     # Add tags for newly launched instance(s)
@@ -1567,8 +1623,9 @@ class InstanceCreateImageView(BaseInstanceView, BlockDeviceMappingItemView):
                         'bundle_id': result.id,
                     }
                     self.ec2_conn.create_tags(instance_id, {'ec_bundling': '%s/%s' % (s3_bucket, result.id)})
-                    s3_conn = self.get_connection(conn_type='s3')
-                    k = Key(s3_conn.get_bucket(s3_bucket))
+                    # The image is registered from this metadata once bundling finishes, so it must be saved
+                    # before reporting success
+                    k = Key(self.s3_conn.get_bucket(s3_bucket))
                     k.key = result.id
                     k.set_contents_from_string(json.dumps(bundle_metadata))
                     msg = _(u'Successfully sent create image request.  It may take a few minutes to create the image.')
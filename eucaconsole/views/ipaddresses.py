@@ -36,6 +36,7 @@ from pyramid.view import view_config
 from ..forms.ipaddresses import (
     AllocateIPsForm, AssociateIPForm, DisassociateIPForm, ReleaseIPForm, IPAddressesFiltersForm)
 from ..i18n import _
+from ..indexes import ResourceIndex
 from ..models import Notification
 from ..views import LandingPageView, TaggedItemView, BaseView, JSONResponse
 from . import boto_error_handler
@@ -97,7 +98,7 @@ class IPAddressesView(LandingPageView):
             initial_sort_key='public_ip',
             json_items_endpoint=self.get_json_endpoint('ipaddresses_json'),
             filters_form=filters_form,
-            filter_keys=['public_ip', 'instance_id', 'domain'],
+            filter_keys=self.get_filter_keys(),
             search_facets=BaseView.escape_json(json.dumps(search_facets)),
             sort_keys=self.get_sort_keys(),
         )
@@ -168,6 +169,11 @@ class IPAddressesView(LandingPageView):
         elastic_ip = ip_addresses[0] if ip_addresses else None
         return elastic_ip
 
+    @staticmethod
+    def get_filter_keys():
+        """filter_keys are passed to client-side filtering in search box"""
+        return ['public_ip', 'instance_id', 'domain']
+
     @staticmethod
     def get_sort_keys():
         """sort_keys are passed to sorting drop-down on landing page"""
@@ -180,6 +186,9 @@ class IPAddressesView(LandingPageView):
 class IPAddressesJsonView(LandingPageView):
     def __init__(self, request):
         super(IPAddressesJsonView, self).__init__(request)
+        self.filter_keys = IPAddressesView.get_filter_keys()
+        self.sort_keys = IPAddressesView.get_sort_keys()
+        self.initial_sort_key = 'public_ip'
         self.conn = self.get_connection()
 
     @view_config(route_name='ipaddresses_json', renderer='json', request_method='POST')
@@ -202,22 +211,18 @@ class IPAddressesJsonView(LandingPageView):
                         instances[address.instance_id]) if address.instance_id in instances else address.instance_id,
                     domain=address.domain,
                 ))
-            return dict(results=ipaddresses)
+            return self.get_paged_results(ipaddresses)
 
     def get_items(self):
         return self.conn.get_all_addresses() if self.conn else []
 
-    # return dictionary of instances (by their id)
+    # return index of instances (by their id)
     def get_instances(self, ipaddresses):
         ids = []
         for ip in ipaddresses:
             if ip.instance_id:
                 ids.append(ip.instance_id)
-        instances = self.conn.get_only_instances(ids)
-        ret = {}
-        for inst in instances:
-            ret[inst.id] = inst
-        return ret
+        return ResourceIndex(self.conn.get_only_instances(ids))
 
     def filter_by_assignment(self, items):
         filtered_items = []
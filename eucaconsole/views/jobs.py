@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Status of background jobs (see eucaconsole.jobs)
+
+"""
+from pyramid.view import view_config
+
+from . import BaseView, JSONError
+from ..i18n import _
+from ..jobs import background_jobs, JOB_FINISHED_STATES
+
+
+class JobStatusJsonView(BaseView):
+    """Status of a background job submitted from this session"""
+
+    @view_config(route_name='job_status_json', renderer='json', request_method='GET')
+    def job_status_json(self):
+        job_id = self.request.matchdict.get('id')
+        status = background_jobs.get_status(job_id, self.get_job_owner())
+        if status is None:
+            self.untrack_job(job_id)
+            raise JSONError(status=404, message=_(u'Job not found'))
+        if status['state'] in JOB_FINISHED_STATES:
+            self.untrack_job(job_id)
+        return dict(results=dict(
+            id=status['id'],
+            description=status['description'],
+            state=status['state'],
+            message=status['message'],
+            progress=status.get('progress', 0),
+            total=status.get('total'),
+            result=status['result'],
+            error=status['error'],
+        ))
+
+    def untrack_job(self, job_id):
+        """Stop polling for a job once its outcome has been reported (see BaseView.track_job)"""
+        job_ids = self.request.session.get('background_jobs')
+        if job_ids and job_id in job_ids:
+            self.request.session['background_jobs'] = [tracked for tracked in job_ids if tracked != job_id]
@@ -43,6 +43,7 @@ from ..forms.keypairs import KeyPairForm
 from ..forms.launchconfigs import LaunchConfigDeleteForm, CreateLaunchConfigForm, LaunchConfigsFiltersForm
 from ..forms.securitygroups import SecurityGroupForm
 from ..i18n import _
+from ..indexes import ResourceIndex
 from ..models import Notification
 from ..views import LandingPageView, BaseView, BlockDeviceMappingItemView, JSONResponse
 from ..views.images import ImageView
@@ -62,7 +63,7 @@ class LaunchConfigsView(LandingPageView):
         self.autoscale_conn = self.get_connection(conn_type='autoscale')
         self.initial_sort_key = 'name'
         self.prefix = '/launchconfigs'
-        self.filter_keys = ['image_id', 'image_name', 'key_name', 'name', 'security_groups']
+        self.filter_keys = self.get_filter_keys()
         self.sort_keys = self.get_sort_keys()
         self.json_items_endpoint = self.get_json_endpoint('launchconfigs_json')
         self.delete_form = LaunchConfigDeleteForm(self.request, formdata=self.request.params or None)
@@ -108,6 +109,10 @@ class LaunchConfigsView(LandingPageView):
             self.request.error_messages = self.delete_form.get_errors_list()
         return self.render_dict
 
+    @staticmethod
+    def get_filter_keys():
+        return ['image_id', 'image_name', 'key_name', 'name', 'security_groups']
+
     @staticmethod
     def get_sort_keys():
         return [
@@ -126,12 +131,17 @@ class LaunchConfigsJsonView(LandingPageView):
     """JSON response view for Launch Configurations landing page"""
     def __init__(self, request):
         super(LaunchConfigsJsonView, self).__init__(request)
+        self.filter_keys = LaunchConfigsView.get_filter_keys()
+        self.sort_keys = LaunchConfigsView.get_sort_keys()
+        self.initial_sort_key = 'name'
         self.ec2_conn = self.get_connection()
         self.autoscale_conn = self.get_connection(conn_type='autoscale')
         with boto_error_handler(request):
             self.items = self.get_items()
             self.securitygroups = self.get_all_security_groups()
             self.scaling_groups = self.autoscale_conn.get_all_groups()
+        self.securitygroups_by_id = ResourceIndex(self.securitygroups)
+        self.securitygroups_by_name = ResourceIndex(self.securitygroups, key='name')
 
     @view_config(route_name='launchconfigs_json', renderer='json', request_method='POST')
     def launchconfigs_json(self):
@@ -170,7 +180,7 @@ class LaunchConfigsJsonView(LandingPageView):
                     in_use=name in scalinggroup_launchconfig_names,
                     scaling_group=launchconfig_sg_mapping.get(name)
                 ))
-            return dict(results=launchconfigs_array)
+            return self.get_paged_results(launchconfigs_array)
 
     def get_items(self):
         return self.autoscale_conn.get_all_launch_configurations() if self.autoscale_conn else []
@@ -191,7 +201,7 @@ class LaunchConfigsJsonView(LandingPageView):
         return launchconfigs_image_mapping
 
     def get_scalinggroups_launchconfig_names(self):
-        return [group.launch_config_name for group in self.scaling_groups]
+        return set(group.launch_config_name for group in self.scaling_groups)
 
     def get_launchconfigs_sg_mapping(self):
         ret = dict()
@@ -220,18 +230,10 @@ class LaunchConfigsJsonView(LandingPageView):
         return security_groups
 
     def get_security_group_by_id(self, id):
-        if self.securitygroups:
-            for sgroup in self.securitygroups:
-                if sgroup.id == id:
-                    return sgroup
-        return ''
+        return self.securitygroups_by_id.get(id, '')
 
     def get_security_group_by_name(self, name):
-        if self.securitygroups:
-            for sgroup in self.securitygroups:
-                if sgroup.name == name:
-                    return sgroup
-        return ''
+        return self.securitygroups_by_name.get(name, '')
 
     def get_security_group_rules_count_by_id(self, id):
         if id.startswith('sg-'):
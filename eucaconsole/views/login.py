@@ -359,6 +359,7 @@ class LoginView(BaseView, PermissionCheckMixin):
                 conn = ConnectionManager.aws_connection(
                     session['region'], creds.access_key, creds.secret_key, creds.session_token, 'vpc')
                 vpcs = conn.get_all_vpcs()
+                ConnectionManager.return_connection(conn)
                 if not vpcs or len(vpcs) == 0:
                     # remove vpc from supported-platforms
                     if 'VPC' in session.get('supported_platforms', []):
@@ -420,5 +421,7 @@ class LogoutView(BaseView):
     def logout(self):
         if self.euca_logout_form.validate():
             forget(self.request)
+            if self.access_key:
+                ConnectionManager.release_connections(self.access_key)
             self.request.session.invalidate()
         return HTTPFound(location=self.login_url)
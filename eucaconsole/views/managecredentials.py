@@ -40,7 +40,7 @@ from pyramid.view import view_config
 from ..forms.login import EucaChangePasswordForm
 from ..i18n import _
 from ..models import Notification
-from ..models.auth import User
+from ..models.auth import ConnectionManager, User
 from ..views import BaseView
 from .login import PermissionCheckMixin
 
@@ -115,6 +115,8 @@ class ManageCredentialsView(BaseView, PermissionCheckMixin):
                         passwd=password, new_passwd=new_password, timeout=8, duration=duration)
                     # logging.debug("auth creds = "+str(creds.__dict__))
                     user_account = u'{user}@{account}'.format(user=username, account=account)
+                    if session.get('access_id'):
+                        ConnectionManager.release_connections(session['access_id'])
                     session['cloud_type'] = 'euca'
                     session['account'] = account
                     session['username'] = username
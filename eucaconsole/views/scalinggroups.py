@@ -29,11 +29,9 @@ Pyramid views for Eucalyptus and AWS scaling groups
 
 """
 import simplejson as json
-import time
 
 from dateutil import parser
 from hashlib import md5
-from itertools import chain
 from markupsafe import escape
 from operator import attrgetter, itemgetter
 
@@ -55,33 +53,56 @@ from ..forms.scalinggroups import (
     ScalingGroupPolicyDeleteForm, ScalingGroupsFiltersForm)
 from ..i18n import _
 from ..models import Notification
-from ..models.alarms import Alarm
 from ..views import LandingPageView, BaseView, TaggedItemView, JSONResponse, JSONError
 from . import boto_error_handler
 
 
 class DeleteScalingGroupMixin(object):
-    def wait_for_instances_to_shutdown(self, scaling_group):
-        if scaling_group.instances:
-            ec2_conn = self.get_connection()
-            instance_ids = [i.instance_id for i in scaling_group.instances]
-            is_all_shutdown = False
-            count = 0
-            while is_all_shutdown is False and count < 30:
-                instances = ec2_conn.get_only_instances(instance_ids)
-                if instances:
-                    is_all_shutdown = True
-                    for instance in instances:
-                        if self.cloud_type == 'aws':
-                            if not str(instance._state).startswith('terminated'):
-                                is_all_shutdown = False
-                        else:
-                            if not str(instance._state).startswith('terminated') and \
-                               not str(instance._state).startswith('shutting-down'):
-                                is_all_shutdown = False
-                    time.sleep(5)
-                count += 1
-        return
+    SHUTDOWN_POLL_INTERVAL = 5  # seconds between checks that the group's instances have shut down
+    SHUTDOWN_POLL_COUNT = 30
+
+    def start_scaling_group_delete(self, scaling_group):
+        """
+        Shut down the group's instances, then wait for them and delete the group in a background job
+        rather than holding the request for the wait.  The job is tracked in the session so the
+        next page reports when the group is gone.
+        """
+        scaling_group.shutdown_instances()
+        instance_ids = [i.instance_id for i in scaling_group.instances or []]
+        job_id = self.submit_job(
+            _(u'Delete scaling group {0}').format(scaling_group.name), self.delete_scaling_group,
+            self.get_connection(), self.get_connection(conn_type='autoscale'),
+            scaling_group.name, instance_ids, self.cloud_type)
+        self.track_job(job_id)
+        return job_id
+
+    @classmethod
+    def delete_scaling_group(cls, job, ec2_conn, autoscale_conn, name, instance_ids, cloud_type, polls=0):
+        """Poll every SHUTDOWN_POLL_INTERVAL seconds (requeueing the job in between) until the group's
+           instances have shut down or SHUTDOWN_POLL_COUNT polls have passed, then delete the group"""
+        if instance_ids and polls < cls.SHUTDOWN_POLL_COUNT:
+            if polls == 0:
+                job.update(message=_(u'Waiting for instances to shut down'))
+            if not cls.instances_shut_down(ec2_conn, instance_ids, cloud_type):
+                return job.requeue(
+                    cls.SHUTDOWN_POLL_INTERVAL, cls.delete_scaling_group,
+                    ec2_conn, autoscale_conn, name, instance_ids, cloud_type, polls=polls + 1)
+        job.update(message=_(u'Deleting scaling group'))
+        autoscale_conn.delete_auto_scaling_group(name)
+        job.update(message=_(u'Successfully deleted scaling group {0}').format(name))
+        return dict(name=name)
+
+    @staticmethod
+    def instances_shut_down(ec2_conn, instance_ids, cloud_type):
+        for instance in ec2_conn.get_only_instances(instance_ids):
+            if cloud_type == 'aws':
+                if not str(instance._state).startswith('terminated'):
+                    return False
+            else:
+                if not str(instance._state).startswith('terminated') and \
+                   not str(instance._state).startswith('shutting-down'):
+                    return False
+        return True
 
 
 class ScalingGroupsView(LandingPageView, DeleteScalingGroupMixin):
@@ -100,8 +121,7 @@ class ScalingGroupsView(LandingPageView, DeleteScalingGroupMixin):
         self.filters_form = ScalingGroupsFiltersForm(
             self.request, formdata=self.request.params or None,
             ec2_conn=self.ec2_conn, autoscale_conn=self.autoscale_conn, vpc_conn=self.vpc_conn)
-        self.filter_keys = [
-            'availability_zones', 'launch_config', 'name', 'placement_group', 'vpc_zone_identifier']
+        self.filter_keys = self.get_filter_keys()
         search_facets = self.filters_form.facets
         # sort_keys are passed to sorting drop-down
         self.is_vpc_supported = BaseView.is_vpc_supported(request)
@@ -128,15 +148,11 @@ class ScalingGroupsView(LandingPageView, DeleteScalingGroupMixin):
             name = self.request.params.get('name')
             with boto_error_handler(self.request, location):
                 self.log_request(_(u"Deleting scaling group {0}").format(name))
-                conn = self.get_connection(conn_type='autoscale')
                 scaling_group = self.get_scaling_group_by_name(name)
                 # Need to shut down instances prior to scaling group deletion
-                scaling_group.shutdown_instances()
-                self.wait_for_instances_to_shutdown(scaling_group)
-                conn.delete_auto_scaling_group(name)
-                prefix = _(u'Successfully deleted scaling group')
-                msg = u'{0} {1}'.format(prefix, name)
-                self.request.session.flash(msg, queue=Notification.SUCCESS)
+                self.start_scaling_group_delete(scaling_group)
+                msg = _(u'Deleting scaling group {0}. It will be removed once its instances have shut down.')
+                self.request.session.flash(msg.format(name), queue=Notification.INFO)
             return HTTPFound(location=location)
         else:
             self.request.error_messages = self.delete_form.get_errors_list()
@@ -149,6 +165,10 @@ class ScalingGroupsView(LandingPageView, DeleteScalingGroupMixin):
             return scaling_groups[0]
         return []
 
+    @staticmethod
+    def get_filter_keys():
+        return ['availability_zones', 'launch_config', 'name', 'placement_group', 'vpc_zone_identifier']
+
     @staticmethod
     def get_sort_keys():
         return [
@@ -162,6 +182,12 @@ class ScalingGroupsView(LandingPageView, DeleteScalingGroupMixin):
 
 
 class ScalingGroupsJsonView(LandingPageView):
+    def __init__(self, request):
+        super(ScalingGroupsJsonView, self).__init__(request)
+        self.filter_keys = ScalingGroupsView.get_filter_keys()
+        self.sort_keys = ScalingGroupsView.get_sort_keys()
+        self.initial_sort_key = 'name'
+
     @view_config(route_name='scalinggroups_json', renderer='json', request_method='POST')
     def scalinggroups_json(self):
         if not(self.is_csrf_valid()):
@@ -174,16 +200,9 @@ class ScalingGroupsJsonView(LandingPageView):
                 items = self.filter_by_availability_zones(items)
             if self.request.params.getall('vpc_zone_identifier'):
                 items = self.filter_by_vpc_zone_identifier(items)
-        cw_conn = self.get_connection(conn_type='cloudwatch')
-        # Get alarms for ASGs and build a list of resource ids to optimize alarm status fetch
-        alarms = [alarm for alarm in cw_conn.describe_alarms() if 'AutoScalingGroupName' in alarm.dimensions]
-        alarm_resource_ids = set(list(
-            chain.from_iterable([chain.from_iterable(alarm.dimensions.values()) for alarm in alarms])
-        ))
+            alarm_status_index = self.get_alarm_status_index()
         for group in items:
-            alarm_status = ''
-            if group.name in alarm_resource_ids:
-                alarm_status = Alarm.get_resource_alarm_status(group.name, alarms)
+            alarm_status = alarm_status_index.get_status(group.name, 'AutoScalingGroupName')
             group_instances = group.instances or []
             all_healthy = all(instance.health_status == 'Healthy' for instance in group_instances)
             scalinggroups.append(dict(
@@ -200,7 +219,7 @@ class ScalingGroupsJsonView(LandingPageView):
                 status='Healthy' if all_healthy else 'Unhealthy',
                 alarm_status=alarm_status,
             ))
-        return dict(results=scalinggroups)
+        return self.get_paged_results(scalinggroups)
 
     @view_config(route_name='scalinggroup_names_json', renderer='json', request_method='GET')
     def scalinggroup_names_json(self):
@@ -389,13 +408,10 @@ class ScalingGroupView(BaseScalingGroupView, DeleteScalingGroupMixin):
             with boto_error_handler(self.request, location):
                 # Need to shut down instances prior to scaling group deletion
                 self.log_request(_(u"Terminating scaling group {0} instances").format(name))
-                self.scaling_group.shutdown_instances()
-                self.wait_for_instances_to_shutdown(self.scaling_group)
                 self.log_request(_(u"Deleting scaling group {0}").format(name))
-                self.autoscale_conn.delete_auto_scaling_group(name)
-                prefix = _(u'Successfully deleted scaling group')
-                msg = u'{0} {1}'.format(prefix, name)
-                self.request.session.flash(msg, queue=Notification.SUCCESS)
+                self.start_scaling_group_delete(self.scaling_group)
+                msg = _(u'Deleting scaling group {0}. It will be removed once its instances have shut down.')
+                self.request.session.flash(msg.format(name), queue=Notification.INFO)
             return HTTPFound(location=location)
         else:
             self.request.error_messages = self.delete_form.get_errors_list()
@@ -36,6 +36,7 @@ from pyramid.view import view_config
 
 from ..forms.securitygroups import SecurityGroupForm, SecurityGroupDeleteForm, SecurityGroupsFiltersForm
 from ..i18n import _
+from ..indexes import ResourceIndex
 from ..models import Notification
 from ..views import BaseView, LandingPageView, TaggedItemView, JSONResponse
 from . import boto_error_handler
@@ -73,13 +74,9 @@ class SecurityGroupsView(LandingPageView):
     @view_config(route_name='securitygroups', renderer=TEMPLATE)
     def securitygroups_landing(self):
         # filter_keys are passed to client-side filtering in search box
-        self.filter_keys = ['name', 'description', 'vpc_id', 'tags']
+        self.filter_keys = self.get_filter_keys()
         # sort_keys are passed to sorting drop-down
-        self.sort_keys = [
-            dict(key='name', name=_(u'Name: A to Z')),
-            dict(key='-name', name=_(u'Name: Z to A')),
-            dict(key='description', name=_(u'Description')),
-        ]
+        self.sort_keys = self.get_sort_keys()
         search_facets = self.filters_form.facets
         self.render_dict.update(dict(
             filter_keys=self.filter_keys,
@@ -104,6 +101,7 @@ class SecurityGroupsView(LandingPageView):
                 with boto_error_handler(self.request, location):
                     self.log_request(_(u"Deleting security group {0}").format(name))
                     security_group.delete()
+                    self.invalidate_resource_snapshots()
             prefix = _(u'Successfully deleted security group')
             if len(securitygroup_ids) == 1:
                 msg = prefix
@@ -141,13 +139,28 @@ class SecurityGroupsView(LandingPageView):
             ))
         return rules_list
 
+    @staticmethod
+    def get_filter_keys():
+        return ['name', 'description', 'vpc_id', 'tags']
+
+    @staticmethod
+    def get_sort_keys():
+        return [
+            dict(key='name', name=_(u'Name: A to Z')),
+            dict(key='-name', name=_(u'Name: Z to A')),
+            dict(key='description', name=_(u'Description')),
+        ]
+
 
 class SecurityGroupsJsonView(LandingPageView):
     def __init__(self, request):
         super(SecurityGroupsJsonView, self).__init__(request)
+        self.filter_keys = SecurityGroupsView.get_filter_keys()
+        self.sort_keys = SecurityGroupsView.get_sort_keys()
+        self.initial_sort_key = 'name'
         self.conn = self.get_connection()
         self.vpc_conn = self.get_connection(conn_type='vpc')
-        self.vpcs = self.get_all_vpcs()
+        self.vpcs = ResourceIndex(self.get_all_vpcs())
 
     @view_config(route_name='securitygroups_json', renderer='json', request_method='POST')
     def securitygroups_json(self):
@@ -182,7 +195,7 @@ class SecurityGroupsJsonView(LandingPageView):
                     name=elb.source_security_group.name,
                     owner_id=elb.source_security_group.owner_alias
                 ))
-        return dict(results=securitygroups)
+        return self.get_paged_results(securitygroups)
 
     @view_config(route_name='securitygroups_rules_json', renderer='json', request_method='POST')
     def get_securitygroups_rules(self):
@@ -201,16 +214,14 @@ class SecurityGroupsJsonView(LandingPageView):
         return dict(results=rules_dict)
 
     def get_items(self):
-        return self.conn.get_all_security_groups() if self.conn else []
+        return self.get_resource_snapshot(
+            'securitygroups', lambda conn: conn.get_all_security_groups() if conn else [])
 
     def get_all_vpcs(self):
         return self.vpc_conn.get_all_vpcs() if self.vpc_conn else []
 
     def get_vpc_by_id(self, vpc_id):
-        for vpc in self.vpcs:
-            if vpc_id == vpc.id:
-                return vpc
-        return None
+        return self.vpcs.get(vpc_id)
 
     @view_config(route_name='internet_protocols_json', renderer='json', request_method='POST')
     def internet_protocols_json(self):
@@ -285,6 +296,7 @@ class SecurityGroupView(TaggedItemView):
             with boto_error_handler(self.request, location):
                 self.log_request(_(u"Deleting security group {0}").format(name))
                 self.security_group.delete()
+                self.invalidate_resource_snapshots()
                 prefix = _(u'Successfully deleted security group')
                 msg = u'{0} {1}'.format(prefix, name)
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
@@ -303,6 +315,7 @@ class SecurityGroupView(TaggedItemView):
             with boto_error_handler(self.request, self.request.route_path('securitygroups')):
                 self.log_request(_(u"Creating security group {0}").format(name))
                 temp_new_security_group = self.conn.create_security_group(name, description, vpc_id=vpc_network)
+                self.invalidate_resource_snapshots()
                 # Need to retrieve security group to obtain complete VPC data
                 new_security_group = self.get_security_group(temp_new_security_group.id)
                 self.add_rules(security_group=new_security_group)
@@ -340,6 +353,7 @@ class SecurityGroupView(TaggedItemView):
                 self.update_tags()
                 self.log_request(_(u"Replacing security group {0} rules").format(self.security_group.name))
                 self.update_rules()
+                self.invalidate_resource_snapshots()
             msg = _(u'Successfully modified security group')
             self.request.session.flash(msg, queue=Notification.SUCCESS)
             return HTTPFound(location=location)
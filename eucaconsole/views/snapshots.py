@@ -28,6 +28,8 @@
 Pyramid views for Eucalyptus and AWS snapshots
 
 """
+import logging
+import pylibmc
 import simplejson as json
 
 from boto.exception import BotoServerError
@@ -35,16 +37,66 @@ from boto.ec2.blockdevicemapping import BlockDeviceType, BlockDeviceMapping
 from pyramid.httpexceptions import HTTPNotFound, HTTPFound
 from pyramid.view import view_config
 
+from ..caches import short_term
 from ..forms.snapshots import SnapshotForm, DeleteSnapshotForm, RegisterSnapshotForm, SnapshotsFiltersForm
 from ..i18n import _
+from ..indexes import ResourceIndex
 from ..models import Notification
+from ..parallel import BatchOperation
 from ..views import LandingPageView, TaggedItemView, BaseView, JSONResponse
 from . import boto_error_handler
 
 import panels
 
 
-class SnapshotsView(LandingPageView):
+class ImagesBySnapshotMixin(object):
+    """Look up the account's images registered from a snapshot without rescanning every image per snapshot"""
+
+    @staticmethod
+    def index_images_by_snapshot(images):
+        """Return a dict of snapshot id to dict(id, name) for each image whose root device maps that snapshot"""
+        index = {}
+        for img in images:
+            if img.block_device_mapping is not None:
+                vol = img.block_device_mapping.get(panels.get_root_device_name(img), None)
+                if vol is not None and vol.snapshot_id:
+                    index.setdefault(vol.snapshot_id, []).append(dict(id=img.id, name=img.name))
+        return index
+
+    def get_images_by_snapshot(self):
+        """
+        Reverse index of snapshot id to registered images, built once per request from a single
+        DescribeImages call and cached in short_term until invalidate_images_cache() is called
+        """
+        if getattr(self, '_images_by_snapshot_', None) is not None:
+            return self._images_by_snapshot_
+
+        def creator():
+            return self.index_images_by_snapshot(self.conn.get_all_images(owners='self')) if self.conn else {}
+
+        if not short_term.is_configured:
+            self._images_by_snapshot_ = creator()
+        else:
+            try:
+                self._images_by_snapshot_ = short_term.get_or_create(
+                    self._get_images_by_snapshot_cache_key_(), creator)
+            except pylibmc.Error:
+                logging.warn('memcached not responding')
+                self._images_by_snapshot_ = creator()
+        return self._images_by_snapshot_
+
+    def lookup_images_by_snapshot(self, snapshot_ids):
+        """Same index as get_images_by_snapshot() for the given snapshots, but looked up fresh rather than from
+        the cache (which may miss new registrations), e.g. before deregistering the images"""
+        images = self.conn.get_all_images(owners='self', filters={'block-device-mapping.snapshot-id': snapshot_ids})
+        return self.index_images_by_snapshot(images)
+
+    def get_images_registered(self, snap_id):
+        """Return a list of dict(id, name) for images registered from the snapshot, or None if there are none"""
+        return self.get_images_by_snapshot().get(snap_id) or None
+
+
+class SnapshotsView(LandingPageView, ImagesBySnapshotMixin):
     VIEW_TEMPLATE = '../templates/snapshots/snapshots.pt'
 
     def __init__(self, request):
@@ -60,11 +112,12 @@ class SnapshotsView(LandingPageView):
             prefix=self.prefix,
             delete_form=self.delete_form,
             register_form=self.register_form,
+            page_size=self.get_page_size(),
         )
 
     @view_config(route_name='snapshots', renderer=VIEW_TEMPLATE)
     def snapshots_landing(self):
-        filter_keys = ['id', 'name', 'volume_size', 'start_time', 'tags', 'volume_id', 'volume_name', 'status']
+        filter_keys = self.get_filter_keys()
         filters_form = SnapshotsFiltersForm(self.request, formdata=self.request.params or None)
         search_facets = filters_form.facets
 
@@ -82,7 +135,6 @@ class SnapshotsView(LandingPageView):
     def snapshots_delete(self):
         snapshot_id_param = self.request.params.get('snapshot_id')
         snapshot_ids = [snapshot_id.strip() for snapshot_id in snapshot_id_param.split(',')]
-        snapshot_names = []
         # NOTE: could optimize by requiring snapshot name as param and avoid above CLC fetch
         location = self.get_redirect_location('snapshots')
         # Handle delete operation on volume-snapshots page
@@ -90,19 +142,33 @@ class SnapshotsView(LandingPageView):
         if volume_id:
             location = self.request.route_path('volume_snapshots', id=volume_id)
         if self.delete_form.validate():
-            for snapshot_id in snapshot_ids:
+            with boto_error_handler(self.request, location):
+                snapshots = self.conn.get_all_snapshots(snapshot_ids=snapshot_ids)
+                images_by_snapshot = self.lookup_images_by_snapshot(snapshot_ids)
+
+            def delete_snapshot(snapshot):
+                for img in images_by_snapshot.get(snapshot.id, []):
+                    self.log_request(_(u"Deregistering image {0}").format(img['id']))
+                    self.conn.deregister_image(img['id'])
+                self.log_request(_(u"Deleting snapshot {0}").format(snapshot.id))
+                snapshot.delete()
+
+            batch = BatchOperation(delete_snapshot, max_workers=self.get_parallel_workers())
+            batch.run(snapshots)
+            if any(snapshot.id in images_by_snapshot for snapshot in snapshots):
+                # Clear images cache
+                self.invalidate_images_cache()
+            self.invalidate_resource_snapshots()
+            failed = set(snapshot.id for snapshot, err in batch.errors)
+            snapshot_names = [
+                TaggedItemView.get_display_name(snapshot) for snapshot in snapshots if snapshot.id not in failed]
+            if batch.errors:
+                if snapshot_names:
+                    prefix = _(u'Successfully deleted snapshots ')
+                    msg = u'{prefix} {name}'.format(prefix=prefix, name=', '.join(snapshot_names))
+                    self.request.session.flash(msg, queue=Notification.SUCCESS)
                 with boto_error_handler(self.request, location):
-                    snapshot = self.get_snapshot(snapshot_id)
-                    snapshot_names.append(TaggedItemView.get_display_name(snapshot))
-                    images_registered = self.get_images_registered(snapshot_id)
-                    if images_registered is not None:
-                        for img in images_registered:
-                            self.log_request(_(u"Deregistering image {0}").format(img.id))
-                            img.deregister()
-                        # Clear images cache
-                        self.invalidate_images_cache()
-                    self.log_request(_(u"Deleting snapshot {0}").format(snapshot_id))
-                    snapshot.delete()
+                    raise batch.errors[0][1]
             if len(snapshot_ids) == 1:
                 prefix = _(u'Successfully deleted snapshot')
             else:
@@ -122,21 +188,11 @@ class SnapshotsView(LandingPageView):
         if images is not None:
             image_list = []
             for img in images:
-                image_list.append(dict(id=img.id, name=img.name))
+                image_list.append(dict(id=img['id'], name=img['name']))
             return dict(results=image_list)
         else:
             return dict(results=None)
 
-    def get_images_registered(self, snap_id):
-        ret = []
-        images = self.conn.get_all_images(owners='self')
-        for img in images:
-            if img.block_device_mapping is not None:
-                vol = img.block_device_mapping.get(panels.get_root_device_name(img), None)
-                if vol is not None and snap_id == vol.snapshot_id:
-                    ret.append(img)
-        return ret or None
-
     @view_config(route_name='snapshots_register', renderer=VIEW_TEMPLATE, request_method='POST')
     def snapshots_register(self):
         snapshot_id = self.request.params.get('snapshot_id')
@@ -180,6 +236,11 @@ class SnapshotsView(LandingPageView):
             return snapshots_list[0] if snapshots_list else None
         return None
 
+    @staticmethod
+    def get_filter_keys():
+        """filter_keys are passed to client-side filtering in search box"""
+        return ['id', 'name', 'volume_size', 'start_time', 'tags', 'volume_id', 'volume_name', 'status']
+
     @staticmethod
     def get_sort_keys():
         """sort_keys are passed to sorting drop-down on landing page"""
@@ -197,6 +258,9 @@ class SnapshotsView(LandingPageView):
 class SnapshotsJsonView(LandingPageView):
     def __init__(self, request, conn=None, enable_filters=True, **kwargs):
         super(SnapshotsJsonView, self).__init__(request, **kwargs)
+        self.filter_keys = SnapshotsView.get_filter_keys()
+        self.sort_keys = SnapshotsView.get_sort_keys()
+        self.initial_sort_key = '-start_time'
         self.conn = conn or self.get_connection()
         self.enable_filters = enable_filters
 
@@ -204,41 +268,44 @@ class SnapshotsJsonView(LandingPageView):
     def snapshots_json(self):
         if not(self.is_csrf_valid()):
             return JSONResponse(status=400, message="missing CSRF token")
-        snapshots = []
         if self.enable_filters:
             filtered_snapshots = self.filter_items(self.get_items())
         else:
             filtered_snapshots = self.get_items()
         volume_ids = list(set([snapshot.volume_id for snapshot in filtered_snapshots]))
         # NOTE: Do not pass volume_ids directly to conn.get_all_volumes(), see GUI-2415
-        volumes = self.conn.get_all_volumes(filters={'volume_id': volume_ids}) if self.conn else []
-        for snapshot in filtered_snapshots:
-            volume = [volume for volume in volumes if volume.id == snapshot.volume_id]
-            volume_name = ''
-            exists_volume = True 
-            if volume:
-                volume_name = TaggedItemView.get_display_name(volume[0], escapebraces=False)
-            else:
-                exists_volume = False
-            snapshots.append(dict(
-                id=snapshot.id,
-                description=snapshot.description,
-                name=TaggedItemView.get_display_name(snapshot, escapebraces=False),
-                progress=snapshot.progress,
-                transitional=self.is_transitional(snapshot),
-                start_time=snapshot.start_time,
-                status=snapshot.status,
-                tags=TaggedItemView.get_tags_display(snapshot.tags, wrap_width=36),
-                volume_id=snapshot.volume_id,
-                volume_name=volume_name,
-                sortable_volume=volume_name or snapshot.volume_id,
-                volume_size=snapshot.volume_size,
-                exists_volume=exists_volume,
-            ))
-        return dict(results=snapshots)
+        volumes = ResourceIndex(self.conn.get_all_volumes(filters={'volume_id': volume_ids}) if self.conn else [])
+
+        def iter_snapshots():
+            for snapshot in filtered_snapshots:
+                volume = volumes.get(snapshot.volume_id)
+                volume_name = ''
+                exists_volume = True 
+                if volume:
+                    volume_name = TaggedItemView.get_display_name(volume, escapebraces=False)
+                else:
+                    exists_volume = False
+                yield dict(
+                    id=snapshot.id,
+                    description=snapshot.description,
+                    name=TaggedItemView.get_display_name(snapshot, escapebraces=False),
+                    progress=snapshot.progress,
+                    transitional=self.is_transitional(snapshot),
+                    start_time=snapshot.start_time,
+                    status=snapshot.status,
+                    tags=TaggedItemView.get_tags_display(snapshot.tags, wrap_width=36),
+                    volume_id=snapshot.volume_id,
+                    volume_name=volume_name,
+                    sortable_volume=volume_name or snapshot.volume_id,
+                    volume_size=snapshot.volume_size,
+                    exists_volume=exists_volume,
+                )
+
+        return self.get_paged_results(iter_snapshots())
 
     def get_items(self):
-        return self.conn.get_all_snapshots(owner='self') if self.conn else []
+        return self.get_resource_snapshot(
+            'snapshots', lambda conn: conn.get_all_snapshots(owner='self') if conn else [])
 
     @staticmethod
     def is_transitional(snapshot):
@@ -247,7 +314,7 @@ class SnapshotsJsonView(LandingPageView):
         return int(snapshot.progress.replace('%', '')) < 100
 
 
-class SnapshotView(TaggedItemView):
+class SnapshotView(TaggedItemView, ImagesBySnapshotMixin):
     VIEW_TEMPLATE = '../templates/snapshots/snapshot_view.pt'
 
     def __init__(self, request, ec2_conn=None, **kwargs):
@@ -296,16 +363,6 @@ class SnapshotView(TaggedItemView):
             return len(self.snapshot_form.volume_id.choices)
         return 0
 
-    def get_images_registered(self, snap_id):
-        ret = []
-        images = self.conn.get_all_images(owners='self')
-        for img in images:
-            if img.block_device_mapping is not None:
-                vol = img.block_device_mapping.get(panels.get_root_device_name(img), None)
-                if vol is not None and snap_id == vol.snapshot_id:
-                    ret.append(img)
-        return ret or None
-
     def get_snapshot_name(self):
         if self.snapshot:
             return TaggedItemView.get_display_name(self.snapshot)
@@ -346,6 +403,7 @@ class SnapshotView(TaggedItemView):
             with boto_error_handler(self.request, self.request.route_path('snapshots')):
                 self.log_request(_(u"Creating snapshot from volume {0}").format(volume_id))
                 snapshot = self.conn.create_snapshot(volume_id, description=description)
+                self.invalidate_resource_snapshots()
                 # Add name tag
                 if name:
                     snapshot.add_tag('Name', name)
@@ -365,14 +423,17 @@ class SnapshotView(TaggedItemView):
         if self.snapshot and self.delete_form.validate():
             snapshot_name = TaggedItemView.get_display_name(self.snapshot)
             with boto_error_handler(self.request, self.request.route_path('snapshots')):
-                if self.images_registered is not None:
-                    for img in self.images_registered:
-                        self.log_request(_(u"Deregistering image {0}").format(img.id))
-                        img.deregister()
+                # images_registered comes from the cached index and is only for display
+                images_registered = self.lookup_images_by_snapshot([self.snapshot.id]).get(self.snapshot.id)
+                if images_registered:
+                    for img in images_registered:
+                        self.log_request(_(u"Deregistering image {0}").format(img['id']))
+                        self.conn.deregister_image(img['id'])
                     # Clear images cache
                     self.invalidate_images_cache()
                 self.log_request(_(u"Deleting snapshot {0}").format(self.snapshot.id))
                 self.snapshot.delete()
+                self.invalidate_resource_snapshots()
                 prefix = _(u'Successfully deleted snapshot')
                 msg = u'{prefix} {name}'.format(prefix=prefix, name=snapshot_name)
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
@@ -29,25 +29,30 @@ Pyramid views for Eucalyptus and AWS CloudFormation stacks
 
 """
 import base64
+import copy
 import simplejson as json
 import hashlib
 import logging
-import os
 import fnmatch
 import time
+import threading
 import urllib2
+from collections import OrderedDict
 from urllib2 import HTTPError, URLError
 from boto.exception import BotoServerError
+from dogpile.cache.api import NO_VALUE
 
 from pyramid.httpexceptions import HTTPFound, HTTPNotFound
 from pyramid.view import view_config
 
+from ..caches import euca_key_generator, short_term, cache_get_multi, cache_set_multi
 from ..i18n import _
 from ..forms import ChoicesManager, CFSampleTemplateManager
 
 from ..forms.stacks import StacksDeleteForm, StacksFiltersForm, StacksCreateForm 
 from ..models import Notification
 from ..models.auth import User
+from ..models.stacks import aws_template_analyzer
 from ..views import LandingPageView, BaseView, TaggedItemView, JSONResponse, JSONError
 from . import boto_error_handler
 from .. import utils
@@ -55,6 +60,51 @@ from .. import utils
 TEMPLATE_BODY_LIMIT = 460800
 
 
+class ParsedTemplateCache(object):
+    """
+    Parsed CloudFormation templates and their AWS compatibility analysis, keyed by the MD5 of the template body
+
+    The MD5 hex digest matches the ETag of a template stored in S3, so a template already in the
+    template bucket can be looked up without downloading it.  Parsed templates are shared between
+    requests and must be treated as read-only; copy one before modifying it.
+    """
+    MAX_ENTRIES = 50
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries_ = OrderedDict()
+        self._lock_ = threading.Lock()
+
+    @staticmethod
+    def get_content_hash(template_body):
+        if isinstance(template_body, unicode):
+            template_body = template_body.encode('utf-8')
+        return hashlib.md5(template_body).hexdigest()
+
+    def get(self, content_hash):
+        """Return the cache entry (a dict with 'parsed' and, once analyzed, 'aws_exceptions') or None"""
+        with self._lock_:
+            entry = self._entries_.pop(content_hash, None)
+            if entry is not None:
+                self._entries_[content_hash] = entry
+            return entry
+
+    def parse(self, template_body, content_hash=None):
+        """Return (content_hash, parsed template), parsing the body only if it isn't cached"""
+        content_hash = content_hash or self.get_content_hash(template_body)
+        entry = self.get(content_hash)
+        if entry is None:
+            entry = dict(parsed=json.loads(template_body))
+            with self._lock_:
+                self._entries_[content_hash] = entry
+                while len(self._entries_) > self.max_entries:
+                    self._entries_.popitem(last=False)
+        return content_hash, entry['parsed']
+
+
+parsed_templates = ParsedTemplateCache()
+
+
 class StackMixin(object):
     def get_stack(self):
         if self.cloudformation_conn:
@@ -129,7 +179,7 @@ class StacksView(LandingPageView):
         self.cloudformation_conn = self.get_connection(conn_type="cloudformation")
         self.initial_sort_key = 'name'
         self.prefix = '/stacks'
-        self.filter_keys = ['name', 'create-time']
+        self.filter_keys = self.get_filter_keys()
         self.sort_keys = self.get_sort_keys()
         self.json_items_endpoint = self.get_json_endpoint('stacks_json')
         self.delete_form = StacksDeleteForm(request, formdata=request.params or None)
@@ -168,6 +218,10 @@ class StacksView(LandingPageView):
         form_errors = ', '.join(self.delete_form.get_errors_list())
         return JSONResponse(status=400, message=form_errors)  # Validation failure = bad request
 
+    @staticmethod
+    def get_filter_keys():
+        return ['name', 'create-time']
+
     @staticmethod
     def get_sort_keys():
         return [
@@ -182,6 +236,9 @@ class StacksJsonView(LandingPageView):
     """JSON response view for Stack landing page"""
     def __init__(self, request):
         super(StacksJsonView, self).__init__(request)
+        self.filter_keys = StacksView.get_filter_keys()
+        self.sort_keys = StacksView.get_sort_keys()
+        self.initial_sort_key = 'name'
         self.cloudformation_conn = self.get_connection(conn_type="cloudformation")
         with boto_error_handler(request):
             self.items = self.get_items()
@@ -217,7 +274,7 @@ class StacksJsonView(LandingPageView):
                     name=name,
                     transitional=is_transitional,
                 ))
-            return dict(results=stacks_array)
+            return self.get_paged_results(stacks_array)
 
     def get_items(self):
         return self.cloudformation_conn.describe_stacks() if self.cloudformation_conn else []
@@ -418,16 +475,35 @@ class StackWizardView(BaseView, StackMixin):
     """View for Create Stack wizard"""
     TEMPLATE = '../templates/stacks/stack_wizard.pt'
     TEMPLATE_UPDATE = '../templates/stacks/stack_update.pt'
+    # Option lists offered for template parameters: name -> (method, kwargs)
+    PARAM_OPTION_PROVIDERS = {
+        'keys': ('get_key_options', {}),
+        'groups': ('get_group_options', {}),
+        'kernels': ('get_image_options', dict(img_type='kernel')),
+        'ramdisks': ('get_image_options', dict(img_type='ramdisk')),
+        'certs': ('get_cert_options', {}),
+        'instance_profiles': ('get_instance_profile_options', {}),
+        'instances': ('get_instance_options', {}),
+        'volumes': ('get_volume_options', {}),
+        'vmtypes': ('get_vmtype_options', {}),
+        'zones': ('get_availability_zone_options', {}),
+        'images': ('get_image_options', {}),
+        'images_self': ('get_image_options', dict(owner_alias='self')),
+        'images_amazon': ('get_image_options', dict(owner_alias='amazon')),
+    }
 
     def __init__(self, request):
         super(StackWizardView, self).__init__(request)
+        self.param_options = {}
+        self.template_content_hash = None
         self.cloudformation_conn = self.get_connection(conn_type='cloudformation')
         self.title_parts = [_(u'Stack'), _(u'Create')]
         self.create_form = None
+        self.template_samples_bucket = None
         location = self.request.route_path('stacks')
         with boto_error_handler(self.request, location):
-            s3_bucket = self.get_template_samples_bucket()
-            self.create_form = StacksCreateForm(request, s3_bucket)
+            self.template_samples_bucket = self.get_template_samples_bucket()
+            self.create_form = StacksCreateForm(request, self.template_samples_bucket)
             self.stack = self.get_stack()
         self.render_dict = dict(
             create_form=self.create_form,
@@ -538,7 +614,7 @@ class StackWizardView(BaseView, StackMixin):
                 exception_list = []
                 if self.request.params.get('inputtype') != 'sample' and \
                    self.request.session.get('cloud_type', 'euca') == 'euca':
-                    exception_list = StackWizardView.identify_aws_template(parsed)
+                    exception_list = self.get_aws_exceptions(parsed)
                 if len(exception_list) > 0:
                     # massage for the browser
                     service_list = []
@@ -604,15 +680,12 @@ class StackWizardView(BaseView, StackMixin):
         """
         with boto_error_handler(self.request):
             (template_url, template_name, parsed) = self.parse_store_template()
+            parsed = copy.deepcopy(parsed)  # the parsed template is shared, see parse_store_template
             StackWizardView.identify_aws_template(parsed, modify=True)
             template_body = json.dumps(parsed, indent=2)
 
             # now, store it back in S3
-            bucket = self.get_create_template_bucket(create=True)
-            key = bucket.get_key(template_name)
-            if key is None:
-                key = bucket.new_key(template_name)
-            key.set_contents_from_string(template_body)
+            self.store_template(template_name, template_body)
 
             params = []
             if 'Parameters' in parsed.keys():
@@ -657,8 +730,16 @@ class StackWizardView(BaseView, StackMixin):
             List<AWS::EC2::VPC::Id>
         ]
         """
-        params = []
+        is_aws = self.request.session.get('cloud_type', 'euca') == 'aws'
+        param_option_keys = []
         for name in parsed['Parameters']:
+            param = parsed['Parameters'][name]
+            param_option_keys.append(self.get_param_option_keys(name, param, is_aws=is_aws))
+        # fetch every option list the template needs up front, once each
+        param_options = self.get_param_options(
+            [key for option_key, image_keys in param_option_keys for key in [option_key] + image_keys if key])
+        params = []
+        for name, (option_key, image_keys) in zip(parsed['Parameters'], param_option_keys):
             param = parsed['Parameters'][name]
             param_type = param['Type']
             param_vals = {
@@ -678,29 +759,8 @@ class StackWizardView(BaseView, StackMixin):
                 param_vals['constraint'] = param['ConstraintDescription']
             if 'AllowedValues' in param:
                 param_vals['options'] = [(val, val) for val in param['AllowedValues']]
-            # guess at more options
-            name_l = name.lower()
-            if 'key' in name_l or param_type == 'AWS::EC2::KeyPair::KeyName':
-                param_vals['options'] = self.get_key_options()  # fetch keypair names
-            if 'security' in name_l and 'group' in name_l or param_type == 'AWS::EC2::SecurityGroup::GroupName':
-                param_vals['options'] = self.get_group_options()  # fetch security group names
-            if 'kernel' in name_l:
-                param_vals['options'] = self.get_image_options(img_type='kernel')  # fetch kernel ids
-            if 'ramdisk' in name_l:
-                param_vals['options'] = self.get_image_options(img_type='ramdisk')  # fetch ramdisk ids
-            if 'cert' in name_l:
-                param_vals['options'] = self.get_cert_options()  # fetch server cert names
-            if 'instance' in name_l and 'profile' in name_l:
-                param_vals['options'] = self.get_instance_profile_options()
-            if ('instance' in name_l and 'instancetype' not in name_l) or param_type == 'AWS::EC2::Instance::Id':
-                param_vals['options'] = self.get_instance_options()  # fetch instances
-            if 'volume' in name_l or param_type == 'AWS::EC2::Volume::Id':
-                param_vals['options'] = self.get_volume_options()  # fetch volumes
-            if ('vmtype' in name_l or 'instancetype' in name_l) and \
-                    'options' not in param_vals.keys():
-                param_vals['options'] = self.get_vmtype_options()
-            if 'zone' in name_l or param_type == 'AWS::EC2::AvailabilityZone::Name':
-                param_vals['options'] = self.get_availability_zone_options()
+            if option_key:
+                param_vals['options'] = param_options[option_key]
             # if no default, and options are a single value, set that as default
             if 'default' not in param_vals.keys() and \
                     'options' in param_vals.keys() and len(param_vals['options']) == 1:
@@ -708,18 +768,76 @@ class StackWizardView(BaseView, StackMixin):
             param_vals['chosen'] = True if \
                 'options' in param_vals.keys() and len(param_vals['options']) > 9 \
                 else False
-            if 'image' in name_l or param_type == 'AWS::EC2::Image::Id':
-                if self.request.session.get('cloud_type', 'euca') == 'aws':
-                    # populate with amazon and user's images
-                    param_vals['options'] = self.get_image_options(owner_alias='self')
-                    param_vals['options'].extend(self.get_image_options(owner_alias='amazon'))
-                else:
-                    param_vals['options'] = self.get_image_options()  # fetch image ids
+            if image_keys:
+                param_vals['options'] = [option for key in image_keys for option in param_options[key]]
                 # force image param to use chosen
                 param_vals['chosen'] = True
             params.append(param_vals)
         return params
 
+    @staticmethod
+    def get_param_option_keys(name, param, is_aws=False):
+        """
+        Guess which option lists apply to a template parameter from its name and type.
+        Returns a tuple of (option_key, image_keys) naming entries in PARAM_OPTION_PROVIDERS;
+        option_key is None when no option list applies and image_keys is empty for non-image params.
+        """
+        param_type = param['Type']
+        name_l = name.lower()
+        option_key = None
+        if 'key' in name_l or param_type == 'AWS::EC2::KeyPair::KeyName':
+            option_key = 'keys'  # keypair names
+        if 'security' in name_l and 'group' in name_l or param_type == 'AWS::EC2::SecurityGroup::GroupName':
+            option_key = 'groups'  # security group names
+        if 'kernel' in name_l:
+            option_key = 'kernels'
+        if 'ramdisk' in name_l:
+            option_key = 'ramdisks'
+        if 'cert' in name_l:
+            option_key = 'certs'  # server cert names
+        if 'instance' in name_l and 'profile' in name_l:
+            option_key = 'instance_profiles'
+        if ('instance' in name_l and 'instancetype' not in name_l) or param_type == 'AWS::EC2::Instance::Id':
+            option_key = 'instances'
+        if 'volume' in name_l or param_type == 'AWS::EC2::Volume::Id':
+            option_key = 'volumes'
+        if ('vmtype' in name_l or 'instancetype' in name_l) and \
+                option_key is None and 'AllowedValues' not in param:
+            option_key = 'vmtypes'
+        if 'zone' in name_l or param_type == 'AWS::EC2::AvailabilityZone::Name':
+            option_key = 'zones'
+        image_keys = []
+        if 'image' in name_l or param_type == 'AWS::EC2::Image::Id':
+            # on AWS, populate with amazon and user's images
+            image_keys = ['images_self', 'images_amazon'] if is_aws else ['images']
+        return option_key, image_keys
+
+    def get_param_options(self, option_keys):
+        """
+        Return a dict of option lists keyed by PARAM_OPTION_PROVIDERS name, fetching each list at most once
+        per request.  Lists not found in short_term are fetched concurrently and then cached there.
+        """
+        option_keys = [key for key in set(option_keys) if key not in self.param_options]
+        cache_keys = [self._param_options_cache_key_(key) for key in option_keys]
+        calls = self.get_parallel_calls()
+        for key, cached in zip(option_keys, cache_get_multi(short_term, cache_keys)):
+            if cached is NO_VALUE:
+                method_name, kwargs = self.PARAM_OPTION_PROVIDERS[key]
+                calls.add(key, getattr(self, method_name), **kwargs)
+            else:
+                self.param_options[key] = cached
+        if calls.calls:
+            results = calls.run()
+            self.param_options.update(results)
+            cache_set_multi(short_term, dict(
+                (self._param_options_cache_key_(key), options) for key, options in results.items()))
+        return self.param_options
+
+    def _param_options_cache_key_(self, option_key):
+        # IAM policies can limit what each user may describe, so the options are cached per user
+        scope = self._get_resource_snapshot_scope_() + (self._get_cache_identity_(),)
+        return euca_key_generator('stack_param_options', None)(None, option_key, *scope)
+
     def get_key_options(self):
         conn = self.get_connection()
         keys = conn.get_all_key_pairs()
@@ -847,14 +965,24 @@ class StackWizardView(BaseView, StackMixin):
         return self.render_dict
 
     def parse_store_template(self):
+        """
+        Returns (template_url, template_name, parsed) for the template in the request, storing it in the
+        template bucket unless an identical copy is there already.  The parsed template is shared through
+        parsed_templates, so copy it before modifying it.
+        """
         s3_template_key = self.request.params.get('s3-template-key')
         if s3_template_key:
             # pull previously uploaded...
             bucket = self.get_create_template_bucket(create=True)
             key = bucket.get_key(s3_template_key)
             template_name = s3_template_key
-            template_body = key.get_contents_as_string()
             template_url = self.get_s3_template_url(key)
+            content_hash = key.etag.strip('"') if key.etag else None
+            entry = parsed_templates.get(content_hash) if content_hash else None
+            if entry is not None:
+                self.template_content_hash = content_hash
+                return template_url, template_name, entry['parsed']
+            template_body = key.get_contents_as_string()
         else:
             template_name = self.request.params.get('sample-template')
             template_url = self.request.params.get('template-url')
@@ -901,154 +1029,43 @@ class StackWizardView(BaseView, StackMixin):
                 response = self.cloudformation_conn.get_template(self.stack.stack_name)
                 template_body = response['GetTemplateResponse']['GetTemplateResult']['TemplateBody']
             else:
-                s3_bucket = self.get_template_samples_bucket()
-                mgr = CFSampleTemplateManager(s3_bucket)
-                templates = mgr.get_template_list()
-                for directory, files in templates:
-                    if template_name in [f for (name, f) in files]:
-                        if directory == 's3':
-                            s3_key = s3_bucket.get_key(template_name)
-                            template_body = s3_key.get_contents_as_string()
-                        else:
-                            fd = open(os.path.join(directory, template_name), 'r')
-                            template_body = fd.read()
+                mgr = CFSampleTemplateManager(self.template_samples_bucket)
+                template_body = mgr.get_template_body(template_name)
 
             # now that we have it, store in S3
-            bucket = self.get_create_template_bucket(create=True)
-            key = bucket.get_key(template_name)
-            if key is None:
-                key = bucket.new_key(template_name)
-            key.set_contents_from_string(template_body)
+            key = self.store_template(template_name, template_body)
             template_url = self.get_s3_template_url(key)
 
-        parsed = json.loads(template_body)
+        self.template_content_hash, parsed = parsed_templates.parse(template_body)
         return template_url, template_name, parsed
 
+    def store_template(self, template_name, template_body):
+        """Store the template in the template bucket, skipping the upload if the key already has this content"""
+        bucket = self.get_create_template_bucket(create=True)
+        key = bucket.get_key(template_name)
+        if key is None:
+            key = bucket.new_key(template_name)
+        elif key.etag and key.etag.strip('"') == ParsedTemplateCache.get_content_hash(template_body):
+            return key
+        key.set_contents_from_string(template_body)
+        return key
+
+    def get_aws_exceptions(self, parsed):
+        """identify_aws_template() for the template last returned by parse_store_template, cached by content"""
+        entry = parsed_templates.get(self.template_content_hash)
+        if entry is None or entry['parsed'] is not parsed:
+            return StackWizardView.identify_aws_template(parsed)
+        if 'aws_exceptions' not in entry:
+            entry['aws_exceptions'] = StackWizardView.identify_aws_template(parsed)
+        return entry['aws_exceptions']
+
     @staticmethod
     def identify_aws_template(parsed, modify=False):
         """
-        drawn from here:
-        http://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-template-resource-type-ref.html
-        and https://www.eucalyptus.com/docs/eucalyptus/4.1.1/index.html#cloudformation/cf_overview.html
+        Returns the resources, properties and image references in the template that Eucalyptus doesn't support,
+        see AWSTemplateAnalyzer.analyze().  When modify is set, the template is also converted in place.
         """
-        aws_resource_prefixes = [
-            'AWS::AutoScaling::LifecycleHook',
-            'AWS::AutoScaling::ScheduledAction',
-            'AWS::CloudFront',
-            'AWS::CloudTrail',
-            'AWS::DynamoDB',
-            'AWS::EC2::VPCEndpoint',
-            'AWS::EC2::VPCPeeringConnection',
-            'AWS::EC2::VPNConnection',
-            'AWS::EC2::VPNConnectionRoute',
-            'AWS::EC2::VPNGateway',
-            'AWS::EC2::VPNGatewayRoutePropagation',
-            'AWS::ElastiCache',
-            'AWS::ElasticBeanstalk',
-            'AWS::Kinesis',
-            'AWS::Logs',
-            'AWS::OpsWOrks',
-            'AWS::Redshift',
-            'AWS::RDS',
-            'AWS::Route53',
-            'AWS::S3::BucketPolicy',
-            'AWS::SDB',
-            'AWS::SNS',
-            'AWS::SQS'
-        ]
-        unsupported_properties = [
-            {'resource': 'AWS::AutoScaling::AutoScalingGroup', 'properties': [
-                'HealthCheckType', 'Tags', 'VpcZoneIdentifier'
-            ]},
-            {'resource': 'AWS::AutoScaling::LaunchConiguration', 'properties': [
-                'AssociatePublicIpAddress'
-            ]},
-            {'resource': 'AWS::EC2::EIP', 'properties': [
-                'Domain'
-            ]},
-            {'resource': 'AWS::EC2::Volume', 'properties': [
-                'HealthCheckType', 'Tags'
-            ]},
-            {'resource': 'AWS::ElasticLoadBalancing::LoadBalancer', 'properties': [
-                'AccessLoggingPolicy', 'ConnectionDrainingPolicy',
-                'Policies.InstancePorts', 'Policies.LoadBalancerPorts'
-            ]},
-            {'resource': 'AWS::IAM::AccessKey', 'properties': [
-                'Serial'
-            ]}
-        ]
-        ret = []
-        # first pass, find non-euca resources
-        for name in parsed['Resources']:
-            resource = parsed['Resources'][name]
-            for prefix in aws_resource_prefixes:
-                if resource['Type'].find(prefix) == 0:
-                    ret.append({'name': name, 'type': prefix})
-
-        # second pass, find non-euca properties
-        for name in parsed['Resources']:
-            resource = parsed['Resources'][name]
-            for props in unsupported_properties:
-                if resource['Type'].find(props['resource']) == 0:
-                    for prop in props['properties']:
-                        if 'Properties' in resource and prop in resource['Properties'].keys():
-                            ret.append({
-                                'name': prop,
-                                'type': props['resource'],
-                                'property': True
-                            })
-
-        # third pass, find refs to cloud-specific resources
-        def find_image_ref(_name, item):
-            if _name == 'Parameters':
-                return  # ignore refs already in params
-            if type(item) is dict and 'ImageId' in item.keys():
-                img_item = item['ImageId']
-                if isinstance(img_item, dict) and 'Ref' not in img_item.keys():
-                    # check for emi lookup in map
-                    if 'Fn::FindInMap' in img_item.keys():
-                        map_name = img_item['Fn::FindInMap'][0]
-                        if parsed['Mappings'] and parsed['Mappings'][map_name]:
-                            img_map = parsed['Mappings'][map_name]
-                            if json.dumps(img_map).find('emi-') > -1:
-                                return
-                    ret.append({
-                        'name': 'ImageId',
-                        'type': 'Parameter',
-                        'item': item})
-        StackWizardView.traverse(parsed, find_image_ref)
-
+        ret = aws_template_analyzer.analyze(parsed)
         if modify:
-            for res in ret:
-                # remove resources found in pass 1
-                for name in parsed['Resources'].keys():
-                    if res['name'] == name and 'property' not in res.keys():
-                        del parsed['Resources'][name]
-                # modify resource refs into params
-                if res['name'] == 'ImageId':
-                    res['item']['ImageId'] = {'Ref': 'ImageId'}
-                    parsed['Parameters']['ImageId'] = dict(
-                        Description='Image required to run this template',
-                        Type='String'
-                    )
-            # and, because we provide instance types, remove 'AllowedValues' for InstanceType
-            if 'Parameters' in parsed.keys():
-                for name in parsed['Parameters']:
-                    if name == 'InstanceType' and 'AllowedValues' in parsed['Parameters'][name]:
-                        del parsed['Parameters'][name]['AllowedValues']
-
+            aws_template_analyzer.convert(parsed, ret)
         return ret
-
-    @staticmethod
-    def traverse(graph, func, depth=0):
-        if depth > 5:   # safety valve
-            return
-        if type(graph) is list:
-            for item in graph:
-                func(None, item)
-                StackWizardView.traverse(item, func, depth + 1)
-        if type(graph) is dict:
-            for key in graph:
-                item = graph[key]
-                func(key, item)
-                StackWizardView.traverse(item, func, depth + 1)
@@ -52,6 +52,10 @@ from ..views import BaseView, LandingPageView, JSONResponse
 from . import boto_error_handler
 
 
+# Users summarized per users_summary_json request (the users grid asks for a batch of visible rows at a time)
+MAX_USER_SUMMARIES = 100
+
+
 class PasswordGeneration(object):
     @staticmethod
     def generate_password():
@@ -63,10 +67,58 @@ class PasswordGeneration(object):
         return ''.join(random.choice(chars) for i in range(12))
 
 
-class UsersView(LandingPageView):
-    TEMPLATE = '../templates/users/users.pt'
+class UserSummaryMixin(object):
+    """Password, enabled state and active key count for users, cached per user in short_term
+
+    Expects self.conn to be an IAM connection.  Call invalidate_iam_caches() after changing a user's
+    login profile, policies or access keys.
+
+    """
     EUCA_DENY_POLICY = 'euca-console-deny-access-policy'
 
+    def fetch_user_summary(self, user_name):
+        has_password = False
+        try:
+            self.conn.get_login_profiles(user_name=user_name)
+            # this call returns 404 if no password found
+            has_password = True
+        except BotoServerError:
+            pass
+        user_enabled = True
+        try:
+            if user_name != 'admin':
+                policies = self.conn.get_all_user_policies(user_name=user_name)
+                for policy in policies.policy_names:
+                    if policy == self.EUCA_DENY_POLICY and has_password is False:
+                        user_enabled = False
+        except BotoServerError:
+            pass
+        keys = []
+        if user_enabled:  # we won't spend time fetching the keys if the user is disabled
+            try:
+                keys = self.conn.get_all_access_keys(user_name=user_name)
+                keys = [key for key in keys.list_access_keys_result.access_key_metadata if key.status == 'Active']
+            except BotoServerError:
+                pass
+        return dict(
+            user_name=user_name,
+            num_keys=len(keys),
+            has_password=has_password,
+            user_enabled=user_enabled,
+        )
+
+    def get_user_summaries(self, user_names):
+        """Summaries in the order of user_names, fetching the uncached ones concurrently
+
+        Users whose summary could not be fetched in time are left out.
+        """
+        summaries = self.get_cached_iam_lookups('user_summary', user_names, self.fetch_user_summary)
+        return [summaries[name] for name in user_names if name in summaries]
+
+
+class UsersView(LandingPageView, UserSummaryMixin):
+    TEMPLATE = '../templates/users/users.pt'
+
     def __init__(self, request):
         super(UsersView, self).__init__(request)
         self.title_parts = [_(u'Users')]
@@ -112,6 +164,7 @@ class UsersView(LandingPageView):
             statements = [{'Effect': 'Deny', 'Action': '*', 'Resource': '*'}]
             policy['Statement'] = statements
             self.conn.put_user_policy(user_name, self.EUCA_DENY_POLICY, json.dumps(policy))
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully disabled user"))
 
     @view_config(route_name='user_enable', request_method='POST', renderer='json')
@@ -123,6 +176,7 @@ class UsersView(LandingPageView):
             user_name = self.request.matchdict.get('name')
             self.log_request(_(u"Enabling user {0}").format(user_name))
             self.conn.delete_user_policy(user_name, self.EUCA_DENY_POLICY)
+            self.invalidate_iam_caches()
             random_password = self.request.params.get('random_password')
             if random_password == 'y':
                 password = PasswordGeneration.generate_password()
@@ -143,9 +197,7 @@ class UsersView(LandingPageView):
                 return dict(message=_(u"Successfully enabled user"))
 
 
-class UsersJsonView(BaseView):
-    EUCA_DENY_POLICY = 'euca-console-deny-access-policy'
-
+class UsersJsonView(BaseView, UserSummaryMixin):
     """Users returned as JSON"""
     def __init__(self, request):
         super(UsersJsonView, self).__init__(request)
@@ -157,22 +209,15 @@ class UsersJsonView(BaseView):
             return JSONResponse(status=400, message="missing CSRF token")
         users = []
         with boto_error_handler(self.request):
-            groups = self.conn.get_all_groups()
-            groups = groups.groups
-            for g in groups:
-                info = self.conn.get_group(group_name=g.group_name)
-                g['users'] = info.users
-            for user in self.get_items():
-                user_groups = []
-                for g in groups:
-                    if user.user_name in [u.user_name for u in g.users]:
-                        user_groups.append(g.group_name)
+            items = self.get_items()
+            membership = self.get_group_membership_index(iam_conn=self.conn)
+            for user in items:
                 users.append(dict(
                     path=user.path,
                     user_name=user.user_name,
                     user_id=user.user_id,
                     create_date=user.create_date,
-                    num_groups=len(user_groups),
+                    num_groups=len(membership.get_groups(user.user_name)),
                     arn=user.arn,
                 ))
             return dict(results=users)
@@ -180,45 +225,30 @@ class UsersJsonView(BaseView):
     @view_config(route_name='user_summary_json', renderer='json', request_method='GET')
     def user_summary_json(self):
         user_param = self.request.matchdict.get('name')
-        has_password = False
-        try:
-            self.conn.get_login_profiles(user_name=user_param)
-            # this call returns 404 if no password found
-            has_password = True
-        except BotoServerError:
-            pass
-        user_enabled = True
-        try:
-            if user_param != 'admin':
-                policies = self.conn.get_all_user_policies(user_name=user_param)
-                for policy in policies.policy_names:
-                    if policy == self.EUCA_DENY_POLICY and has_password is False:
-                        user_enabled = False
-        except BotoServerError:
-            pass
-        keys = []
-        if user_enabled:  # we won't spend time fetching the keys if the user is disabled
-            try:
-                keys = self.conn.get_all_access_keys(user_name=user_param)
-                keys = [key for key in keys.list_access_keys_result.access_key_metadata if key.status == 'Active']
-            except BotoServerError:
-                pass
-
-        return dict(
-            results=dict(
-                user_name=user_param,
-                num_keys=len(keys),
-                has_password=has_password,
-                user_enabled=user_enabled,
-            )
-        )
+        with boto_error_handler(self.request):
+            summaries = self.get_user_summaries([user_param])
+        if not summaries:
+            return JSONResponse(status=504, message=_(u"Timed out fetching the user summary"))
+        return dict(results=summaries[0])
+
+    @view_config(route_name='users_summary_json', renderer='json', request_method='POST')
+    def users_summary_json(self):
+        """Summaries for the users named by the user_name params, e.g. the rows visible in the users grid"""
+        if not(self.is_csrf_valid()):
+            return JSONResponse(status=400, message="missing CSRF token")
+        user_names = self.request.params.getall('user_name')
+        if len(user_names) > MAX_USER_SUMMARIES:
+            return JSONResponse(
+                status=400, message=u"at most {0} users may be summarized at once".format(MAX_USER_SUMMARIES))
+        with boto_error_handler(self.request):
+            return dict(results=self.get_user_summaries(user_names))
 
     def get_items(self):
         with boto_error_handler(self.request):
             return self.conn.get_all_users().users
 
 
-class UserView(BaseView):
+class UserView(BaseView, UserSummaryMixin):
     """Views for single User"""
     TEMPLATE = '../templates/users/user_view.pt'
     NEW_TEMPLATE = '../templates/users/user_new.pt'
@@ -496,6 +526,7 @@ class UserView(BaseView):
             if as_account is not None:
                 params['DelegateAccount'] = as_account
             self.conn.get_response('UpdateUser', params=params)
+            self.invalidate_iam_caches()
             msg = _(u"Successfully updated user information")
             self.request.session.flash(msg, queue=Notification.SUCCESS)
             location = self.request.route_path(
@@ -535,6 +566,7 @@ class UserView(BaseView):
                 if as_account is not None:
                     params['DelegateAccount'] = as_account
                 self.conn.get_response('CreateLoginProfile', params=params)
+            self.invalidate_iam_caches()
             # assemble file response
             account = self.request.session['account']
             string_output = StringIO.StringIO()
@@ -579,6 +611,7 @@ class UserView(BaseView):
                 if as_account is not None:
                     params['DelegateAccount'] = as_account
                 self.conn.get_response('CreateLoginProfile', params=params)
+            self.invalidate_iam_caches()
             # assemble file response
             account = self.request.session['account']
             string_output = StringIO.StringIO()
@@ -604,6 +637,7 @@ class UserView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Deleting password for user {0}").format(self.user.user_name))
             self.conn.get_response('DeleteLoginProfile', params=params)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully deleted user password"), results="true")
 
     @view_config(route_name='user_generate_keys', request_method='POST', renderer='json')
@@ -619,6 +653,7 @@ class UserView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Creating access keys for user {0}").format(user_name))
             result = self.conn.get_response('CreateAccessKey', params=params)
+            self.invalidate_iam_caches()
             account = self.request.session['account']
             string_output = StringIO.StringIO()
             csv_w = csv.writer(string_output)
@@ -650,6 +685,7 @@ class UserView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Deleting access key {0} for user {1}").format(key_id, self.user.user_name))
             self.conn.get_response('DeleteAccessKey', params=params)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully deleted key"))
 
     @view_config(route_name='user_deactivate_key', request_method='POST', renderer='json')
@@ -665,6 +701,7 @@ class UserView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Deactivating access key {0} for user {1}").format(key_id, self.user.user_name))
             self.conn.get_response('UpdateAccessKey', params=params)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully deactivated key"))
 
     @view_config(route_name='user_activate_key', request_method='POST', renderer='json')
@@ -680,6 +717,7 @@ class UserView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Activating access key {0} for user {1}").format(key_id, self.user.user_name))
             self.conn.get_response('UpdateAccessKey', params=params)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully activated key"))
 
     @view_config(route_name='user_add_to_group', request_method='POST', renderer='json')
@@ -695,6 +733,7 @@ class UserView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Adding user {0} to group {1}").format(self.user.user_name, group))
             result = self.conn.get_response('AddUserToGroup', params=params)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully added user to group"), results=result)
 
     @view_config(route_name='user_remove_from_group', request_method='POST', renderer='json')
@@ -710,6 +749,7 @@ class UserView(BaseView):
         with boto_error_handler(self.request):
             self.log_request(_(u"Removing user {0} from group {1}").format(self.user.user_name, group))
             result = self.conn.get_response('RemoveUserFromGroup', params=params)
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully removed user from group"), results=result)
 
     @view_config(route_name='user_delete', request_method='POST')
@@ -725,6 +765,7 @@ class UserView(BaseView):
             if as_account is not None:
                 params['DelegateAccount'] = as_account
             self.conn.get_response('DeleteUser', params)
+            self.invalidate_iam_caches()
 
             location = self.request.route_path('users')
             msg = _(u'Successfully deleted user')
@@ -745,6 +786,7 @@ class UserView(BaseView):
             if as_account is not None:
                 params['DelegateAccount'] = as_account
             result = self.conn.get_response('PutUserPolicy', params=params, verb='POST')
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully updated user policy"), results=result)
 
     @view_config(route_name='user_delete_policy', request_method='POST', renderer='json')
@@ -760,6 +802,7 @@ class UserView(BaseView):
             if as_account is not None:
                 params['DelegateAccount'] = as_account
             result = self.conn.get_response('DeleteUserPolicy', params=params, verb='POST')
+            self.invalidate_iam_caches()
             return dict(message=_(u"Successfully deleted user policy"), results=result)
 
     @view_config(route_name='user_update_quotas', request_method='POST', renderer='json')
@@ -29,12 +29,12 @@ Pyramid views for Eucalyptus and AWS volumes
 
 """
 from dateutil import parser
-from itertools import chain
 
 import simplejson as json
 
 from boto.exception import BotoServerError
 from boto.ec2.snapshot import Snapshot
+from boto.ec2.tag import TagSet
 
 from pyramid.httpexceptions import HTTPFound, HTTPNotFound
 from pyramid.view import view_config
@@ -50,8 +50,10 @@ from ..forms.volumes import (
     VolumeForm, DeleteVolumeForm, CreateSnapshotForm, DeleteSnapshotForm,
     RegisterSnapshotForm, AttachForm, DetachForm, VolumesFiltersForm)
 from ..i18n import _
+from ..indexes import ResourceIndex
+from ..jobs import JobError, get_error_message
 from ..models import Notification
-from ..models.alarms import Alarm
+from ..parallel import BatchOperation
 from ..views import LandingPageView, TaggedItemView, BaseView, JSONResponse
 from . import boto_error_handler
 
@@ -100,15 +102,13 @@ class VolumesView(LandingPageView, BaseVolumeView):
         self.render_dict = dict(
             prefix=self.prefix,
             initial_sort_key=self.initial_sort_key,
+            page_size=self.get_page_size(),
         )
 
     @view_config(route_name='volumes', renderer=VIEW_TEMPLATE)
     def volumes_landing(self):
         # Filter fields are passed to 'properties_filter_form' template macro to display filters at left
-        filter_keys = [
-            'attach_status', 'create_time', 'id', 'instance', 'name', 'instance_name',
-            'size', 'snapshot_id', 'status', 'tags', 'zone'
-        ]
+        filter_keys = self.get_filter_keys()
         filters_form = VolumesFiltersForm(self.request, conn=self.conn, formdata=self.request.params or None)
         search_facets = filters_form.facets
         controller_options_json = BaseView.escape_json(json.dumps({
@@ -132,22 +132,44 @@ class VolumesView(LandingPageView, BaseVolumeView):
         volume_id_param = self.request.params.get('volume_id')
         volume_ids = [volume_id.strip() for volume_id in volume_id_param.split(',')]
         if self.delete_form.validate():
-            for volume_id in volume_ids:
-                volume = self.get_volume(volume_id)
-                self.log_request(_(u"Deleting volume {0}").format(volume_id))
-                with boto_error_handler(self.request, self.location):
-                    volume.delete()
+            self.log_request(_(u"Deleting volume(s) {0}").format(volume_id_param))
+            job_id = self.submit_job(
+                _(u'Delete volume(s) {0}').format(', '.join(volume_ids)), self.delete_volumes,
+                self.conn, volume_ids, self._get_resource_snapshot_scope_())
+            self.track_job(job_id)
             if len(volume_ids) == 1:
-                msg = _(u'Successfully sent delete volume request.  It may take a moment to delete the volume.')
+                msg = _(u'Deleting volume {0}.  It may take a moment to delete the volume.').format(volume_ids[0])
             else:
-                prefix = _(u'Successfully sent request to delete volumes')
+                prefix = _(u'Deleting volumes')
                 msg = u'{0} {1}'.format(prefix, ', '.join(volume_ids))
-            self.request.session.flash(msg, queue=Notification.SUCCESS)
+            self.request.session.flash(msg, queue=Notification.INFO)
         else:
             msg = _(u'Unable to delete volume.')  # TODO Pull in form validation error messages here
             self.request.session.flash(msg, queue=Notification.ERROR)
         return HTTPFound(location=self.location)
 
+    @staticmethod
+    def delete_volumes(job, conn, volume_ids, snapshot_scope):
+        """Background job deleting volumes concurrently (see VolumesView.volumes_delete)"""
+        job.set_progress(0, len(volume_ids))
+        batch = BatchOperation(
+            conn.delete_volume, on_progress=lambda completed, failed: job.set_progress(completed),
+            progress_interval=1)
+        batch.run(volume_ids)
+        BaseView.invalidate_resource_snapshot_scope(snapshot_scope)
+        if batch.errors:
+            failed_ids = [volume_id for volume_id, err in batch.errors]
+            prefix = _(u'Unable to delete volume(s)')
+            raise JobError(u'{0} {1}: {2}'.format(
+                prefix, ', '.join(failed_ids), get_error_message(batch.errors[0][1])))
+        if len(volume_ids) == 1:
+            msg = _(u'Successfully sent delete volume request.  It may take a moment to delete the volume.')
+        else:
+            prefix = _(u'Successfully sent request to delete volumes')
+            msg = u'{0} {1}'.format(prefix, ', '.join(volume_ids))
+        job.update(message=msg)
+        return dict(volume_ids=volume_ids)
+
     @view_config(route_name='volumes_attach', request_method='POST')
     def volumes_attach(self):
         volume_id = self.request.params.get('volume_id')
@@ -161,6 +183,7 @@ class VolumesView(LandingPageView, BaseVolumeView):
             with boto_error_handler(self.request, self.location):
                 self.log_request(_(u"Attaching volume {0} to {1} as {2}").format(volume_id, instance_id, device))
                 self.conn.attach_volume(volume_id, instance_id, device)
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully sent request to attach volume.  It may take a moment to attach to instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
         else:
@@ -177,6 +200,7 @@ class VolumesView(LandingPageView, BaseVolumeView):
                 self.log_request(_(u"Detaching volume {0}").format(volume_id))
                 with boto_error_handler(self.request, self.location):
                     self.conn.detach_volume(volume_id)
+                    self.invalidate_resource_snapshots()
             if len(volume_ids) == 1:
                 msg = _(u'Request successfully submitted.  It may take a moment to detach the volume.')
             else:
@@ -201,6 +225,14 @@ class VolumesView(LandingPageView, BaseVolumeView):
             instances_by_zone[zone] = zone_instances
         return instances_by_zone
 
+    @staticmethod
+    def get_filter_keys():
+        """filter_keys are passed to client-side filtering in search box"""
+        return [
+            'attach_status', 'create_time', 'id', 'instance', 'name', 'instance_name',
+            'size', 'snapshot_id', 'status', 'tags', 'zone'
+        ]
+
     @staticmethod
     def get_sort_keys():
         """sort_keys are passed to sorting drop-down on landing page"""
@@ -214,9 +246,31 @@ class VolumesView(LandingPageView, BaseVolumeView):
         ]
 
 
+class SnapshotJoinFields(object):
+    """Snapshot parsed from a DescribeSnapshots response keeping only its id, volume id and tags"""
+    def __init__(self, connection=None):
+        self.id = None
+        self.volume_id = None
+        self.tags = TagSet()
+
+    def startElement(self, name, attrs, connection):
+        if name == 'tagSet':
+            return self.tags
+        return None
+
+    def endElement(self, name, value, connection):
+        if name == 'snapshotId':
+            self.id = value
+        elif name == 'volumeId':
+            self.volume_id = value
+
+
 class VolumesJsonView(LandingPageView):
     def __init__(self, request, conn=None, zone=None, enable_filters=True, **kwargs):
         super(VolumesJsonView, self).__init__(request, **kwargs)
+        self.filter_keys = VolumesView.get_filter_keys()
+        self.sort_keys = VolumesView.get_sort_keys()
+        self.initial_sort_key = '-create_time'
         self.conn = conn or self.get_connection()
         self.zone = zone
         self.enable_filters = enable_filters
@@ -225,7 +279,6 @@ class VolumesJsonView(LandingPageView):
     def volumes_json(self):
         if not(self.is_csrf_valid()):
             return JSONResponse(status=400, message="missing CSRF token")
-        volumes = []
         transitional_states = ['attaching', 'detaching', 'creating', 'deleting']
         filters = {}
         availability_zone_param = self.zone or self.request.params.getall('zone')
@@ -234,12 +287,6 @@ class VolumesJsonView(LandingPageView):
         # Don't filter by these request params in Python, as they're included in the "filters" params sent to the CLC
         # Note: the choices are from attributes in VolumesFiltersForm
         ignore_params = ['zone']
-        # Get alarms for volumes and build a list of resource ids to optimize alarm status fetch
-        cw_conn = self.get_connection(conn_type='cloudwatch')
-        alarms = [alarm for alarm in cw_conn.describe_alarms() if 'VolumeId' in alarm.dimensions]
-        alarm_resource_ids = set(list(
-            chain.from_iterable([chain.from_iterable(alarm.dimensions.values()) for alarm in alarms])
-        ))
         with boto_error_handler(self.request):
             if self.enable_filters:
                 filtered_items = self.filter_items(self.get_items(filters=filters), ignore=ignore_params)
@@ -247,13 +294,23 @@ class VolumesJsonView(LandingPageView):
                 filtered_items = self.get_items()
             instance_ids = list(set([
                 vol.attach_data.instance_id for vol in filtered_items if vol.attach_data.instance_id is not None]))
-            if len(filtered_items) < 1000:
-                volume_ids = [volume.id for volume in filtered_items]
-                snapshots = self.conn.get_all_snapshots(filters={'volume-id': volume_ids}) if self.conn else []
-            else:
-                snapshots = self.conn.get_all_snapshots() if self.conn else []
-            instances = self.conn.get_only_instances(instance_ids=instance_ids) if self.conn else []
-
+            # Volume ids are passed as a filter value, so fall back to listing all of the account's snapshots
+            # rather than sending a huge filter when there are many volumes
+            volume_ids = [volume.id for volume in filtered_items] if len(filtered_items) < 1000 else None
+            calls = self.get_parallel_calls()
+            calls.add('alarm_status', self.get_alarm_status_index)
+            calls.add('snapshots', self.get_snapshot_join_fields, volume_ids=volume_ids)
+            calls.add('instances', self.get_instances, instance_ids)
+            results = calls.run()
+            alarm_status_index = results.get('alarm_status')
+            instances = ResourceIndex(results.get('instances'))
+            snapshots = results.get('snapshots')
+            snapshots_by_id = ResourceIndex(snapshots)
+            snapshot_counts = {}
+            for snapshot in snapshots:
+                snapshot_counts[snapshot.volume_id] = snapshot_counts.get(snapshot.volume_id, 0) + 1
+
+        def iter_volumes():
             for volume in filtered_items:
                 status = volume.status
                 alarm_status = ''
@@ -261,21 +318,15 @@ class VolumesJsonView(LandingPageView):
                 is_root_volume = False
                 instance_name = None
                 if volume.attach_data is not None and volume.attach_data.instance_id is not None:
-                    instance = [inst for inst in instances if inst.id == volume.attach_data.instance_id][0]
+                    instance = instances.get(volume.attach_data.instance_id)
                     instance_name = TaggedItemView.get_display_name(instance, escapebraces=False)
                     if instance.root_device_type == 'ebs' and volume.attach_data.device == instance.root_device_name:
                         is_root_volume = True  # Note: Check for 'True' when passed to JS via Chameleon template
                 if status != 'deleted':
-                    snapshot_name = [snap.tags.get('Name') for snap in snapshots if snap.id == volume.snapshot_id]
-                    if len(snapshot_name) == 0:
-                        snapshot_name = ''
-                    elif snapshot_name[0] is None:
-                        snapshot_name = ''
-                    else:
-                        snapshot_name = snapshot_name[0]
-                    if volume.id in alarm_resource_ids:
-                        alarm_status = Alarm.get_resource_alarm_status(volume.id, alarms)
-                    volumes.append(dict(
+                    snapshot = snapshots_by_id.get(volume.snapshot_id)
+                    snapshot_name = (snapshot.tags.get('Name') or '') if snapshot else ''
+                    alarm_status = alarm_status_index.get_status(volume.id, 'VolumeId')
+                    yield dict(
                         create_time=volume.create_time,
                         id=volume.id,
                         instance=volume.attach_data.instance_id,
@@ -284,7 +335,7 @@ class VolumesJsonView(LandingPageView):
                         instance_tag_name=instance.tags.get('Name') if instance_name else '',
                         name=TaggedItemView.get_display_name(volume, escapebraces=False),
                         volume_tag_name=volume.tags.get('Name'),
-                        snapshots=len([snap.id for snap in snapshots if snap.volume_id == volume.id]),
+                        snapshots=snapshot_counts.get(volume.id, 0),
                         snapshot_id=volume.snapshot_id,
                         snapshot_name=snapshot_name,
                         size=volume.size,
@@ -296,11 +347,32 @@ class VolumesJsonView(LandingPageView):
                         tags=TaggedItemView.get_tags_display(volume.tags),
                         real_tags=volume.tags,
                         transitional=status in transitional_states or attach_status in transitional_states,
-                    ))
-            return dict(results=volumes)
+                    )
+
+        return self.get_paged_results(iter_volumes())
+
+    def get_instances(self, instance_ids):
+        if not self.conn or not instance_ids:
+            return []
+        return self.conn.get_only_instances(instance_ids=instance_ids)
+
+    def get_snapshot_join_fields(self, volume_ids=None):
+        """Snapshots of the given volumes (or all of the account's snapshots if volume_ids is None),
+        parsed as SnapshotJoinFields so that only the fields volume rows are joined on are kept
+        """
+        if not self.conn:
+            return []
+        params = {}
+        if volume_ids is None:
+            self.conn.build_list_params(params, ['self'], 'Owner')
+        else:
+            self.conn.build_filter_params(params, {'volume-id': volume_ids})
+        return self.conn.get_list('DescribeSnapshots', params, [('item', SnapshotJoinFields)], verb='POST')
 
     def get_items(self, filters=None):
-        items = self.conn.get_all_volumes(filters=filters) if self.conn else []
+        items = self.get_resource_snapshot(
+            'volumes', lambda conn: conn.get_all_volumes(filters=filters) if conn else [],
+            sorted((filters or {}).items()))
         # because volume status is a combination of status and attach_status, resolve that here
         for item in items:
             if item.status == 'in-use':
@@ -402,6 +474,7 @@ class VolumeView(TaggedItemView, BaseVolumeView):
                 self.log_request(_(u"Creating volume (size={0}, zone={1}, snapshot_id={2})").format(
                     size, zone, snapshot_id))
                 volume = self.conn.create_volume(**kwargs)
+                self.invalidate_resource_snapshots()
                 # Add name tag
                 if name:
                     volume.add_tag('Name', name)
@@ -423,6 +496,7 @@ class VolumeView(TaggedItemView, BaseVolumeView):
             with boto_error_handler(self.request, self.location):
                 self.log_request(_(u"Deleting volume {0}").format(self.volume.id))
                 self.volume.delete()
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully sent delete volume request.  It may take a moment to delete the volume.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             location = self.request.route_path('volumes')
@@ -439,6 +513,7 @@ class VolumeView(TaggedItemView, BaseVolumeView):
             with boto_error_handler(self.request, self.location):
                 self.log_request(_(u"Attaching volume {0} to {1} as {2}").format(self.volume.id, instance_id, device))
                 self.volume.attach(instance_id, device)
+                self.invalidate_resource_snapshots()
                 msg = _(u'Successfully sent request to attach volume.  It may take a moment to attach to instance.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             location = self.request.route_path('volume_view', id=self.volume.id)
@@ -454,6 +529,7 @@ class VolumeView(TaggedItemView, BaseVolumeView):
                 self.log_request(_(u"Detaching volume {0} from {1}").format(
                     self.volume.id, self.volume.attach_data.instance_id))
                 self.volume.detach()
+                self.invalidate_resource_snapshots()
                 msg = _(u'Request successfully submitted.  It may take a moment to detach the volume.')
                 self.request.session.flash(msg, queue=Notification.SUCCESS)
             location = self.request.route_path('volume_view', id=self.volume.id)
@@ -605,6 +681,7 @@ class VolumeSnapshotsView(BaseVolumeView):
                 snapshot = self.get_snapshot(snapshot_id)
                 with boto_error_handler(self.request, self.location):
                     snapshot.delete()
+                    self.invalidate_resource_snapshots()
                     msg = _(u'Successfully deleted the snapshot.')
                     self.request.session.flash(msg, queue=Notification.SUCCESS)
                 location = self.request.route_path('volume_snapshots', id=self.volume.id)
@@ -30,7 +30,7 @@ import boto
 from boto.ec2.cloudwatch import MetricAlarm
 from moto import mock_cloudwatch
 
-from eucaconsole.models.alarms import Alarm
+from eucaconsole.models.alarms import Alarm, AlarmStatusIndex
 from tests import Mock
 
 
@@ -122,3 +122,39 @@ class AlarmStatusTestCase(unittest.TestCase, MockAlarmStatusMixin):
         ]
         alarm_status = Alarm.get_resource_alarm_status(item_id, alarms)
         self.assertEqual(alarm_status, 'Alarm')
+
+
+class AlarmStatusIndexTestCase(unittest.TestCase, MockAlarmStatusMixin):
+    """Alarm status index lookups should match Alarm.get_resource_alarm_status()"""
+
+    def test_index_matches_resource_alarm_status(self):
+        alarms = [
+            self.make_alarm('i-123456', state_value='OK'),
+            self.make_alarm('i-123456', state_value='ALARM'),
+            self.make_alarm('i-234567', state_value='INSUFFICIENT_DATA'),
+            self.make_alarm('i-234567', state_value='OK'),
+            self.make_alarm('i-345678', state_value='OK'),
+            self.make_alarm('vol-123456', dimension_key='VolumeId', state_value='ALARM'),
+        ]
+        index = AlarmStatusIndex.from_alarms(alarms)
+        instance_alarms = [alarm for alarm in alarms if 'InstanceId' in alarm.dimensions]
+        for item_id in ['i-123456', 'i-234567', 'i-345678', 'i-unknown', 'vol-123456']:
+            self.assertEqual(
+                index.get_status(item_id, 'InstanceId'), Alarm.get_resource_alarm_status(item_id, instance_alarms))
+        self.assertEqual(index.get_status('vol-123456', 'VolumeId'), 'Alarm')
+
+    def test_all_alarm_pages_fetched(self):
+        pages = {
+            None: Mock(alarms=[self.make_alarm('i-123456')], next_token='page-2'),
+            'page-2': Mock(alarms=[self.make_alarm('i-234567', state_value='ALARM')], next_token=None),
+        }
+
+        class AlarmPage(list):
+            def __init__(self, page):
+                super(AlarmPage, self).__init__(page.alarms)
+                self.next_token = page.next_token
+
+        cw_conn = Mock(describe_alarms=lambda next_token=None: AlarmPage(pages[next_token]))
+        alarms = AlarmStatusIndex.describe_all_alarms(cw_conn)
+        self.assertEqual(len(alarms), 2)
+        self.assertEqual(AlarmStatusIndex.from_alarms(alarms).get_status('i-234567', 'InstanceId'), 'Alarm')
@@ -27,18 +27,20 @@
 Tests for login forms
 
 """
+import time
 from urllib2 import HTTPError, URLError
 
 import boto
+from boto.ec2.securitygroup import SecurityGroup
 from pyramid.httpexceptions import HTTPFound
 from pyramid.security import Authenticated
 from pyramid.testing import DummyRequest
 
 from eucaconsole.forms.login import AWSLoginForm, EucaLoginForm
-from eucaconsole.models.auth import AWSAuthenticator, User, groupfinder, ConnectionManager
+from eucaconsole.models.auth import AWSAuthenticator, User, groupfinder, ConnectionManager, ConnectionPool
 from eucaconsole.views import BaseView
 from eucaconsole.views.login import LogoutView
-from tests import BaseTestCase, BaseFormTestCase, BaseViewTestCase
+from tests import BaseTestCase, BaseFormTestCase, BaseViewTestCase, Mock
 
 
 class EucaLoginFormTestCase(BaseFormTestCase):
@@ -107,6 +109,22 @@ class UserTestCase(BaseTestCase):
         groups = groupfinder(user_id=None, request=request)
         self.assertEqual(groups, [])
 
+    def test_account_id_looked_up_once_per_session(self):
+        calls = []
+
+        class Conn(object):
+            def get_all_security_groups(self, filters=None):
+                calls.append(filters)
+                group = SecurityGroup()
+                group.owner_id = '123456789012'
+                return [group]
+
+        request = DummyRequest()
+        self.assertEqual(User.get_account_id(ec2_conn=Conn(), request=request), '123456789012')
+        self.assertEqual(User.get_account_id(ec2_conn=Conn(), request=request), '123456789012')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(request.session['account_id'], '123456789012')
+
 
 class ArbitraryRedirectTestCase(BaseTestCase):
     def test_redirect_with_extra_slash_in_scheme(self):
@@ -132,3 +150,44 @@ class AWSConnectionCase(BaseTestCase):
 
         conn = ConnectionManager.aws_connection('invalid-region', 'access', 'secret', 'token', 'ec2', True)
         self.assertEqual(conn, None)
+
+
+class ConnectionPoolTestCase(BaseTestCase):
+    def test_connections_are_reused(self):
+        conn = ConnectionManager.aws_connection('eu-west-2', 'access', 'secret', 'token', 'ec2', True)
+        ConnectionManager.return_connection(conn)
+        self.assertTrue(ConnectionManager.aws_connection('eu-west-2', 'access', 'secret', 'token', 'ec2', True) is conn)
+        other = ConnectionManager.aws_connection('eu-west-2', 'access', 'secret', 'token', 'elb', True)
+        self.assertFalse(other is conn)
+
+    def test_checked_out_connections_not_shared(self):
+        pool = ConnectionPool()
+        conn = pool.get(Mock, 'access', 'token', 'ec2')
+        other = pool.get(Mock, 'access', 'token', 'ec2')
+        self.assertFalse(other is conn)
+        pool.put(conn)
+        pool.put(other)
+        self.assertTrue(pool.get(Mock, 'access', 'token', 'ec2') is other)
+        self.assertTrue(pool.get(Mock, 'access', 'token', 'ec2') is conn)
+
+    def test_token_rotation_evicts_connections(self):
+        conn = ConnectionManager.aws_connection('eu-west-1', 'access', 'secret', 'token', 'ec2', True)
+        ConnectionManager.return_connection(conn)
+        ConnectionManager.aws_connection('eu-west-1', 'access', 'secret', 'new-token', 'ec2', True)
+        self.assertFalse(ConnectionManager.aws_connection('eu-west-1', 'access', 'secret', 'token', 'ec2', True) is conn)
+
+    def test_idle_connections_are_evicted(self):
+        pool = ConnectionPool(max_idle=0)
+        conn = pool.get(Mock, 'access', 'token', 'ec2')
+        pool.put(conn)
+        time.sleep(0.01)
+        self.assertFalse(pool.get(Mock, 'access', 'token', 'ec2') is conn)
+
+    def test_release_connections(self):
+        pool = ConnectionPool()
+        conn = pool.get(Mock, 'access', 'token', 'ec2')
+        other = pool.get(Mock, 'access', 'token', 'ec2')
+        pool.put(conn)
+        pool.release('access')
+        pool.put(other)  # checked out before the release, so dropped
+        self.assertFalse(pool.get(Mock, 'access', 'token', 'ec2') in (conn, other))
\ No newline at end of file
@@ -45,8 +45,10 @@ from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest
 from eucaconsole.constants.buckets import SAMPLE_CORS_CONFIGURATION, CORS_XML_RELAXNG_SCHEMA
 from eucaconsole.forms.buckets import SharingPanelForm
 from eucaconsole.utils import remove_namespace, validate_xml
+from eucaconsole.views import JSONError
 from eucaconsole.views.buckets import (
-    BucketContentsView, BucketContentsJsonView, BucketDetailsView, BucketItemDetailsView, BucketXHRView,
+    BucketContentsView, BucketContentsJsonView, BucketDetailsView, BucketItemDetailsView, BucketsJsonView,
+    BucketXHRView,
     FOLDER_NAME_PATTERN
 )
 
@@ -118,6 +120,18 @@ class BucketContentsViewTestCase(BaseViewTestCase):
         self.assertRaises(HTTPBadRequest, view)
 
 
+class BucketsJsonViewTestCase(BaseViewTestCase):
+
+    def test_count_keys_below_cap(self):
+        self.assertEqual(BucketsJsonView.count_keys(iter(range(5)), 10), (5, False))
+        self.assertEqual(BucketsJsonView.count_keys(iter(range(10)), 10), (10, False))
+
+    def test_count_keys_stops_at_cap(self):
+        keys = iter(range(100))
+        self.assertEqual(BucketsJsonView.count_keys(keys, 10), (10, True))
+        self.assertEqual(len(list(keys)), 89)  # only cap + 1 keys were consumed
+
+
 class BucketDetailsViewTestCase(BaseViewTestCase):
 
     def test_versioning_update_action(self):
@@ -194,6 +208,42 @@ class MockBucketContentsJsonViewTestCase(BaseViewTestCase, MockBucketMixin):
         self.assertEqual(item.get('size'), 0)
         self.assertEqual(item.get('download_url'), '')
 
+    @mock_s3
+    def test_bucket_contents_json_view_pages_with_marker(self):
+        bucket, bucket_acl = self.make_bucket()
+        for name in ['file-one', 'file-three', 'file-two']:
+            bucket.new_key(name).set_contents_from_string('file content')
+        request = self.create_request(matchdict=dict(name=bucket.name), params=dict(page_size='2'))
+        view = BucketContentsJsonView(request, bucket=bucket)
+        first_page = view.bucket_contents_json()
+        self.assertEqual([item.get('name') for item in first_page.get('results')], ['file-one', 'file-three'])
+        self.assertEqual(first_page.get('next_page_token'), 'file-three')
+        request = self.create_request(
+            matchdict=dict(name=bucket.name), params=dict(page_size='2', page_token='file-three'))
+        view = BucketContentsJsonView(request, bucket=bucket)
+        last_page = view.bucket_contents_json()
+        self.assertEqual([item.get('name') for item in last_page.get('results')], ['file-two'])
+        self.assertEqual(last_page.get('next_page_token'), None)
+
+    @mock_s3
+    def test_bucket_keys_json_view_pages_with_marker(self):
+        bucket, bucket_acl = self.make_bucket()
+        for name in ['folder-one/file-one', 'folder-one/file-two']:
+            bucket.new_key(name).set_contents_from_string('file content')
+        request = self.create_request(matchdict=dict(name=bucket.name), params=dict(page_size='1'))
+        view = BucketContentsJsonView(request, bucket=bucket)
+        first_page = view.bucket_keys_json()
+        self.assertEqual(first_page.get('results'), ['folder-one/file-one'])
+        self.assertEqual(first_page.get('next_page_token'), 'folder-one/file-one')
+
+    @mock_s3
+    def test_bucket_contents_json_view_with_invalid_page_size(self):
+        bucket, bucket_acl = self.make_bucket()
+        request = self.create_request(matchdict=dict(name=bucket.name), params=dict(page_size='none'))
+        view = BucketContentsJsonView(request, bucket=bucket)
+        with self.assertRaises(JSONError):
+            view.bucket_contents_json()
+
 
 class MockBucketContentsViewTestCase(BaseViewTestCase, MockBucketMixin):
 
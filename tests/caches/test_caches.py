@@ -0,0 +1,179 @@
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Cache helper tests
+
+"""
+import pickle
+import time
+import unittest
+
+from boto.ec2.connection import EC2Connection
+from boto.ec2.volume import AttachmentSet, Volume
+from dogpile.cache import make_region
+from dogpile.cache.api import NO_VALUE
+
+from eucaconsole.caches import GenerationalCache, LocalCache, ResourceSnapshotCache, TieredCache
+from eucaconsole.caches import cache_get_multi, cache_set_multi, refresh_in_background, strip_connections
+
+
+class StripConnectionsTestCase(unittest.TestCase):
+
+    def test_connections_removed_recursively(self):
+        conn = EC2Connection(aws_access_key_id='foo', aws_secret_access_key='bar')
+        volume = Volume(connection=conn)
+        volume.id = 'vol-12345678'
+        volume.attach_data = AttachmentSet()
+        volume.attach_data.connection = conn
+        volumes = strip_connections([volume])
+        self.assertIsNone(volumes[0].connection)
+        self.assertIsNone(volumes[0].attach_data.connection)
+        self.assertEqual(pickle.loads(pickle.dumps(volumes))[0].id, 'vol-12345678')
+
+
+class CacheMultiTestCase(unittest.TestCase):
+
+    def test_values_round_trip(self):
+        region = make_region()
+        region.configure('dogpile.cache.memory')
+        cache_set_multi(region, {'a': 1, 'b': 2})
+        self.assertEqual(cache_get_multi(region, ['a', 'missing', 'b']), [1, NO_VALUE, 2])
+
+    def test_unconfigured_region_misses(self):
+        region = make_region()
+        cache_set_multi(region, {'a': 1})
+        self.assertEqual(cache_get_multi(region, ['a', 'b']), [NO_VALUE, NO_VALUE])
+
+
+class ResourceSnapshotCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        region = make_region(async_creation_runner=refresh_in_background)
+        region.configure('dogpile.cache.memory', expiration_time=1)
+        self.cache = ResourceSnapshotCache(region)
+        self.calls = []
+
+    def creator(self):
+        self.calls.append(time.time())
+        return len(self.calls)
+
+    def get(self):
+        return self.cache.get_or_create('volumes', self.creator, 'acct', 'region', 'host')
+
+    def test_cached_value_returned(self):
+        self.assertEqual(self.get(), 1)
+        self.assertEqual(self.get(), 1)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_stale_value_served_while_refreshing(self):
+        self.assertEqual(self.get(), 1)
+        time.sleep(1.1)
+        self.assertEqual(self.get(), 1)  # stale value, refresh runs in background
+        time.sleep(0.2)
+        self.assertEqual(self.get(), 2)
+
+    def test_invalidate_per_account(self):
+        self.assertEqual(self.get(), 1)
+        other = self.cache.get_or_create('volumes', self.creator, 'other', 'region', 'host')
+        self.cache.invalidate('acct', 'region', 'host')
+        self.assertEqual(self.get(), 3)
+        self.assertEqual(self.cache.get_or_create('volumes', self.creator, 'other', 'region', 'host'), other)
+
+    def test_users_cached_apart_and_invalidated_together(self):
+        alice = self.cache.get_or_create('volumes', self.creator, 'acct', 'region', 'host', 'alice')
+        bob = self.cache.get_or_create('volumes', self.creator, 'acct', 'region', 'host', 'bob')
+        self.assertNotEqual(alice, bob)
+        self.cache.invalidate('acct', 'region', 'host')
+        self.assertEqual(self.cache.get_or_create('volumes', self.creator, 'acct', 'region', 'host', 'bob'), 3)
+
+
+class GenerationalCacheTestCase(unittest.TestCase):
+
+    def test_invalidate_starts_new_generation(self):
+        region = make_region()
+        region.configure('dogpile.cache.memory')
+        cache = GenerationalCache(region, 'test_generation')
+        key = cache.make_key('index', ('acct', 'host'), 'alice')
+        self.assertEqual(cache.make_key('index', ('acct', 'host'), 'alice'), key)
+        self.assertNotEqual(cache.make_key('index', ('acct', 'host'), 'bob'), key)
+        cache.invalidate('acct', 'host')
+        self.assertNotEqual(cache.make_key('index', ('acct', 'host'), 'alice'), key)
+
+
+class LocalCacheTestCase(unittest.TestCase):
+
+    def test_least_recently_used_evicted(self):
+        cache = LocalCache(max_entries=2, expiration_time=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), NO_VALUE)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        cache = LocalCache(max_entries=2, expiration_time=0)
+        cache.set('a', 1)
+        time.sleep(0.01)
+        self.assertEqual(cache.get('a'), NO_VALUE)
+
+    def test_disabled(self):
+        cache = LocalCache(max_entries=0)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), NO_VALUE)
+
+
+class TieredCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.region = make_region()
+        self.region.configure('dogpile.cache.memory', expiration_time=60)
+        self.local = LocalCache(max_entries=10, expiration_time=60)
+        self.cache = TieredCache(self.region, self.local)
+        self.calls = []
+
+    def creator(self):
+        self.calls.append(1)
+        return len(self.calls)
+
+    def test_value_served_locally(self):
+        self.assertEqual(self.cache.get_or_create('key', self.creator), 1)
+        self.region.delete('key')  # a local hit doesn't reach the shared region
+        self.assertEqual(self.cache.get_or_create('key', self.creator), 1)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_shared_value_used_on_local_miss(self):
+        self.region.set('key', 5)
+        self.assertEqual(self.cache.get_or_create('key', self.creator), 5)
+        self.assertEqual(self.local.get('key'), 5)
+        self.assertEqual(self.calls, [])
+
+    def test_invalidate_both_tiers(self):
+        self.assertEqual(self.cache.get_or_create('key', self.creator), 1)
+        self.cache.invalidate('key')
+        self.assertEqual(self.region.get('key'), NO_VALUE)
+        self.assertEqual(self.cache.get_or_create('key', self.creator), 2)
@@ -0,0 +1,62 @@
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Dashboard tests
+
+"""
+import unittest
+
+from boto.exception import BotoServerError
+
+from eucaconsole.views.dashboard import DashboardJsonView
+
+from tests import Mock
+
+
+class DashboardCountTestCase(unittest.TestCase):
+
+    def test_running_count_not_started_twice(self):
+        self.assertTrue(DashboardJsonView.start_count('key'))
+        self.assertFalse(DashboardJsonView.start_count('key'))
+        DashboardJsonView.finish_count('key')
+        self.assertTrue(DashboardJsonView.start_count('key'))
+        DashboardJsonView.finish_count('key')
+
+    def test_count_returns_its_connection(self):
+        conn = Mock(get_all_key_pairs=lambda: ['a', 'b'], suppress_consec_slashes=False)
+        DashboardJsonView.start_count('keypairs-key')
+        count = DashboardJsonView.run_count('keypairs', conn, {}, 'keypairs-key', False)
+        self.assertEqual(count, dict(keypairs=2))
+        self.assertTrue(conn.suppress_consec_slashes)  # reset as the connection went back to the pool
+        self.assertTrue(DashboardJsonView.start_count('keypairs-key'))
+        DashboardJsonView.finish_count('keypairs-key')
+
+    def test_iam_errors_counted_as_zero(self):
+        def get_all_users():
+            raise BotoServerError(500, 'Internal Error', None)
+
+        count = DashboardJsonView.run_count('users', Mock(get_all_users=get_all_users), {}, 'users-key', False)
+        self.assertEqual(count, dict(users=0))
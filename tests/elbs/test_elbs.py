@@ -41,7 +41,9 @@ from moto import mock_elb, mock_cloudwatch
 from eucaconsole.i18n import _
 from eucaconsole.constants.elbs import ELB_EMPTY_DATA_MESSAGE
 from eucaconsole.forms.elbs import ELBForm, ELBHealthChecksForm
-from eucaconsole.views.elbs import ELBsJsonView, ELBView, ELBMonitoringView, ELBInstancesView, ELBHealthChecksView
+from eucaconsole.views.elbs import (
+    ELBsJsonView, ELBsHealthJsonView, ELBView, ELBMonitoringView, ELBInstancesView, ELBHealthChecksView
+)
 
 from tests import BaseViewTestCase, BaseFormTestCase, Mock
 
@@ -77,6 +79,27 @@ class ELBViewTests(BaseViewTestCase, MockELBMixin):
             self.assertEqual(normalized_listener, listener.get('output'))
 
 
+    def test_apply_elb_update_runs_without_request(self):
+        class RecordingConnection(object):
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append(name)
+
+        elb_conn = RecordingConnection()
+        elb = Mock(name='test_elb', listeners=[(80, 80, 'HTTP', 'HTTP')], tags={'foo': 'old'},
+                   security_groups=['sg-1'], policies=None, backends=[])
+        job = Mock(update=lambda **kwargs: None)
+        changes = dict(
+            is_euca=True, idle_timeout='60', listeners_args=[(80, 80, u'HTTP', u'HTTP')], tags={'foo': 'bar'},
+            security_policy=None, delete_stale_policies=False, access_log=None, security_groups=['sg-1'],
+            backend_certificates=[],
+        )
+        result = ELBView.apply_elb_update(job, elb_conn, None, elb, changes)
+        self.assertEqual(result, dict(elb_name='test_elb'))
+        self.assertEqual(elb_conn.calls, ['modify_lb_attribute', 'get_status', 'get_status'])
+
 class ELBMonitoringViewTests(BaseViewTestCase, MockELBMixin):
     """ELB detail page view - Monitoring tab"""
     def test_elb_monitoring_tab_view(self):
@@ -139,6 +162,25 @@ class ELBHealthChecksViewTests(BaseViewTestCase, MockELBMixin):
         self.assertEqual(form.ping_path.data, '/')
 
 
+class ELBsHealthJsonViewTests(BaseViewTestCase):
+    """Health and latency enrichment for the ELB landing page"""
+    def test_elbs_health_json(self):
+        states = {
+            'elb-one': ['InService', 'InService', 'OutOfService'],
+            'elb-two': ['OutOfService'],
+        }
+        elb_conn = Mock(describe_instance_health=lambda name: [Mock(state=state) for state in states[name]])
+        datapoints = [{'Average': 0.5}, {'Average': 1.5}]
+        cw_conn = Mock(get_metric_statistics=lambda *args, **kwargs: datapoints)
+        request = self.create_request()
+        request.params.add('names', 'elb-one')
+        request.params.add('names', 'elb-two')
+        view = ELBsHealthJsonView(request, elb_conn=elb_conn, cw_conn=cw_conn)
+        results = view.elbs_health_json().get('results')
+        self.assertEqual(results['elb-one'], dict(healthy_hosts=2, unhealthy_hosts=1, latency=1000))
+        self.assertEqual(results['elb-two'], dict(healthy_hosts=0, unhealthy_hosts=1, latency=1000))
+
+
 class ELBDetailPageFormTests(BaseFormTestCase, BaseViewTestCase, MockELBMixin):
     @mock_elb
     def test_elb_detail_page_form(self):
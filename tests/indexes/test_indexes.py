@@ -0,0 +1,85 @@
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Resource index tests
+
+"""
+import unittest
+
+from eucaconsole.indexes import ResourceIndex, group_by
+
+
+class MockResource(object):
+    def __init__(self, id=None, name=None, volume_id=None):
+        self.id = id
+        self.name = name
+        self.volume_id = volume_id
+
+
+class ResourceIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [
+            MockResource(id='sg-1', name='default'),
+            MockResource(id='sg-2', name='web'),
+            MockResource(id='sg-3', name='web'),
+            MockResource(id=None, name='unknown'),
+        ]
+
+    def test_lookup_by_id(self):
+        index = ResourceIndex(self.items)
+        self.assertEqual(index.get('sg-2').name, 'web')
+        self.assertEqual(index['sg-1'].name, 'default')
+        self.assertIsNone(index.get('sg-missing'))
+        self.assertTrue('sg-3' in index)
+        self.assertEqual(len(index), 3)
+
+    def test_first_match_wins(self):
+        index = ResourceIndex(self.items, key='name')
+        self.assertEqual(index.get('web').id, 'sg-2')
+
+    def test_key_function(self):
+        index = ResourceIndex(self.items, key=lambda item: item.name.upper())
+        self.assertEqual(index.get('UNKNOWN').name, 'unknown')
+
+    def test_empty_index_is_falsy(self):
+        self.assertFalse(ResourceIndex())
+        self.assertFalse(ResourceIndex(None))
+
+
+class GroupByTestCase(unittest.TestCase):
+
+    def test_group_by_attribute(self):
+        snapshots = [
+            MockResource(id='snap-1', volume_id='vol-1'),
+            MockResource(id='snap-2', volume_id='vol-2'),
+            MockResource(id='snap-3', volume_id='vol-1'),
+            MockResource(id='snap-4'),
+        ]
+        groups = group_by(snapshots, 'volume_id')
+        self.assertEqual([snap.id for snap in groups['vol-1']], ['snap-1', 'snap-3'])
+        self.assertEqual(len(groups['vol-2']), 1)
+        self.assertFalse(None in groups)
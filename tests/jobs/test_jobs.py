@@ -0,0 +1,269 @@
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Background job tests
+
+"""
+import time
+import unittest
+
+from boto.exception import BotoServerError
+
+from eucaconsole.jobs import background_jobs, JobError, JobRunner, JOB_COMPLETE, JOB_FAILED, JOB_PENDING
+from eucaconsole.jobs import MAX_TRACKED_JOBS
+from eucaconsole.views import BaseView, JSONError
+from eucaconsole.views.buckets import BucketDetailsView, BucketXHRView
+from eucaconsole.views.jobs import JobStatusJsonView
+from eucaconsole.views.scalinggroups import DeleteScalingGroupMixin
+from eucaconsole.views.volumes import VolumesView
+
+from tests import BaseViewTestCase, Mock
+
+
+class JobRunnerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = JobRunner()
+
+    def test_submitted_job_pending(self):
+        # no workers have been started, so the job can't be picked up yet
+        self.runner._start_workers_ = lambda: None
+        job_id = self.runner.submit('owner', u'Do something', lambda job: None)
+        status = self.runner.get_status(job_id, 'owner')
+        self.assertEqual(status['state'], JOB_PENDING)
+        self.assertEqual(status['description'], u'Do something')
+        self.assertIsNone(self.runner.get_status(job_id, 'someone else'))
+        self.assertIsNone(self.runner.get_status('bogus', 'owner'))
+
+    def test_job_result_and_messages(self):
+        self.runner._start_workers_ = lambda: None
+
+        def func(job, value):
+            job.update(message=u'working')
+            return value * 2
+
+        job_id = self.runner.submit('owner', u'Double', func, 21)
+        self.runner.run_job(job_id, func, 21)
+        status = self.runner.get_status(job_id, 'owner')
+        self.assertEqual(status['state'], JOB_COMPLETE)
+        self.assertEqual(status['result'], 42)
+        self.assertEqual(status['message'], u'working')
+
+    def test_job_error(self):
+        self.runner._start_workers_ = lambda: None
+
+        def func(job):
+            raise BotoServerError(400, 'Bad Request', '<Error><Code>X</Code><Message>nope</Message></Error>')
+
+        job_id = self.runner.submit('owner', u'Fail', func)
+        self.runner.run_job(job_id, func)
+        status = self.runner.get_status(job_id, 'owner')
+        self.assertEqual(status['state'], JOB_FAILED)
+        self.assertEqual(status['error'], 'nope')
+
+    def test_job_progress(self):
+        self.runner._start_workers_ = lambda: None
+
+        def func(job, items):
+            job.set_progress(0, len(items))
+            job.set_progress(2)
+            return None
+
+        job_id = self.runner.submit('owner', u'Count', func, ['a', 'b', 'c'])
+        self.assertEqual(self.runner.get_status(job_id, 'owner')['progress'], 0)
+        self.runner.run_job(job_id, func, ['a', 'b', 'c'])
+        status = self.runner.get_status(job_id, 'owner')
+        self.assertEqual(status['progress'], 2)
+        self.assertEqual(status['total'], 3)
+
+    def test_job_error_message(self):
+        self.runner._start_workers_ = lambda: None
+
+        def func(job):
+            raise JobError(u'Unable to do it')
+
+        job_id = self.runner.submit('owner', u'Fail', func)
+        self.runner.run_job(job_id, func)
+        status = self.runner.get_status(job_id, 'owner')
+        self.assertEqual(status['state'], JOB_FAILED)
+        self.assertEqual(status['error'], u'Unable to do it')
+
+    def test_configure_workers(self):
+        self.runner.configure('2')
+        self.assertEqual(self.runner.max_workers, 2)
+        self.runner.configure(0)
+        self.assertEqual(self.runner.max_workers, 1)
+
+    def test_jobs_run_on_workers(self):
+        runner = JobRunner(max_workers=2)
+        job_id = runner.submit('owner', u'Add', lambda job, a, b: a + b, 1, 2)
+        for idx in range(100):
+            status = runner.get_status(job_id, 'owner')
+            if status['state'] == JOB_COMPLETE:
+                break
+            time.sleep(0.01)
+        self.assertEqual(status['result'], 3)
+
+
+class JobStatusJsonViewTestCase(BaseViewTestCase):
+
+    def test_unknown_job_not_found(self):
+        request = self.create_request(matchdict=dict(id='bogus'))
+        view = JobStatusJsonView(request)
+        self.assertRaises(JSONError, view.job_status_json)
+
+
+    def test_finished_job_no_longer_tracked(self):
+        request = self.create_request(matchdict=dict(id='finished'), session=dict(cloud_type='euca'))
+        view = JobStatusJsonView(request)
+        background_jobs.set_status('finished', dict(
+            id='finished', owner=view.get_job_owner(), description=u'Done', state=JOB_COMPLETE, message=u'ok',
+            progress=3, total=3, result=None, error=None, created=time.time(), finished=time.time(),
+        ))
+        view.track_job('pending')
+        view.track_job('finished')
+        results = view.job_status_json()['results']
+        self.assertEqual(results['state'], JOB_COMPLETE)
+        self.assertEqual(results['progress'], 3)
+        self.assertEqual(request.session['background_jobs'], ['pending'])
+
+
+class TrackJobTestCase(BaseViewTestCase):
+
+    def test_tracked_jobs_capped(self):
+        view = BaseView(self.create_request())
+        for idx in range(MAX_TRACKED_JOBS + 5):
+            view.track_job(str(idx))
+        tracked = view.request.session['background_jobs']
+        self.assertEqual(len(tracked), MAX_TRACKED_JOBS)
+        self.assertEqual(tracked[-1], str(MAX_TRACKED_JOBS + 4))
+
+
+class DeleteVolumesJobTestCase(unittest.TestCase):
+
+    def test_failed_volumes_reported(self):
+        progress = []
+
+        def delete_volume(volume_id):
+            if volume_id == 'vol-2':
+                raise BotoServerError(400, 'Bad Request', '<Error><Code>X</Code><Message>in use</Message></Error>')
+            return True
+
+        job = Mock(set_progress=lambda completed, total=None: progress.append(completed), update=None)
+        with self.assertRaises(JobError) as context:
+            VolumesView.delete_volumes(job, Mock(delete_volume=delete_volume), ['vol-1', 'vol-2'], ('', '', ''))
+        self.assertIn('vol-2', unicode(context.exception))
+        self.assertIn('in use', unicode(context.exception))
+        self.assertEqual(progress[-1], 2)
+
+    def test_volumes_deleted(self):
+        deleted = []
+        messages = []
+        job = Mock(set_progress=lambda completed, total=None: None,
+                   update=lambda **kwargs: messages.append(kwargs['message']))
+        result = VolumesView.delete_volumes(job, Mock(delete_volume=deleted.append), ['vol-1', 'vol-2'], ('', '', ''))
+        self.assertEqual(sorted(deleted), ['vol-1', 'vol-2'])
+        self.assertEqual(result, dict(volume_ids=['vol-1', 'vol-2']))
+        self.assertEqual(len(messages), 1)
+
+
+class CopyKeysJobTestCase(unittest.TestCase):
+
+    def test_keys_copied_into_subpath(self):
+        copied = []
+
+        def copy_key(new_key_name, src_bucket_name, src_key_name):
+            if src_key_name == 'src/bad':
+                raise BotoServerError(403, 'Forbidden', None)
+            copied.append((new_key_name, src_bucket_name, src_key_name))
+
+        job = Mock(set_progress=lambda completed, total=None: None, update=lambda **kwargs: None)
+        s3_conn = Mock(get_bucket=lambda name, validate=True: Mock(copy_key=copy_key))
+        result = BucketXHRView.copy_keys(
+            job, s3_conn, 'dest-bucket', 'source', ['src/a', 'src/b/c', 'src/bad'], ('dest',), 'src/', 2)
+        self.assertEqual(sorted(copied), [('dest/a', 'source', 'src/a'), ('dest/b/c', 'source', 'src/b/c')])
+        self.assertEqual(result, dict(errors=['src/bad']))
+
+
+class PropagateAclJobTestCase(unittest.TestCase):
+
+    def test_acl_set_on_each_key(self):
+        updated = []
+
+        def make_key(name):
+            def set_acl(acl):
+                if name == 'bad':
+                    raise BotoServerError(403, 'Forbidden', None)
+                updated.append((name, acl))
+            key = Mock(set_acl=set_acl)
+            key.name = name
+            return key
+
+        progress = []
+        job = Mock(set_progress=lambda completed, total=None: progress.append(completed),
+                   update=lambda **kwargs: None)
+        bucket = Mock(list=lambda: [make_key(name) for name in ['a', 'b/c', 'bad']])
+        s3_conn = Mock(get_bucket=lambda name, validate=True: bucket)
+        result = BucketDetailsView.propagate_acl(job, s3_conn, 'bucket', 'acl', 2)
+        self.assertEqual(sorted(updated), [('a', 'acl'), ('b/c', 'acl')])
+        self.assertEqual(result, dict(errors=['bad']))
+        self.assertEqual(progress[0], 0)
+
+
+class DeleteScalingGroupJobTestCase(unittest.TestCase):
+
+    def test_group_deleted_once_instances_shut_down(self):
+        states = [['running', 'shutting-down'], ['terminated', 'shutting-down']]
+        polls = []
+        deleted = []
+
+        def get_only_instances(instance_ids):
+            polls.append(instance_ids)
+            return [Mock(_state=state) for state in states[min(len(polls), len(states)) - 1]]
+
+        class Deleter(DeleteScalingGroupMixin):
+            SHUTDOWN_POLL_INTERVAL = 0
+
+        runner = JobRunner(max_workers=1)
+        job_id = runner.submit(
+            'owner', u'Delete', Deleter.delete_scaling_group, Mock(get_only_instances=get_only_instances),
+            Mock(delete_auto_scaling_group=deleted.append), 'group', ['i-1', 'i-2'], 'euca')
+        for idx in range(100):
+            status = runner.get_status(job_id, 'owner')
+            if status['state'] == JOB_COMPLETE:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(polls), 2)
+        self.assertEqual(deleted, ['group'])
+        self.assertEqual(status['result'], dict(name='group'))
+
+    def test_wait_requeued_instead_of_sleeping(self):
+        requeued = []
+        job = Mock(update=lambda **kwargs: None, requeue=lambda *args, **kwargs: requeued.append(kwargs))
+        instances = [Mock(_state='running')]
+        DeleteScalingGroupMixin.delete_scaling_group(
+            job, Mock(get_only_instances=lambda ids: instances), None, 'group', ['i-1'], 'aws')
+        self.assertEqual(requeued, [dict(polls=1)])
@@ -0,0 +1,120 @@
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Parallel call runner and batch operation tests
+
+"""
+import socket
+import time
+import unittest
+
+from boto.exception import BotoServerError
+
+from eucaconsole.parallel import BatchOperation, ParallelCalls
+
+
+class ParallelCallsTestCase(unittest.TestCase):
+
+    def test_results_keyed_by_name(self):
+        calls = ParallelCalls(max_workers=2)
+        calls.add('one', lambda: 1)
+        calls.add('sum', lambda a, b=0: a + b, 2, b=3)
+        calls.add('empty', list)
+        self.assertEqual(calls.run(), {'one': 1, 'sum': 5, 'empty': []})
+
+    def test_calls_run_concurrently(self):
+        calls = ParallelCalls(max_workers=4)
+        for idx in range(4):
+            calls.add(idx, time.sleep, 0.2)
+        start = time.time()
+        calls.run()
+        self.assertTrue(time.time() - start < 0.6)
+
+    def test_error_raised_in_caller(self):
+        def fail():
+            raise BotoServerError(400, 'Bad Request')
+        calls = ParallelCalls()
+        calls.add('ok', lambda: 1)
+        calls.add('fail', fail)
+        self.assertRaises(BotoServerError, calls.run)
+
+    def test_deadline_raises_socket_timeout(self):
+        calls = ParallelCalls(timeout=0.1)
+        calls.add('fast', lambda: 1)
+        calls.add('slow', time.sleep, 1)
+        self.assertRaises(socket.timeout, calls.run)
+
+    def test_partial_run_returns_pending_calls(self):
+        late_results = {}
+        calls = ParallelCalls(max_workers=2, timeout=5)
+        calls.add('fast', lambda: 1)
+        calls.add('slow', lambda: time.sleep(0.3) or 2)
+        results, errors, pending = calls.run_partial(
+            timeouts={'slow': 0.05}, on_late_result=late_results.__setitem__)
+        self.assertEqual(results, {'fast': 1})
+        self.assertEqual(errors, {})
+        self.assertEqual(pending, ['slow'])
+        time.sleep(0.5)
+        self.assertEqual(late_results, {'slow': 2})
+
+
+class BatchOperationTestCase(unittest.TestCase):
+
+    def test_all_items_processed(self):
+        processed = []
+        batch = BatchOperation(processed.append, max_workers=4)
+        self.assertEqual(batch.run(iter(range(250))), 250)
+        self.assertEqual(sorted(processed), range(250))
+        self.assertEqual(batch.errors, [])
+
+    def test_items_run_concurrently(self):
+        batch = BatchOperation(time.sleep, max_workers=4)
+        start = time.time()
+        batch.run([0.2] * 4)
+        self.assertTrue(time.time() - start < 0.6)
+
+    def test_item_errors_collected(self):
+        def copy(item):
+            if item % 2:
+                raise BotoServerError(403, 'Forbidden')
+        batch = BatchOperation(copy, max_workers=3)
+        batch.run(range(10))
+        self.assertEqual(batch.completed, 10)
+        self.assertEqual(sorted(item for item, err in batch.errors), [1, 3, 5, 7, 9])
+
+    def test_listing_error_raised_in_caller(self):
+        def listing():
+            yield 1
+            raise BotoServerError(500, 'Internal Error')
+        batch = BatchOperation(lambda item: None)
+        self.assertRaises(BotoServerError, batch.run, listing())
+
+    def test_progress_reported(self):
+        progress = []
+        batch = BatchOperation(lambda item: None, max_workers=2,
+                               on_progress=lambda done, failed: progress.append(done), progress_interval=10)
+        batch.run(range(25))
+        self.assertEqual(sorted(progress), [10, 20, 25])
@@ -29,6 +29,8 @@ Snapshots tests
 See http://docs.pylonsproject.org/projects/pyramid/en/latest/narr/testing.html
 
 """
+import simplejson as json
+
 from boto.ec2 import connect_to_region
 from moto import mock_ec2
 
@@ -37,10 +39,10 @@ from pyramid.httpexceptions import HTTPNotFound
 
 from eucaconsole.forms import BaseSecureForm
 from eucaconsole.forms.snapshots import SnapshotForm, DeleteSnapshotForm
-from eucaconsole.views import TaggedItemView, JSONResponse
-from eucaconsole.views.snapshots import SnapshotsView, SnapshotView, SnapshotsJsonView
+from eucaconsole.views import TaggedItemView, JSONResponse, JSONError, StreamingJSONResponse
+from eucaconsole.views.snapshots import SnapshotsView, SnapshotView, SnapshotsJsonView, ImagesBySnapshotMixin
 
-from tests import BaseViewTestCase, BaseFormTestCase
+from tests import BaseViewTestCase, BaseFormTestCase, Mock
 
 
 class MockSnapshotMixin(object):
@@ -72,6 +74,121 @@ class SnapshotsViewTests(BaseViewTestCase):
         self.assertEqual(view.__class__, JSONResponse)
         
 
+class SnapshotsJsonPagingTests(BaseViewTestCase):
+    """Server-side paging of snapshots landing page JSON"""
+    snapshots = [
+        dict(id='snap-1', name='web-data', start_time='2017-01-03', tags=''),
+        dict(id='snap-2', name='Backup', start_time='2017-01-01', tags=''),
+        dict(id='snap-3', name='db-data', start_time='2017-01-02', tags=''),
+    ]
+
+    def get_page(self, **params):
+        request = self.create_request(params=params)
+        return SnapshotsJsonView(request).get_paged_results(self.snapshots)
+
+    def test_all_results_returned_without_page_size(self):
+        self.assertEqual(self.get_page(), dict(results=self.snapshots))
+
+    def test_results_sorted_and_paged(self):
+        page = self.get_page(page_size='2', sort='-start_time')
+        self.assertEqual([snap['id'] for snap in page['results']], ['snap-1', 'snap-3'])
+        self.assertEqual(page['total'], 3)
+        next_page = self.get_page(page_size='2', sort='-start_time', page_token=page['next_page_token'])
+        self.assertEqual([snap['id'] for snap in next_page['results']], ['snap-2'])
+        self.assertIsNone(next_page['next_page_token'])
+
+    def test_results_searched_by_filter_keys(self):
+        request = self.create_request(params=dict(page_size='10', sort='name', search='DATA'))
+        request.params.add('filter_keys', 'start_time')  # ignored in favour of the view's filter_keys
+        page = SnapshotsJsonView(request).get_paged_results(self.snapshots)
+        self.assertEqual([snap['id'] for snap in page['results']], ['snap-3', 'snap-1'])
+        self.assertEqual(page['total'], 2)
+
+    def test_unknown_sort_falls_back_to_initial_sort(self):
+        page = self.get_page(page_size='10', sort='__class__')
+        self.assertEqual([snap['id'] for snap in page['results']], ['snap-1', 'snap-3', 'snap-2'])
+
+    def test_results_streamed_when_enabled(self):
+        request = self.create_request()
+        request.registry.settings = {'json.streaming': 'true'}
+        response = SnapshotsJsonView(request).get_paged_results(iter(self.snapshots))
+        self.assertEqual(response.__class__, StreamingJSONResponse)
+        self.assertEqual(json.loads(''.join(response.app_iter)), dict(results=self.snapshots))
+
+    def test_streamed_results_keep_connections_until_closed(self):
+        request = self.create_request()
+        request.registry.settings = {'json.streaming': 'true'}
+        view = SnapshotsJsonView(request)
+        conn = Mock(suppress_consec_slashes=False)
+        view._get_checked_out_connections_()['ec2'] = conn
+        response = view.get_json_results(iter(self.snapshots))
+        view._return_connections_(request)  # the request finishes before the body is sent
+        self.assertFalse(conn.suppress_consec_slashes)
+        self.assertEqual(json.loads(''.join(response.app_iter)), dict(results=self.snapshots))
+        response.app_iter.close()
+        self.assertTrue(conn.suppress_consec_slashes)  # reset as the connection went back to the pool
+
+    def test_stream_closed_with_error_when_results_fail(self):
+        def results():
+            yield self.snapshots[0]
+            raise ValueError('boom')
+
+        response = StreamingJSONResponse(results(), total=3)
+        body = json.loads(''.join(response.app_iter))
+        self.assertEqual(body['results'], self.snapshots[:1])
+        self.assertTrue(body['error'])
+        self.assertEqual(body['total'], 3)
+
+    def test_page_token_requires_same_sort(self):
+        page = self.get_page(page_size='1', sort='name')
+        self.assertRaises(JSONError, self.get_page, page_size='1', sort='-name', page_token=page['next_page_token'])
+        self.assertRaises(JSONError, self.get_page, page_size='1', page_token='bogus')
+
+
+class ImagesBySnapshotTestCase(BaseViewTestCase):
+    """Reverse index of snapshot id to the images registered from it"""
+    @staticmethod
+    def make_image(image_id, root_device_name, mappings):
+        bdm = dict((name, Mock(snapshot_id=snapshot_id)) for name, snapshot_id in mappings.items())
+        return Mock(id=image_id, name=image_id, root_device_name=root_device_name, block_device_mapping=bdm)
+
+    def test_index_uses_root_device_snapshot(self):
+        images = [
+            self.make_image('emi-1', '/dev/sda', {'/dev/sda': 'snap-1', '/dev/sdb': 'snap-2'}),
+            self.make_image('emi-2', '&#x2f;dev&#x2f;sda', {'/dev/sda': 'snap-1'}),
+            self.make_image('emi-3', '/dev/sda1', {'/dev/sda1': None}),
+            Mock(id='emi-4', name='emi-4', root_device_name=None, block_device_mapping=None),
+        ]
+        index = ImagesBySnapshotMixin.index_images_by_snapshot(images)
+        self.assertEqual(index, {'snap-1': [dict(id='emi-1', name='emi-1'), dict(id='emi-2', name='emi-2')]})
+
+    def test_images_described_once_per_request(self):
+        calls = []
+
+        def get_all_images(owners=None):
+            calls.append(owners)
+            return [self.make_image('emi-1', '/dev/sda', {'/dev/sda': 'snap-1'})]
+
+        view = SnapshotsView(self.create_request())
+        view.conn = Mock(get_all_images=get_all_images)
+        self.assertEqual(view.get_images_registered('snap-1'), [dict(id='emi-1', name='emi-1')])
+        self.assertIsNone(view.get_images_registered('snap-2'))
+        self.assertEqual(calls, ['self'])
+
+    def test_lookup_filters_by_snapshot(self):
+        calls = []
+
+        def get_all_images(owners=None, filters=None):
+            calls.append((owners, filters))
+            return [self.make_image('emi-1', '/dev/sda', {'/dev/sda': 'snap-1'})]
+
+        view = SnapshotsView(self.create_request())
+        view.conn = Mock(get_all_images=get_all_images)
+        view._images_by_snapshot_ = {}  # a stale cached index is not consulted
+        self.assertEqual(view.lookup_images_by_snapshot(['snap-1']), {'snap-1': [dict(id='emi-1', name='emi-1')]})
+        self.assertEqual(calls, [('self', {'block-device-mapping.snapshot-id': ['snap-1']})])
+
+
 class SnapshotViewTests(BaseViewTestCase):
     """Snapshot detail page view"""
 
@@ -0,0 +1,78 @@
+# Copyright 2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Benchmark for the CloudFormation template AWS compatibility analyzer
+
+Builds templates with thousands of resources from the real-world template in this directory
+(plus resources of every unsupported type) and times StackWizardView.identify_aws_template.
+
+Run from the top of the source tree:
+    python -m tests.stacks.benchmark_aws_analyzer [resource count ...]
+
+"""
+import copy
+import os
+import sys
+import timeit
+
+import simplejson as json
+
+from eucaconsole.constants.stacks import AWS_RESOURCE_PREFIXES, UNSUPPORTED_PROPERTIES
+from eucaconsole.views.stacks import StackWizardView
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(__file__), 'test_template.json')
+
+
+def make_template(resource_count):
+    """Return a template with about resource_count resources, copied from test_template.json"""
+    with open(TEMPLATE_FILE) as fd:
+        base = json.load(fd)
+    extra = dict(base['Resources'])
+    for idx, prefix in enumerate(AWS_RESOURCE_PREFIXES):
+        extra['Unsupported{0}'.format(idx)] = {'Type': prefix, 'Properties': {}}
+    for idx, props in enumerate(UNSUPPORTED_PROPERTIES):
+        extra['Property{0}'.format(idx)] = {
+            'Type': props['resource'], 'Properties': dict((prop, 'value') for prop in props['properties'])}
+    extra['MappedImage'] = {'Type': 'AWS::EC2::Instance', 'Properties': {
+        'ImageId': {'Fn::FindInMap': ['AWSRegionArch2AMI', {'Ref': 'AWS::Region'}, 'PV64']}}}
+    template = copy.deepcopy(base)
+    template['Resources'] = {}
+    for idx in range(max(1, resource_count / len(extra))):
+        for name, resource in extra.items():
+            template['Resources']['{0}{1}'.format(name, idx)] = copy.deepcopy(resource)
+    return template
+
+
+def run(resource_counts, repeat=5):
+    for resource_count in resource_counts:
+        template = make_template(resource_count)
+        analyze = lambda: StackWizardView.identify_aws_template(template)
+        best = min(timeit.repeat(analyze, number=1, repeat=repeat))
+        print('{0:>7} resources  {1:>5} exceptions  {2:8.2f} ms'.format(
+            len(template['Resources']), len(analyze()), best * 1000))
+
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or [1000, 5000, 20000])
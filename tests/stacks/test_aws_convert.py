@@ -96,3 +96,47 @@ class TestAWSConvert(unittest.TestCase):
         items = StackWizardView.identify_aws_template(parsed, modify=False)
         # verify no more items
         self.assertTrue(len(items) == 0)
+
+    def test_aws_exceptions_listed(self):
+        from eucaconsole.views.stacks import StackWizardView
+        parsed = json.loads(open("tests/stacks/test_template.json", 'r').read())
+        items = StackWizardView.identify_aws_template(parsed)
+        self.assertEqual([(item['name'], item['type']) for item in items], [
+            ('DBSecurityGroup', 'AWS::RDS'), ('MySQLDatabase', 'AWS::RDS'), ('ImageId', 'Parameter')])
+
+
+class TestAWSTemplateAnalyzer(unittest.TestCase):
+    def test_prefix_trie(self):
+        from eucaconsole.models.stacks import PrefixTrie
+        trie = PrefixTrie(['AWS::EC2::VPNConnectionRoute', 'AWS::EC2::VPNConnection', 'AWS::SNS'])
+        self.assertEqual(trie.match('AWS::EC2::VPNConnectionRoute'), [0, 1])
+        self.assertEqual(trie.match('AWS::EC2::VPNConnection'), [1])
+        self.assertEqual(trie.match('AWS::EC2::VPNGateway'), [])
+        self.assertEqual(trie.match('AWS::SNS::Topic'), [2])
+
+    def test_exceptions_in_template_order(self):
+        from eucaconsole.models.stacks import AWSTemplateAnalyzer
+        parsed = {
+            'Mappings': {'Images': {'us-east-1': {'64': 'emi-12345678'}}, 'AMIs': {'us-east-1': {'64': 'ami-1'}}},
+            'Resources': {
+                'Queue': {'Type': 'AWS::SQS::Queue'},
+                'Volume': {'Type': 'AWS::EC2::Volume', 'Properties': {'Tags': [], 'Size': '1'}},
+                'Server': {'Type': 'AWS::EC2::Instance', 'Properties': {
+                    'ImageId': {'Fn::FindInMap': ['Images', {'Ref': 'AWS::Region'}, '64']}}},
+                'AwsServer': {'Type': 'AWS::EC2::Instance', 'Properties': {
+                    'ImageId': {'Fn::FindInMap': ['AMIs', {'Ref': 'AWS::Region'}, '64']}}},
+            },
+        }
+        items = AWSTemplateAnalyzer().analyze(parsed)
+        self.assertEqual([(item['name'], item['type'], item.get('property', False)) for item in items], [
+            ('Queue', 'AWS::SQS', False), ('Tags', 'AWS::EC2::Volume', True), ('ImageId', 'Parameter', False)])
+        self.assertIs(items[2]['item'], parsed['Resources']['AwsServer']['Properties'])
+
+    def test_deeply_nested_image_ref(self):
+        from eucaconsole.models.stacks import AWSTemplateAnalyzer
+        nested = {'ImageId': {'Fn::GetAtt': ['Lookup', 'ImageId']}}
+        for idx in range(10):
+            nested = {'Level{0}'.format(idx): [nested]}
+        parsed = {'Resources': {'Server': {'Type': 'AWS::EC2::Instance', 'Metadata': nested}}}
+        items = AWSTemplateAnalyzer().analyze(parsed)
+        self.assertEqual([item['name'] for item in items], ['ImageId'])
@@ -0,0 +1,179 @@
+# Copyright 2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Stack wizard tests
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from eucaconsole.forms import CFSampleTemplateManager
+from eucaconsole.views.stacks import StackWizardView, ParsedTemplateCache
+
+from tests import BaseViewTestCase, Mock
+
+
+class StackParamOptionKeysTestCase(unittest.TestCase):
+    """Guessing option lists for template parameters"""
+    def get_keys(self, name, param_type='String', is_aws=False, **param):
+        param['Type'] = param_type
+        return StackWizardView.get_param_option_keys(name, param, is_aws=is_aws)
+
+    def test_option_keys_by_name_and_type(self):
+        self.assertEqual(self.get_keys('KeyName'), ('keys', []))
+        self.assertEqual(self.get_keys('WebServer', 'AWS::EC2::Instance::Id'), ('instances', []))
+        self.assertEqual(self.get_keys('ServerCertificate'), ('certs', []))
+        self.assertEqual(self.get_keys('DataVolume'), ('volumes', []))
+        self.assertEqual(self.get_keys('Description'), (None, []))
+
+    def test_vmtypes_only_without_allowed_values(self):
+        self.assertEqual(self.get_keys('InstanceType'), ('vmtypes', []))
+        self.assertEqual(self.get_keys('InstanceType', AllowedValues=['m1.small']), (None, []))
+
+    def test_image_keys_by_cloud_type(self):
+        self.assertEqual(self.get_keys('ImageId'), (None, ['images']))
+        self.assertEqual(self.get_keys('ImageId', is_aws=True), (None, ['images_self', 'images_amazon']))
+
+
+class StackParamListTestCase(BaseViewTestCase):
+    """Option lists are fetched once per request however many parameters use them"""
+    parsed = {'Parameters': {
+        'KeyName': {'Type': 'AWS::EC2::KeyPair::KeyName'},
+        'Instance1': {'Type': 'AWS::EC2::Instance::Id'},
+        'Instance2': {'Type': 'AWS::EC2::Instance::Id'},
+        'ImageId': {'Type': 'AWS::EC2::Image::Id'},
+        'InstanceType': {'Type': 'String', 'AllowedValues': ['m1.small', 'm1.large']},
+    }}
+
+    def make_view(self):
+        request = self.create_request()
+        request.registry.settings = {}
+        view = StackWizardView(request)
+        view.calls = []
+
+        def make_provider(name):
+            def provider(**kwargs):
+                view.calls.append(name)
+                return [(name + '-1', name)]
+            return provider
+
+        for method_name in ['get_key_options', 'get_instance_options', 'get_image_options']:
+            setattr(view, method_name, make_provider(method_name))
+        return view
+
+    def test_providers_called_once(self):
+        view = self.make_view()
+        params = dict((param['name'], param) for param in view.generate_param_list(self.parsed))
+        self.assertEqual(sorted(view.calls), ['get_image_options', 'get_instance_options', 'get_key_options'])
+        self.assertEqual(params['Instance2']['options'], [('get_instance_options-1', 'get_instance_options')])
+        self.assertEqual(params['Instance2']['default'], 'get_instance_options-1')
+        self.assertEqual(params['InstanceType']['options'], [('m1.small', 'm1.small'), ('m1.large', 'm1.large')])
+        self.assertTrue(params['ImageId']['chosen'])
+        # a second template in the same request reuses the fetched options
+        view.generate_param_list(self.parsed)
+        self.assertEqual(len(view.calls), 3)
+
+
+class CFSampleTemplateCatalogTestCase(unittest.TestCase):
+    """Sample template listings and bodies are cached across requests"""
+    def setUp(self):
+        self.template_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.template_dir, 'Samples'))
+        self.template_path = os.path.join(self.template_dir, 'Samples', 'Basic.json')
+        with open(self.template_path, 'w') as fd:
+            fd.write('{"Resources": {}}')
+        CFSampleTemplateManager._catalog_.clear()
+        CFSampleTemplateManager._bodies_.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.template_dir)
+        CFSampleTemplateManager._catalog_.clear()
+        CFSampleTemplateManager._bodies_.clear()
+
+    def make_manager(self):
+        mgr = CFSampleTemplateManager(None)
+        mgr.template_dir = self.template_dir
+        return mgr
+
+    def test_listing_cached(self):
+        self.assertEqual(self.make_manager().get_template_options(),
+                         [{'name': 'Basic.json', 'label': 'Basic', 'group': 'Samples'}])
+        os.remove(self.template_path)
+        self.assertEqual(len(self.make_manager().get_template_options()), 1)
+
+    def test_body_reread_when_mtime_changes(self):
+        self.assertEqual(self.make_manager().get_template_body('Basic.json'), '{"Resources": {}}')
+        self.assertIsNone(self.make_manager().get_template_body('Missing.json'))
+        with open(self.template_path, 'w') as fd:
+            fd.write('{"Resources": {"changed": {}}}')
+        # served from the body cache until the catalog sees a new mtime
+        self.assertEqual(self.make_manager().get_template_body('Basic.json'), '{"Resources": {}}')
+        os.utime(self.template_path, (0, 0))
+        CFSampleTemplateManager._catalog_.clear()
+        self.assertEqual(self.make_manager().get_template_body('Basic.json'), '{"Resources": {"changed": {}}}')
+
+
+class ParsedTemplateCacheTestCase(unittest.TestCase):
+    """Parsed templates are keyed by the MD5 of their body"""
+    body = '{"Resources": {"Server": {"Type": "AWS::EC2::Instance"}}}'
+
+    def test_parse_once_per_content(self):
+        cache = ParsedTemplateCache()
+        content_hash, parsed = cache.parse(self.body)
+        self.assertEqual(content_hash, ParsedTemplateCache.get_content_hash(unicode(self.body)))
+        self.assertIs(cache.parse(self.body)[1], parsed)
+        self.assertIs(cache.get(content_hash)['parsed'], parsed)
+
+    def test_least_recently_used_evicted(self):
+        cache = ParsedTemplateCache(max_entries=2)
+        first_hash = cache.parse('{"a": 1}')[0]
+        second_hash = cache.parse('{"b": 2}')[0]
+        cache.get(first_hash)
+        cache.parse('{"c": 3}')
+        self.assertIsNotNone(cache.get(first_hash))
+        self.assertIsNone(cache.get(second_hash))
+
+
+class StoreTemplateTestCase(BaseViewTestCase):
+    """Identical template bodies are not uploaded again"""
+    body = '{"Resources": {}}'
+
+    def store(self, etag):
+        uploads = []
+        key = Mock(etag=etag, set_contents_from_string=uploads.append)
+        request = self.create_request()
+        request.registry.settings = {}
+        view = StackWizardView(request)
+        view.get_create_template_bucket = lambda create=False: Mock(get_key=lambda name: key)
+        view.store_template('template.json', self.body)
+        return uploads
+
+    def test_identical_body_not_uploaded(self):
+        self.assertEqual(self.store('"{0}"'.format(ParsedTemplateCache.get_content_hash(self.body))), [])
+
+    def test_changed_body_uploaded(self):
+        self.assertEqual(self.store('"0123456789abcdef"'), [self.body])
@@ -0,0 +1,167 @@
+# Copyright 2013-2017 Ent. Services Development Corporation LP
+#
+# Redistribution and use of this software in source and binary forms,
+# with or without modification, are permitted provided that the following
+# conditions are met:
+#
+# Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+IAM user tests
+
+"""
+import unittest
+
+from boto.exception import BotoServerError
+
+from eucaconsole.models.iam import GroupMembershipIndex
+from eucaconsole.parallel import ParallelCalls
+from eucaconsole.views import BaseView
+from eucaconsole.views.users import MAX_USER_SUMMARIES, UserSummaryMixin, UsersJsonView
+
+from tests import BaseViewTestCase, Mock
+
+
+class MockIAMConnection(object):
+    """Answers get_group a page at a time and get_groups_for_user in one page, counting the calls"""
+    def __init__(self, members, page_size=2):
+        self.members = members  # dict of {group_name: [user_name, ...]}
+        self.page_size = page_size
+        self.calls = []
+
+    def get_all_users(self):
+        self.calls.append('ListUsers')
+        user_names = sorted(set(name for users in self.members.values() for name in users))
+        return Mock(users=[Mock(user_name=name) for name in user_names])
+
+    def get_all_groups(self):
+        self.calls.append('ListGroups')
+        return Mock(groups=[Mock(group_name=name) for name in sorted(self.members)])
+
+    def get_group(self, group_name, marker=None):
+        self.calls.append('GetGroup')
+        start = int(marker or 0)
+        users = self.members[group_name][start:start + self.page_size]
+        is_truncated = start + self.page_size < len(self.members[group_name])
+        return Mock(users=[Mock(user_name=name) for name in users],
+                    is_truncated='true' if is_truncated else 'false', marker=str(start + self.page_size))
+
+    def get_groups_for_user(self, user_name, marker=None):
+        self.calls.append('ListGroupsForUser')
+        groups = [name for name, users in self.members.items() if user_name in users]
+        return Mock(groups=[Mock(group_name=name) for name in groups], is_truncated='false')
+
+
+class GroupMembershipIndexTestCase(unittest.TestCase):
+    members = {
+        'admins': ['alice'],
+        'developers': ['alice', 'bob', 'carol'],
+        'testers': ['carol'],
+    }
+
+    def test_index_from_group_members(self):
+        conn = MockIAMConnection(self.members)
+        index = GroupMembershipIndex(GroupMembershipIndex.index_groups(
+            conn, sorted(self.members), ['alice', 'bob', 'carol', 'dave'], ParallelCalls(max_workers=2)))
+        self.assertEqual(index.get_groups('alice'), ['admins', 'developers'])
+        self.assertEqual(index.get_groups('carol'), ['developers', 'testers'])
+        self.assertEqual(index.get_groups('dave'), [])
+        # One call per group, plus one for the second page of developers
+        self.assertEqual(conn.calls.count('GetGroup'), 4)
+        self.assertNotIn('ListGroupsForUser', conn.calls)
+
+    def test_count_members(self):
+        index = GroupMembershipIndex(GroupMembershipIndex.index_groups(
+            MockIAMConnection(self.members), sorted(self.members), ['alice', 'bob', 'carol'], ParallelCalls()))
+        self.assertEqual(index.count_members(), {'admins': 1, 'developers': 3, 'testers': 1})
+
+    def test_index_from_user_groups_when_fewer_users(self):
+        conn = MockIAMConnection(self.members)
+        index = GroupMembershipIndex(GroupMembershipIndex.index_groups(
+            conn, sorted(self.members), ['alice', 'bob'], ParallelCalls(max_workers=2)))
+        self.assertEqual(index.get_groups('alice'), ['admins', 'developers'])
+        self.assertEqual(index.get_groups('bob'), ['developers'])
+        self.assertEqual(conn.calls, ['ListGroupsForUser'] * 2)
+
+
+class GroupMembershipIndexViewTestCase(BaseViewTestCase):
+
+    def test_index_built_without_cache(self):
+        conn = MockIAMConnection(GroupMembershipIndexTestCase.members)
+        view = BaseView(self.create_request())
+        index = view.get_group_membership_index(iam_conn=conn)
+        self.assertEqual(index.get_groups('bob'), ['developers'])
+        self.assertEqual(index.count_members(), {'admins': 1, 'developers': 3, 'testers': 1})
+        view.invalidate_iam_caches()
+
+
+class MockSummaryConnection(object):
+    """alice has a password and one active key; bob was disabled by the console"""
+    def get_login_profiles(self, user_name):
+        if user_name != 'alice':
+            raise BotoServerError(404, 'Not Found')
+        return Mock()
+
+    def get_all_user_policies(self, user_name):
+        policy_names = [UserSummaryMixin.EUCA_DENY_POLICY] if user_name == 'bob' else []
+        return Mock(policy_names=policy_names)
+
+    def get_all_access_keys(self, user_name):
+        keys = [Mock(status='Active'), Mock(status='Inactive')]
+        return Mock(list_access_keys_result=Mock(access_key_metadata=keys))
+
+
+class UserSummaryTestCase(BaseViewTestCase):
+
+    class SummaryView(UsersJsonView):
+        def __init__(self, request, conn):
+            BaseView.__init__(self, request)  # skip connecting to IAM
+            self.conn = conn
+
+    def test_summaries_in_requested_order(self):
+        view = self.SummaryView(self.create_request(), MockSummaryConnection())
+        summaries = view.get_user_summaries(['bob', 'alice'])
+        self.assertEqual([summary['user_name'] for summary in summaries], ['bob', 'alice'])
+        self.assertEqual(summaries[0]['user_enabled'], False)
+        self.assertEqual(summaries[0]['num_keys'], 0)
+        self.assertEqual(summaries[1]['has_password'], True)
+        self.assertEqual(summaries[1]['num_keys'], 1)
+
+    def test_summary_request_capped(self):
+        request = self.create_request(session=dict(cloud_type='euca'))
+        for idx in range(MAX_USER_SUMMARIES + 1):
+            request.params.add('user_name', 'user{0}'.format(idx))
+        response = self.SummaryView(request, MockSummaryConnection()).users_summary_json()
+        self.assertEqual(response.status_int, 400)
+
+
+class CachedIAMLookupsTestCase(BaseViewTestCase):
+
+    def test_lookups_fetched_once_per_name(self):
+        fetched = []
+
+        def fetch(name):
+            fetched.append(name)
+            return None if name == 'missing' else name.upper()
+
+        view = BaseView(self.create_request())
+        values = view.get_cached_iam_lookups('test_lookups', ['a', 'b', 'a', 'missing'], fetch)
+        self.assertEqual(values, {'a': 'A', 'b': 'B', 'missing': None})
+        self.assertEqual(sorted(fetched), ['a', 'b', 'missing'])
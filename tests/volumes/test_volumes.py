@@ -29,7 +29,12 @@ Volumes tests
 See http://docs.pylonsproject.org/projects/pyramid/en/latest/narr/testing.html
 
 """
+import unittest
+import xml.sax
+
 from boto.ec2 import connect_to_region
+from boto.handler import XmlHandler
+from boto.resultset import ResultSet
 from moto import mock_ec2
 
 from pyramid import testing
@@ -39,7 +44,8 @@ from eucaconsole.forms import BaseSecureForm
 from eucaconsole.forms.volumes import (
     VolumeForm, DeleteVolumeForm, CreateSnapshotForm, DeleteSnapshotForm, AttachForm, DetachForm)
 from eucaconsole.views import TaggedItemView
-from eucaconsole.views.volumes import VolumesView, VolumeView, VolumeStateView, VolumeSnapshotsView
+from eucaconsole.views.volumes import (
+    SnapshotJoinFields, VolumesView, VolumeView, VolumeStateView, VolumeSnapshotsView)
 
 from tests import BaseViewTestCase, BaseFormTestCase
 
@@ -239,3 +245,21 @@ class MockVolumeSnapshotsViewTestCase(BaseViewTestCase, MockVolumeMixin):
         snapshot = results[0]
         self.assertEqual(snapshot.get('description'), snapshot_description)
         self.assertEqual(snapshot.get('name'), new_snapshot.id)
+
+
+class SnapshotJoinFieldsTestCase(unittest.TestCase):
+
+    def test_only_join_fields_parsed(self):
+        body = (
+            '<DescribeSnapshotsResponse><snapshotSet>'
+            '<item><snapshotId>snap-1</snapshotId><volumeId>vol-1</volumeId><status>completed</status>'
+            '<tagSet><item><key>Name</key><value>nightly</value></item></tagSet></item>'
+            '<item><snapshotId>snap-2</snapshotId><volumeId>vol-1</volumeId></item>'
+            '</snapshotSet></DescribeSnapshotsResponse>'
+        )
+        snapshots = ResultSet([('item', SnapshotJoinFields)])
+        xml.sax.parseString(body, XmlHandler(snapshots, None))
+        self.assertEqual([(snapshot.id, snapshot.volume_id) for snapshot in snapshots],
+                         [('snap-1', 'vol-1'), ('snap-2', 'vol-1')])
+        self.assertEqual(snapshots[0].tags.get('Name'), 'nightly')
+        self.assertFalse(hasattr(snapshots[0], 'status'))